@@ -0,0 +1,195 @@
+"""Control de admisión por clase de ruta (``AUTOERP_ADMISSION=1``).
+
+Los handlers sync comparten el threadpool de anyio: sin límites, una ráfaga
+de listados o exports ocupa todos los hilos, ``GET /vehicles/{id}`` y
+``/health`` esperan detrás y la cola crece hasta que los clientes cortan.
+
+Cada ruta cae en una clase (``read``, ``list``, ``bulk``, ``write``) con su
+propio ``Gate``: N requests a la vez, una cola de largo acotado y una
+espera máxima en la cola.  Lo que no entra responde enseguida 503 con
+``Retry-After``: bajo sobrecarga, los que sí entran mantienen la latencia
+acotada y el proceso no acumula trabajo que ya nadie espera.
+
+``install(app)`` envuelve el ASGI app de cada ruta (después del ruteo: no
+agrega ninguna búsqueda) y ``configure_threadpool()`` deja el threadpool
+más grande que la suma de los límites, así una clase nunca se queda sin
+hilos por culpa de otra.  ``/health`` y ``/metrics`` no pasan por ningún
+gate.  Los límites se exponen en ``/metrics`` (``autogo_admission_*``).
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse
+
+from autogo_erp import metrics
+from autogo_erp.config import Config
+
+READ_METHODS = {"GET", "HEAD"}
+
+# ===== Clasificación de rutas (por template, no por path) =====
+EXEMPT = {"/health", "/metrics"}
+# Trabajo largo o pesado: streaming, PDFs, imports, lotes, subidas (fotos, archivos de jobs)
+BULK_PREFIXES = ("/exports/", "/documents/", "/imports/", "/admin/summary/")
+BULK_ROUTES = {
+    ("GET", "/inventory"),
+    ("POST", "/vehicles/batch"),
+    ("POST", "/vehicles/{vehicle_id:int}/photos"),
+    ("POST", "/jobs/uploads"),
+}
+# Listados paginados y agregados
+LIST_PREFIXES = ("/dashboard/",)
+LIST_ROUTES = {"/vehicles/", "/vehicles/search", "/tramites/", "/tramites/documentos", "/sales/receivables/aging", "/jobs"}
+
+def classify(route: APIRoute) -> Optional[str]:
+    """Clase de admisión de ``route`` (None = sin límite)."""
+    path, methods = route.path, route.methods or set()
+    if path in EXEMPT:
+        return None
+    if path.startswith(BULK_PREFIXES) or any((m, path) in BULK_ROUTES for m in methods):
+        return "bulk"
+    if methods - READ_METHODS:
+        return "write"
+    if path in LIST_ROUTES or path.startswith(LIST_PREFIXES):
+        return "list"
+    return "read"
+
+
+# ===== Gate: concurrencia + cola acotada + espera máxima =====
+class Gate:
+    """Semáforo del event loop con cola FIFO acotada y espera máxima.
+
+    Al liberar, el lugar pasa directo al primero de la cola (no se puede
+    colar un request nuevo delante de los que esperan).
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait_ms: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.active = 0
+        self._waiters: deque = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """None si entró; si no, el motivo del rechazo ("queue_full" o "timeout")."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiters.append(fut)
+        # Sin asyncio.wait_for: si el lugar llega justo antes de una cancelación,
+        # wait_for devuelve el resultado y se traga la cancelación (3.11)
+        timer = loop.call_later(self.max_wait, self._expire, fut)
+        try:
+            await fut
+            return None
+        except asyncio.TimeoutError:
+            return "timeout"
+        except BaseException:
+            # Cancelado (cliente cortó): si justo le habían pasado el lugar, devolverlo
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self.release()
+            else:
+                self._discard(fut)
+            raise
+        finally:
+            timer.cancel()
+
+    def _expire(self, fut) -> None:
+        if not fut.done():
+            self._discard(fut)
+            fut.set_exception(asyncio.TimeoutError())
+
+    def _discard(self, fut) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)  # el lugar pasa al que espera; active no cambia
+                return
+        self.active -= 1
+
+
+def _gates() -> Dict[str, Gate]:
+    c = Config
+    return {
+        "read": Gate("read", c.ADMISSION_READ_CONCURRENCY, c.ADMISSION_READ_QUEUE, c.ADMISSION_READ_MAX_WAIT_MS),
+        "list": Gate("list", c.ADMISSION_LIST_CONCURRENCY, c.ADMISSION_LIST_QUEUE, c.ADMISSION_LIST_MAX_WAIT_MS),
+        "bulk": Gate("bulk", c.ADMISSION_BULK_CONCURRENCY, c.ADMISSION_BULK_QUEUE, c.ADMISSION_BULK_MAX_WAIT_MS),
+        "write": Gate("write", c.ADMISSION_WRITE_CONCURRENCY, c.ADMISSION_WRITE_QUEUE, c.ADMISSION_WRITE_MAX_WAIT_MS),
+    }
+
+gates = _gates()
+
+SHED = metrics.Counter("autogo_admission_shed_total", "Requests rechazados con 503", ("class", "reason"))
+metrics.REGISTRY.append(SHED)
+
+def _collect() -> metrics.Collected:
+    if not Config.ADMISSION_ENABLED:
+        return []
+    by_class = ("class",)
+    return [
+        ("autogo_admission_limit", "gauge", "Requests simultáneos permitidos",
+         by_class, {(n,): g.concurrency for n, g in gates.items()}),
+        ("autogo_admission_active", "gauge", "Requests admitidos en curso",
+         by_class, {(n,): g.active for n, g in gates.items()}),
+        ("autogo_admission_queued", "gauge", "Requests esperando admisión",
+         by_class, {(n,): g.queued for n, g in gates.items()}),
+    ]
+
+metrics.COLLECTORS.append(_collect)
+
+
+# ===== Integración con la app =====
+def _busy() -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Server busy, retry later"},
+        status_code=503,
+        headers={"Retry-After": str(Config.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+def _wrap(app, gate: Gate):
+    async def admitted(scope, receive, send):
+        rejected = await gate.acquire()
+        if rejected is not None:
+            SHED.inc((gate.name, rejected))
+            return await _busy()(scope, receive, send)
+        try:
+            await app(scope, receive, send)
+        finally:
+            gate.release()
+    return admitted
+
+def install(app) -> None:
+    """Pone cada ruta de ``app`` detrás del gate de su clase."""
+    if not Config.ADMISSION_ENABLED:
+        return
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            name = classify(route)
+            if name is not None:
+                route.app = _wrap(route.app, gates[name])
+
+def configure_threadpool() -> None:
+    """Agranda el threadpool de anyio a THREADPOOL_SIZE (y al menos la suma de los límites + 2)."""
+    from anyio import to_thread
+
+    size = Config.THREADPOOL_SIZE
+    if Config.ADMISSION_ENABLED:
+        size = max(size, sum(g.concurrency for g in gates.values()) + 2)
+    to_thread.current_default_thread_limiter().total_tokens = size
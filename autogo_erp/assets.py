@@ -0,0 +1,178 @@
+"""Estáticos con huella (hash en el nombre) y precomprimidos.
+
+``python -m autogo_erp.assets build`` recorre ``static/`` y escribe en
+``static/dist/``:
+
+* una copia de cada archivo con el hash del contenido en el nombre
+  (``css/main.css`` -> ``css/main.3f2a9c1b7d4e.css``);
+* junto a los archivos de texto, ``.gz`` y (si está instalado el paquete
+  ``brotli``) ``.br``, sólo cuando quedan más chicos;
+* ``manifest.json`` con el mapeo ruta original -> ruta con huella.
+
+``AssetFiles`` reemplaza a ``StaticFiles`` en ``/static``: las rutas con
+huella se sirven con ``Cache-Control: immutable`` y en la mejor codificación
+que acepte el cliente; el resto se sirve como antes pero con ``no-cache``
+(se revalida por ETag).  En las plantillas, ``asset_url("css/main.css")``
+devuelve la URL con huella, o la original si no se corrió el build.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+from autogo_erp.config import Config
+
+try:  # opcional: sin brotli se generan sólo los .gz
+    import brotli
+except ImportError:
+    brotli = None
+
+URL_PREFIX = "/static"
+DIST = "dist"
+MANIFEST = "manifest.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Los PNG/JPEG/WOFF2 ya vienen comprimidos
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico"}
+
+# Preferencia del servidor entre las que acepte el cliente
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+HASH_LENGTH = 12
+
+
+# ===== Build =====
+def _fingerprint(rel: Path, data: bytes) -> Path:
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return rel.with_name(f"{rel.stem}.{digest}{rel.suffix}")
+
+def _write_compressed(dest: Path, data: bytes) -> None:
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for ext, payload in variants:
+        if len(payload) < len(data):
+            dest.with_name(dest.name + ext).write_bytes(payload)
+
+def build(static_dir: Optional[Path] = None) -> Dict[str, str]:
+    """Regenera ``static/dist`` y devuelve el manifest."""
+    static_dir = Path(static_dir or Config.STATIC_DIR)
+    dist = static_dir / DIST
+    if dist.exists():
+        shutil.rmtree(dist)
+    manifest = {}
+    for src in sorted(static_dir.rglob("*")):
+        if not src.is_file() or dist in src.parents:
+            continue
+        rel = src.relative_to(static_dir)
+        data = src.read_bytes()
+        out = _fingerprint(rel, data)
+        dest = dist / out
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(data)
+        if rel.suffix.lower() in COMPRESSIBLE:
+            _write_compressed(dest, data)
+        manifest[rel.as_posix()] = f"{DIST}/{out.as_posix()}"
+    (dist / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    manifest_for.cache_clear()
+    fingerprinted_for.cache_clear()
+    return manifest
+
+
+# ===== Resolución de URLs (plantillas) =====
+@lru_cache(maxsize=None)
+def manifest_for(static_dir: str) -> Dict[str, str]:
+    try:
+        return json.loads((Path(static_dir) / DIST / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+@lru_cache(maxsize=None)
+def fingerprinted_for(static_dir: str) -> frozenset:
+    return frozenset(manifest_for(static_dir).values())
+
+def manifest() -> Dict[str, str]:
+    return manifest_for(str(Config.STATIC_DIR))
+
+def asset_url(path: str) -> str:
+    """URL pública de ``path`` (relativo a static/; acepta "static/..." y "/static/...")."""
+    rel = path.lstrip("/")
+    if rel.startswith("static/"):
+        rel = rel[len("static/"):]
+    return f"{URL_PREFIX}/{manifest().get(rel, rel)}"
+
+
+# ===== Servidor =====
+def accepted_encodings(header: Optional[str]) -> set:
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+class AssetFiles(StaticFiles):
+    """StaticFiles con caché inmutable y precompresión para lo que está en el manifest."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._root = os.path.realpath(self.directory) if self.directory else None
+
+    def _is_fingerprinted(self, full_path) -> bool:
+        if self._root is None:
+            return False
+        rel = os.path.relpath(os.path.realpath(full_path), self._root).replace(os.sep, "/")
+        return rel in fingerprinted_for(str(self.directory))
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        if not self._is_fingerprinted(full_path):
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["Cache-Control"] = REVALIDATE
+            return response
+
+        media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+        headers = {"Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        for encoding, ext in ENCODINGS:
+            candidate = f"{full_path}{ext}"
+            if (encoding in accepted or "*" in accepted) and os.path.isfile(candidate):
+                headers["Content-Encoding"] = encoding
+                return FileResponse(candidate, status_code=status_code, media_type=media_type, headers=headers)
+        return FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers,
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generar estáticos con huella y precomprimidos")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--static-dir", default=str(Config.STATIC_DIR))
+    args = parser.parse_args(argv)
+
+    result = build(Path(args.static_dir))
+    print(f"{len(result)} archivo(s) en {Path(args.static_dir) / DIST}"
+          f"{'' if brotli is not None else ' (sin brotli: sólo .gz)'}")
+
+
+if __name__ == "__main__":
+    main()
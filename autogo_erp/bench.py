@@ -0,0 +1,309 @@
+"""Benchmark reproducible de los endpoints de AutoGo ERP.
+
+Genera (si hace falta) una base sintética con ``autogo_erp.synthetic``,
+monta la app en proceso apuntando a esa base y recorre cada endpoint de los
+routers (list, get, create, patch, delete y ``/tramites``) hablando ASGI
+directamente, sin servidor ni red.  Por escenario reporta p50/p95/p99 de
+latencia, throughput y queries SQL por request, y lo guarda como JSON para
+usarlo de línea base::
+
+    python -m autogo_erp.bench --scale 10k --out bench_baseline.json
+    python -m autogo_erp.bench --scale 10k --compare bench_baseline.json
+
+Con ``--compare`` termina con código 1 si algún escenario empeora su p95 más
+allá de ``--max-regression`` o hace más queries por request que la línea base.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import sqlalchemy
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from autogo_erp import migrations, models, synthetic
+from autogo_erp.database import make_engine
+
+
+# ===== Cliente ASGI en proceso =====
+
+async def asgi_request(app, method: str, path: str, query: str = "", body=None):
+    """Ejecuta un request contra ``app`` y devuelve (status, headers, body)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"bench")]
+    if body is not None:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(payload)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # El cliente nunca se desconecta; la app cancela esta espera al terminar.
+        await asyncio.Future()
+
+    status, resp_headers, chunks = 0, {}, []
+
+    async def send(message):
+        nonlocal status, resp_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            resp_headers = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, resp_headers, b"".join(chunks)
+
+
+# ===== Escenarios =====
+
+class Bench:
+    def __init__(self, app, engine, seed: int):
+        self.app = app
+        self.rng = random.Random(seed)
+        self.queries = 0
+        event.listen(engine, "before_cursor_execute", self._count_query)
+        with engine.connect() as conn:
+            self.max_id = conn.execute(select(func.max(models.Vehicle.id))).scalar() or 0
+        self.created = []
+        self.seq = 0
+
+    def _count_query(self, *args):
+        self.queries += 1
+
+    def _random_id(self):
+        return self.rng.randint(1, max(self.max_id, 1))
+
+    def _new_vehicle(self):
+        self.seq += 1
+        return {
+            "vin": f"BENCH{self.seq:012d}",
+            "plate": f"BN{self.seq:07d}",
+            "brand": "Toyota",
+            "model": "Corolla",
+            "year": 2020,
+            "odometer_km": 35000,
+            "acquisition_type": "TRADE_IN",
+            "seller_name": "Bench Seller",
+            "received_date": "2025-08-01",
+        }
+
+    def scenarios(self):
+        from autogo_erp.routers.vehicles import _encode_cursor
+
+        def list_first_page():
+            return "GET", "/vehicles/", "limit=50", None
+
+        def list_deep_page():
+            cursor = _encode_cursor("id", SimpleNamespace(id=self._random_id()))
+            return "GET", "/vehicles/", f"limit=50&cursor={cursor}", None
+
+        def list_filtered():
+            brand = self.rng.choice(synthetic.BRANDS)[0]
+            return "GET", "/vehicles/", f"limit=50&brand={brand}&status=AVAILABLE&sort=-received_date", None
+
+        def get_vehicle():
+            return "GET", f"/vehicles/{self._random_id()}", "", None
+
+        def get_vehicle_hot():
+            # Pocas unidades consultadas una y otra vez (dashboards, ficha abierta)
+            return "GET", f"/vehicles/{self.rng.randint(1, min(self.max_id, 50) or 1)}", "", None
+
+        def create_vehicle():
+            return "POST", "/vehicles/", "", self._new_vehicle()
+
+        def patch_vehicle():
+            body = {"odometer_km": self.rng.randint(1000, 200000)}
+            return "PATCH", f"/vehicles/{self._random_id()}", "", body
+
+        def delete_vehicle():
+            vid = self.created.pop() if self.created else self._random_id()
+            return "DELETE", f"/vehicles/{vid}", "", None
+
+        def list_tramites():
+            return "GET", "/tramites/", "", None
+
+        def create_tramite():
+            items = [{"descripcion": "Traspaso", "monto": 120.0}, {"descripcion": "Placa", "monto": 35.5}]
+            return "POST", "/tramites/", "", {"referencia": f"BENCH-{self.rng.randint(1, 10**6)}", "items": items}
+
+        return {
+            "list_first_page": list_first_page,
+            "list_deep_page": list_deep_page,
+            "list_filtered": list_filtered,
+            "get_vehicle": get_vehicle,
+            "get_vehicle_hot": get_vehicle_hot,
+            "create_vehicle": create_vehicle,
+            "patch_vehicle": patch_vehicle,
+            "delete_vehicle": delete_vehicle,
+            "list_tramites": list_tramites,
+            "create_tramite": create_tramite,
+        }
+
+    async def run(self, name, make_request, iterations: int, warmup: int):
+        latencies, query_counts, statuses = [], [], {}
+        for i in range(warmup + iterations):
+            method, path, query, body = make_request()
+            q0 = self.queries
+            t0 = time.perf_counter()
+            status, _, raw = await asgi_request(self.app, method, path, query, body)
+            elapsed = time.perf_counter() - t0
+            if name == "create_vehicle" and status == 200:
+                self.created.append(json.loads(raw)["id"])
+            if i < warmup:
+                continue
+            latencies.append(elapsed)
+            query_counts.append(self.queries - q0)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return _summarize(latencies, query_counts, statuses)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _summarize(latencies, query_counts, statuses):
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / total, 1) if total else 0.0,
+        "queries_per_request": round(statistics.fmean(query_counts), 2) if query_counts else 0.0,
+        "status_codes": statuses,
+    }
+
+
+# ===== App apuntando a la base de benchmark =====
+
+def build_app(engine):
+    """Devuelve la app con cada ``get_db`` de los routers redirigido a ``engine``.
+
+    No se ejecuta el ``startup`` de la app: el esquema y los datos los crea el
+    generador sintético.
+    """
+    from autogo_erp.main import app
+
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def bench_get_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    for module_name, module in list(sys.modules.items()):
+        if module_name.startswith("autogo_erp.routers.") and hasattr(module, "get_db"):
+            app.dependency_overrides[module.get_db] = bench_get_db
+    return app
+
+
+def compare(results: dict, baseline: dict, max_regression: float):
+    failures = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["queries_per_request"] > base["queries_per_request"]:
+            failures.append(
+                f"{name}: queries/request {base['queries_per_request']} -> {current['queries_per_request']}"
+            )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark en proceso de AutoGo ERP")
+    parser.add_argument("--url", default="sqlite:///./bench.db", help="base de benchmark (se llena si está vacía)")
+    parser.add_argument("--scale", choices=sorted(synthetic.SCALES), default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="ejecutar solo estos escenarios")
+    parser.add_argument("--out", default="bench_baseline.json")
+    parser.add_argument("--compare", help="JSON de línea base contra el cual comparar")
+    parser.add_argument("--max-regression", type=float, default=0.20, help="tolerancia de p95 (0.20 = +20%%)")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.url, "bench")  # mismos pragmas y pool que la app
+    migrations.migrate(engine)  # mismo esquema (columnas, índices, FTS) que la app
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count(models.Vehicle.id))).scalar()
+    if existing < synthetic.SCALES[args.scale]:
+        print(f"generando {synthetic.SCALES[args.scale] - existing} vehículos sintéticos...", file=sys.stderr)
+        synthetic.generate(engine, synthetic.SCALES[args.scale] - existing, seed=args.seed)
+
+    bench = Bench(build_app(engine), engine, args.seed)
+    scenarios = bench.scenarios()
+    selected = args.only or list(scenarios)
+
+    async def run_all():
+        out = {}
+        for name in selected:
+            out[name] = await bench.run(name, scenarios[name], args.iterations, args.warmup)
+            print(f"{name:>18}: p50={out[name]['p50_ms']}ms p95={out[name]['p95_ms']}ms "
+                  f"q/req={out[name]['queries_per_request']}", file=sys.stderr)
+        return out
+
+    results = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+        },
+        "scenarios": asyncio.run(run_all()),
+    }
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"resultados en {args.out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            failures = compare(results, json.load(fh), args.max_regression)
+        for line in failures:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
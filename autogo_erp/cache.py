@@ -0,0 +1,207 @@
+"""Caché en proceso (LRU + TTL) para lecturas de vehículos.
+
+Dos niveles:
+
+* ``id -> VehicleRead`` (o el cuerpo JSON ya serializado, con
+  ``AUTOERP_FAST_JSON=1``): cada entrada guarda el ``row_version`` con que se
+  armó y sólo se usa si coincide con el de la base (el mismo valor que ya se
+  consulta para el ETag).  Así una escritura en cualquier worker invalida la
+  entrada sin coordinación adicional.
+* ``vin``/``plate -> id`` (chequeos de unicidad): válidos mientras la versión
+  de la tabla ``vehicles`` no cambie.  La versión se lee una vez por sesión
+  de la tabla ``table_versions``; en PostgreSQL un hilo escucha
+  ``LISTEN/NOTIFY`` y evita esa consulta.
+
+Aparte, ``html_rows`` guarda las filas ya renderizadas del inventario HTML
+(``id -> (row_version, html)``), con la misma regla de validez.
+
+Las escrituras del router de vehículos llaman a ``invalidate`` después del
+commit.  Los contadores se exponen en ``GET /admin/cache``.
+"""
+
+import logging
+import select as _select
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from autogo_erp import versioning
+from autogo_erp.config import Config
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+_SESSION_VERSION_KEY = "autogo_vehicles_version"
+
+
+class TTLCache:
+    """LRU acotado con expiración por entrada; seguro entre hilos."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=_MISSING):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires, value = item
+            if expires < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class VehicleCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.rows = TTLCache(max_entries, ttl)
+        self.keys = TTLCache(max_entries, ttl)
+        self.invalidations = 0
+        self._keys_version = None
+        self._lock = threading.Lock()
+        self._remote_versions = {}
+        self._listening = False
+
+    # ----- versión de la tabla -----
+    def _table_version(self, db) -> int:
+        if self._listening and "vehicles" in self._remote_versions:
+            return self._remote_versions["vehicles"]
+        version = db.info.get(_SESSION_VERSION_KEY)
+        if version is None:
+            version = versioning.current(db, "vehicles")
+            db.info[_SESSION_VERSION_KEY] = version
+        return version
+
+    def _sync_keys(self, db) -> None:
+        version = self._table_version(db)
+        with self._lock:
+            if version != self._keys_version:
+                self.keys.clear()
+                self._keys_version = version
+
+    # ----- vehículo por id -----
+    def get_row(self, vehicle_id: int, row_version: int):
+        entry = self.rows.get(vehicle_id, None)
+        if entry is not None and entry[0] == row_version:
+            return entry[1]
+        return None
+
+    def put_row(self, vehicle_id: int, row_version: int, value) -> None:
+        self.rows.set(vehicle_id, (row_version, value))
+
+    # ----- id por VIN / placa -----
+    def id_for(self, db, field: str, value: str):
+        """Id del vehículo con ``field`` == ``value`` (o None), pasando por la caché."""
+        from autogo_erp.models import Vehicle
+
+        self._sync_keys(db)
+        key = (field, value)
+        found = self.keys.get(key)
+        if found is not _MISSING:
+            return found
+        found = db.execute(select(Vehicle.id).where(getattr(Vehicle, field) == value)).scalar()
+        self.keys.set(key, found)
+        return found
+
+    # ----- invalidación -----
+    def invalidate(self, *vehicle_ids, db=None) -> None:
+        for vid in vehicle_ids:
+            self.rows.pop(vid)
+        self.keys.clear()
+        with self._lock:
+            self._keys_version = None
+        if db is not None:
+            db.info.pop(_SESSION_VERSION_KEY, None)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            "by_id": self.rows.stats(),
+            "by_key": self.keys.stats(),
+            "invalidations": self.invalidations,
+            "listening": self._listening,
+        }
+
+    # ----- PostgreSQL LISTEN/NOTIFY -----
+    def start_listener(self, url) -> None:
+        """Escucha los NOTIFY que emite ``versioning.bump`` (sólo PostgreSQL)."""
+        if url.get_backend_name() != "postgresql":
+            return
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        threading.Thread(target=self._listen, args=(dsn,), name="vehicle-cache-listener", daemon=True).start()
+
+    def _listen(self, dsn: str) -> None:
+        import psycopg2
+
+        while True:
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {versioning.NOTIFY_CHANNEL}")
+                # Lo que pasó antes de escuchar se descarta: se vuelve a leer de la tabla
+                self._remote_versions.clear()
+                self._listening = True
+                while True:
+                    if _select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        name, _, version = conn.notifies.pop(0).payload.partition(":")
+                        self._remote_versions[name] = int(version)
+            except Exception:
+                log.exception("vehicle cache listener lost its connection; retrying")
+                self._listening = False
+                time.sleep(2.0)
+
+
+vehicle_cache = VehicleCache(Config.VEHICLE_CACHE_MAX_ENTRIES, Config.VEHICLE_CACHE_TTL_SECONDS)
+
+# Filas HTML del inventario: id -> (row_version, html); como en ``rows``, una
+# entrada sólo se usa si el row_version coincide (ver routers/inventory.py)
+html_rows = TTLCache(Config.HTML_ROW_CACHE_MAX_ENTRIES, Config.HTML_ROW_CACHE_TTL_SECONDS)
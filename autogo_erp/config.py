@@ -7,6 +7,7 @@ here as well.
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 
@@ -19,11 +20,15 @@ class Config:
             keep it secret.  For development purposes this default
             value suffices.
         SQLALCHEMY_DATABASE_URI: URI to the SQLite database file.  The
-            path is resolved relative to this file's directory so that
-            running the application from different working directories
-            still locates the same database.  If you wish to store the
-            database elsewhere, set the ``AUTOERP_DB_PATH`` environment
-            variable to an absolute path.
+            path is resolved relative to this file's directory
+            (``autogo_erp/autogo.db``) so that running the application
+            from different working directories still locates the same
+            database.  Earlier versions always opened ``./test.db`` in the
+            working directory; if that file exists and no path is
+            configured it is still used (with a warning at startup), so
+            upgrading does not silently switch to an empty database.  If
+            you wish to store the database elsewhere, set the
+            ``AUTOERP_DB_PATH`` environment variable to an absolute path.
         SQLALCHEMY_TRACK_MODIFICATIONS: Disables a feature that tracks
             modifications of objects and signals events.  Turning it
             off saves memory and is recommended unless you need those
@@ -35,16 +40,196 @@ class Config:
     SECRET_KEY = os.environ.get("AUTOERP_SECRET_KEY", "dev-secret-key")
 
     # Determine the database location.  Use an environment variable if
-    # provided; otherwise place the database in the package directory.
-    _default_db_path = Path(os.environ.get("AUTOERP_DB_PATH", Path(__file__).resolve().parent / "autogo.db"))
+    # provided; otherwise keep a pre-existing ./test.db (the old default)
+    # and fall back to the package directory.
+    LEGACY_DB_IN_USE = not os.environ.get("AUTOERP_DB_PATH") and Path("test.db").is_file()
+    _default_db_path = Path(
+        os.environ.get("AUTOERP_DB_PATH")
+        or (Path("test.db").resolve() if LEGACY_DB_IN_USE else Path(__file__).resolve().parent / "autogo.db")
+    )
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{_default_db_path}"
 
+    # Full SQLAlchemy URL used by the FastAPI app (database.py).  Falls
+    # back to ``DATABASE_URL`` (Heroku style) and then to the SQLite file
+    # above.  ``postgres://`` URLs are accepted.
+    DATABASE_URL = (
+        os.environ.get("AUTOERP_DATABASE_URL")
+        or os.environ.get("DATABASE_URL")
+        or SQLALCHEMY_DATABASE_URI
+    )
+
+    # SQLite tuning applied to every new connection.  WAL lets readers
+    # run while a writer commits; busy_timeout makes writers wait for the
+    # lock instead of failing with "database is locked".
+    SQLITE_JOURNAL_MODE = os.environ.get("AUTOERP_SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("AUTOERP_SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("AUTOERP_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.environ.get("AUTOERP_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("AUTOERP_SQLITE_CACHE_SIZE_KB", "65536"))
+
+    # Connection pool settings (per process).  The statement timeout only
+    # applies to PostgreSQL.
+    DB_POOL_SIZE = int(os.environ.get("AUTOERP_DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.environ.get("AUTOERP_DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.environ.get("AUTOERP_DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.environ.get("AUTOERP_DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.environ.get("AUTOERP_DB_POOL_PRE_PING", "1") == "1"
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("AUTOERP_DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+    # Lecturas (GET) en un pool propio.  Sin AUTOERP_READ_DATABASE_URL se usa
+    # la misma base: en SQLite con conexiones ``mode=ro`` sobre el WAL y en
+    # PostgreSQL con ``default_transaction_read_only``.  Con una URL de
+    # réplica, las lecturas van a la réplica.
+    READ_ROUTING = os.environ.get("AUTOERP_READ_ROUTING", "1") == "1"
+    READ_DATABASE_URL = os.environ.get("AUTOERP_READ_DATABASE_URL")
+    DB_READ_POOL_SIZE = int(os.environ.get("AUTOERP_DB_READ_POOL_SIZE", "20"))
+    DB_READ_MAX_OVERFLOW = int(os.environ.get("AUTOERP_DB_READ_MAX_OVERFLOW", "20"))
+    # Tras una escritura, el mismo cliente lee del primario durante estos
+    # segundos (cookie), para ver lo que acaba de escribir aunque la réplica
+    # vaya atrasada.  ``X-Read-Primary: 1`` fuerza lo mismo por request.
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get("AUTOERP_READ_YOUR_WRITES_SECONDS", "5"))
+
     # Disable SQLAlchemy event system overhead
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     # Enable Flask debug mode when running locally.  This should be
     # disabled in production.
     DEBUG = os.environ.get("AUTOERP_DEBUG", "1") == "1"
+    # Serve the vehicles and trámites routers with async handlers on an
+    # AsyncSession (aiosqlite / asyncpg) instead of the sync thread pool.
+    ASYNC_DB = os.environ.get("AUTOERP_ASYNC_DB", "0") == "1"
+    # Listados y lecturas de vehículos y trámites: seleccionar columnas y
+    # serializar filas directo a bytes, sin entidades ORM ni validación del
+    # response_model (ver fastjson.py).  Mismo cuerpo de respuesta.
+    FAST_JSON = os.environ.get("AUTOERP_FAST_JSON", "0") == "1"
+
+    # Aplicar migraciones pendientes al arrancar cada worker.  Con 0 se
+    # espera que se corran antes (``python -m autogo_erp.migrations``).
+    MIGRATE_ON_STARTUP = os.environ.get("AUTOERP_MIGRATE_ON_STARTUP", "1") == "1"
+
+    # In-process vehicle cache (see cache.py).  Set the size to 0 to
+    # disable it.
+    VEHICLE_CACHE_MAX_ENTRIES = int(os.environ.get("AUTOERP_CACHE_MAX_ENTRIES", "10000"))
+    VEHICLE_CACHE_TTL_SECONDS = float(os.environ.get("AUTOERP_CACHE_TTL_SECONDS", "60"))
+
+    # Vistas HTML (ver templating.py y routers/inventory.py).  Los
+    # templates compilados se guardan en JINJA_CACHE_DIR para que un worker
+    # nuevo no los recompile; cada fila del inventario se cachea ya
+    # renderizada por (id, row_version).
+    JINJA_CACHE_DIR = Path(os.environ.get("AUTOERP_JINJA_CACHE_DIR", Path(tempfile.gettempdir()) / "autogo_erp-jinja"))
+    HTML_ROW_CACHE_MAX_ENTRIES = int(os.environ.get("AUTOERP_HTML_ROW_CACHE_MAX_ENTRIES", "100000"))
+    HTML_ROW_CACHE_TTL_SECONDS = float(os.environ.get("AUTOERP_HTML_ROW_CACHE_TTL_SECONDS", "3600"))
+
+    # Fotos subidas (ver media.py): originales y variantes por hash de
+    # contenido bajo MEDIA_ROOT.  El redimensionado corre en un pool de
+    # procesos de PHOTO_WORKERS procesos (0 = uno por CPU).
+    MEDIA_ROOT = Path(os.environ.get("AUTOERP_MEDIA_ROOT", Path(__file__).resolve().parent / "media"))
+    PHOTO_MAX_UPLOAD_BYTES = int(os.environ.get("AUTOERP_PHOTO_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+    PHOTO_MAX_FILES = int(os.environ.get("AUTOERP_PHOTO_MAX_FILES", "20"))
+    PHOTO_WORKERS = int(os.environ.get("AUTOERP_PHOTO_WORKERS", "2"))
+
+    # PDFs (ver pdf.py): se renderizan en un pool de PDF_WORKERS procesos
+    # que cargan fuentes y logo una vez; el resultado se guarda en
+    # DOCUMENTS_DIR por hash de los datos de origen.  Sin las TTF se usa
+    # Helvetica.
+    PDF_WORKERS = int(os.environ.get("AUTOERP_PDF_WORKERS", "2"))
+    PDF_WARM_ON_STARTUP = os.environ.get("AUTOERP_PDF_WARM_ON_STARTUP", "1") == "1"
+    PDF_BATCH_MAX = int(os.environ.get("AUTOERP_PDF_BATCH_MAX", "10000"))
+    PDF_FONT_PATH = os.environ.get("AUTOERP_PDF_FONT_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+    PDF_FONT_BOLD_PATH = os.environ.get(
+        "AUTOERP_PDF_FONT_BOLD_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+    )
+    DOCUMENTS_DIR = Path(os.environ.get("AUTOERP_DOCUMENTS_DIR", MEDIA_ROOT / "documents"))
+
+    # Estáticos servidos en /static (relativo al directorio de trabajo,
+    # como siempre).  ``python -m autogo_erp.assets build`` genera ahí
+    # ``dist/`` con nombres con huella y variantes .gz/.br (ver assets.py).
+    STATIC_DIR = Path(os.environ.get("AUTOERP_STATIC_DIR", "static"))
+
+    # Métricas Prometheus en /metrics (ver metrics.py).  Con varios workers,
+    # METRICS_DIR es un directorio compartido donde cada uno vuelca su estado
+    # cada METRICS_FLUSH_SECONDS; /metrics devuelve la suma de todos.
+    METRICS_ENABLED = os.environ.get("AUTOERP_METRICS_ENABLED", "1") == "1"
+    METRICS_DIR = os.environ.get("AUTOERP_METRICS_DIR") or None
+    METRICS_FLUSH_SECONDS = float(os.environ.get("AUTOERP_METRICS_FLUSH_SECONDS", "5"))
+
+    # Perfilado de requests a pedido (ver profiling.py).  Apagado no agrega
+    # nada al camino del request.  Con PROFILE_TOKEN, el header
+    # X-Autogo-Profile o ?__profile=<token> perfilan ese request;
+    # PROFILE_SAMPLE_EVERY=N perfila uno de cada N y PROFILE_SLOW_MS guarda
+    # los que tarden más que eso.
+    PROFILING_ENABLED = os.environ.get("AUTOERP_PROFILING", "0") == "1"
+    PROFILE_TOKEN = os.environ.get("AUTOERP_PROFILE_TOKEN") or None
+    PROFILE_SAMPLE_EVERY = int(os.environ.get("AUTOERP_PROFILE_SAMPLE_EVERY", "0"))
+    PROFILE_SLOW_MS = float(os.environ.get("AUTOERP_PROFILE_SLOW_MS", "0"))
+    PROFILE_INTERVAL_MS = float(os.environ.get("AUTOERP_PROFILE_INTERVAL_MS", "5"))
+    PROFILE_DIR = Path(os.environ.get("AUTOERP_PROFILE_DIR", Path(tempfile.gettempdir()) / "autogo_erp-profiles"))
+    PROFILE_MAX_FILES = int(os.environ.get("AUTOERP_PROFILE_MAX_FILES", "200"))
+
+    # Rutas /admin (caché, pool, vehicle_summary, perfiles): piden el header
+    # X-Autogo-Admin con AUTOERP_ADMIN_TOKEN; si no está configurado se usa
+    # AUTOERP_PROFILE_TOKEN.  Sin ninguno de los dos responden 403.
+    # /admin/profiles acepta además el token del perfilador.
+    ADMIN_TOKEN = os.environ.get("AUTOERP_ADMIN_TOKEN") or PROFILE_TOKEN
+
+    # Control de admisión (ver admission.py).  Por clase de ruta: requests
+    # simultáneos, largo máximo de la cola y espera máxima en la cola; lo
+    # que no entra recibe 503 con Retry-After.  El threadpool de handlers
+    # sync se fija en THREADPOOL_SIZE (como mínimo la suma de los límites + 2).
+    ADMISSION_ENABLED = os.environ.get("AUTOERP_ADMISSION", "1") == "1"
+    ADMISSION_READ_CONCURRENCY = int(os.environ.get("AUTOERP_ADMISSION_READ_CONCURRENCY", "16"))
+    ADMISSION_READ_QUEUE = int(os.environ.get("AUTOERP_ADMISSION_READ_QUEUE", "128"))
+    ADMISSION_READ_MAX_WAIT_MS = float(os.environ.get("AUTOERP_ADMISSION_READ_MAX_WAIT_MS", "1000"))
+    ADMISSION_LIST_CONCURRENCY = int(os.environ.get("AUTOERP_ADMISSION_LIST_CONCURRENCY", "6"))
+    ADMISSION_LIST_QUEUE = int(os.environ.get("AUTOERP_ADMISSION_LIST_QUEUE", "32"))
+    ADMISSION_LIST_MAX_WAIT_MS = float(os.environ.get("AUTOERP_ADMISSION_LIST_MAX_WAIT_MS", "2000"))
+    ADMISSION_BULK_CONCURRENCY = int(os.environ.get("AUTOERP_ADMISSION_BULK_CONCURRENCY", "2"))
+    ADMISSION_BULK_QUEUE = int(os.environ.get("AUTOERP_ADMISSION_BULK_QUEUE", "8"))
+    ADMISSION_BULK_MAX_WAIT_MS = float(os.environ.get("AUTOERP_ADMISSION_BULK_MAX_WAIT_MS", "5000"))
+    ADMISSION_WRITE_CONCURRENCY = int(os.environ.get("AUTOERP_ADMISSION_WRITE_CONCURRENCY", "8"))
+    ADMISSION_WRITE_QUEUE = int(os.environ.get("AUTOERP_ADMISSION_WRITE_QUEUE", "64"))
+    ADMISSION_WRITE_MAX_WAIT_MS = float(os.environ.get("AUTOERP_ADMISSION_WRITE_MAX_WAIT_MS", "2000"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get("AUTOERP_ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    THREADPOOL_SIZE = int(os.environ.get("AUTOERP_THREADPOOL_SIZE", "40"))
+
+    # Trabajos en segundo plano (ver jobs.py): la tabla ``jobs`` es la cola y
+    # ``python -m autogo_erp.jobs worker`` los ejecuta en JOB_WORKERS
+    # procesos aparte de la API.  Un error se reintenta hasta
+    # JOB_MAX_ATTEMPTS veces con espera exponencial; un job sin latido
+    # durante JOB_STALE_SECONDS se considera perdido y vuelve a la cola.
+    # Archivos subidos y resultados en JOBS_DIR, por JOB_RETENTION_HOURS.
+    JOB_WORKERS = int(os.environ.get("AUTOERP_JOB_WORKERS", "2"))
+    JOB_POLL_SECONDS = float(os.environ.get("AUTOERP_JOB_POLL_SECONDS", "1"))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("AUTOERP_JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BASE_SECONDS = float(os.environ.get("AUTOERP_JOB_RETRY_BASE_SECONDS", "10"))
+    JOB_RETRY_MAX_SECONDS = float(os.environ.get("AUTOERP_JOB_RETRY_MAX_SECONDS", "600"))
+    JOB_HEARTBEAT_SECONDS = float(os.environ.get("AUTOERP_JOB_HEARTBEAT_SECONDS", "10"))
+    JOB_STALE_SECONDS = float(os.environ.get("AUTOERP_JOB_STALE_SECONDS", "120"))
+    JOB_PROGRESS_SECONDS = float(os.environ.get("AUTOERP_JOB_PROGRESS_SECONDS", "1"))
+    JOB_RETENTION_HOURS = float(os.environ.get("AUTOERP_JOB_RETENTION_HOURS", "72"))
+    JOB_MAX_UPLOAD_BYTES = int(os.environ.get("AUTOERP_JOB_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+    JOBS_DIR = Path(os.environ.get("AUTOERP_JOBS_DIR", MEDIA_ROOT / "jobs"))
+
+    # Cambios de vehículos en vivo por WebSocket (ver live.py): cada escritura
+    # del router de vehículos deja un evento en ``vehicle_events`` y cada
+    # worker los lee (cada LIVE_POLL_SECONDS en SQLite; al NOTIFY en
+    # PostgreSQL) y los reparte a sus conexiones.  Cambios del mismo vehículo
+    # se juntan durante LIVE_COALESCE_MS; una conexión con más de
+    # LIVE_MAX_PENDING vehículos sin enviar, o cuyo envío tarda más de
+    # LIVE_SEND_TIMEOUT_SECONDS, se cierra (el cliente reconecta con ?since=).
+    LIVE_ENABLED = os.environ.get("AUTOERP_LIVE", "1") == "1"
+    LIVE_POLL_SECONDS = float(os.environ.get("AUTOERP_LIVE_POLL_SECONDS", "0.5"))
+    LIVE_COALESCE_MS = float(os.environ.get("AUTOERP_LIVE_COALESCE_MS", "200"))
+    LIVE_MAX_PENDING = int(os.environ.get("AUTOERP_LIVE_MAX_PENDING", "1000"))
+    LIVE_SEND_TIMEOUT_SECONDS = float(os.environ.get("AUTOERP_LIVE_SEND_TIMEOUT_SECONDS", "10"))
+    LIVE_MAX_CONNECTIONS = int(os.environ.get("AUTOERP_LIVE_MAX_CONNECTIONS", "1000"))
+    LIVE_RETENTION_SECONDS = float(os.environ.get("AUTOERP_LIVE_RETENTION_SECONDS", "900"))
+
+    # Búsqueda (ver search.py): la relevancia se calcula sólo sobre los
+    # SEARCH_CANDIDATES coincidentes más recientes, que son también el máximo
+    # de resultados; así un término frecuente no ordena cientos de miles de filas.
+    SEARCH_CANDIDATES = int(os.environ.get("AUTOERP_SEARCH_CANDIDATES", "2000"))
+
     # Paths for AutoGo branding
     LOGO_PATH = "static/images/logo_autogo.png"
     LOGO_SMALL_PATH = "static/images/logo_autogo_small.png"
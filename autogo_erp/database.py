@@ -1,15 +1,234 @@
-from sqlalchemy import create_engine
+import logging
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from autogo_erp import metrics, profiling
+from autogo_erp.config import Config
+
+log = logging.getLogger(__name__)
+
+# URL desde el entorno (AUTOERP_DATABASE_URL / DATABASE_URL / AUTOERP_DB_PATH), ver config.py
+DATABASE_URL = Config.DATABASE_URL
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+if Config.LEGACY_DB_IN_USE and DATABASE_URL == Config.SQLALCHEMY_DATABASE_URI:
+    log.warning("Usando %s (ruta anterior por defecto); fijar AUTOERP_DB_PATH para elegir la base",
+                Config._default_db_path)
+
+# ===== Espera al pedir conexión al pool =====
+class PoolStats:
+    """Cuántas veces y cuánto se esperó por una conexión del pool, por motor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def record(self, name: str, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            s = self._data.setdefault(
+                name, {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+            )
+            s["checkouts"] += 1
+            s["wait_seconds_total"] += waited
+            s["wait_seconds_max"] = max(s["wait_seconds_max"], waited)
+            if timed_out:
+                s["timeouts"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: dict(v) for k, v in self._data.items()}
+
+pool_stats = PoolStats()
+
+class _TimedPoolMixin:
+    stats_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            # Sólo el vencimiento de pool_timeout; un error al conectar no es una espera
+            pool_stats.record(self.stats_name, time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record(self.stats_name, time.perf_counter() - started)
+        return conn
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+# ===== Fábrica de motores =====
+def _sqlite_on_connect(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}")
+    cur.execute(f"PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA cache_size=-{Config.SQLITE_CACHE_SIZE_KB}")  # negativo = KiB
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.close()
+
+def _sqlite_on_connect_ro(dbapi_conn, _record):
+    # Conexión mode=ro: journal_mode y synchronous no se pueden cambiar aquí
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA cache_size=-{Config.SQLITE_CACHE_SIZE_KB}")
+    cur.execute("PRAGMA query_only=ON")
+    cur.close()
 
-# Usaremos el SQLite que ya tienes en el repo: ./test.db
-DATABASE_URL = "sqlite:///./test.db"
+def engine_options(url, name: str = "primary", is_async: bool = False, read_only: bool = False) -> dict:
+    """kwargs de create_engine según el dialecto y la configuración."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    pool_class = type(
+        f"{'Async' if is_async else ''}Pool_{name}",
+        (TimedAsyncQueuePool if is_async else TimedQueuePool,),
+        {"stats_name": name},
+    )
+    opts = {
+        "poolclass": pool_class,
+        "pool_size": Config.DB_READ_POOL_SIZE if read_only else Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_READ_MAX_OVERFLOW if read_only else Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+    }
+    if backend == "sqlite":
+        if not is_async:
+            # Necesario para SQLite con SQLAlchemy en apps async/sync
+            opts["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # Base en memoria: una sola conexión compartida
+            from sqlalchemy.pool import StaticPool
+            opts = {"poolclass": StaticPool, "connect_args": opts.get("connect_args", {})}
+    elif backend == "postgresql":
+        opts["pool_pre_ping"] = Config.DB_POOL_PRE_PING
+        opts["pool_recycle"] = Config.DB_POOL_RECYCLE
+        settings = {}
+        if Config.DB_STATEMENT_TIMEOUT_MS:
+            settings["statement_timeout"] = str(Config.DB_STATEMENT_TIMEOUT_MS)
+        if read_only:
+            settings["default_transaction_read_only"] = "on"
+        if settings:
+            if is_async:
+                opts["connect_args"] = {"server_settings": settings}
+            else:
+                opts["connect_args"] = {"options": " ".join(f"-c {k}={v}" for k, v in settings.items())}
+    return opts
 
-# Necesario para SQLite con SQLAlchemy en apps async/sync
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+def make_engine(url, name: str = "primary", read_only: bool = False):
+    engine = create_engine(url, **engine_options(url, name, read_only=read_only))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_on_connect_ro if read_only else _sqlite_on_connect)
+    metrics.instrument_engine(engine, name)
+    profiling.instrument_engine(engine)
+    return engine
+
+def read_url(url):
+    """URL del pool de lectura, o None si las lecturas deben usar el primario."""
+    if Config.READ_DATABASE_URL:
+        return Config.READ_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:") or url.database.startswith("file:"):
+            return None
+        # Mismo archivo abierto en sólo lectura (URI de SQLite)
+        path = os.path.abspath(url.database)
+        return url.set(database=f"file:{path}", query={"mode": "ro", "uri": "true"})
+    return url
+
+engine = make_engine(DATABASE_URL)
+
+# Pool de lectura: las dependencias get_db de los routers lo usan en GET/HEAD
+_read_url = read_url(DATABASE_URL) if Config.READ_ROUTING else None
+read_engine = make_engine(_read_url, "read", read_only=True) if _read_url is not None else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+# ===== Ruteo lectura/escritura por request =====
+READ_METHODS = {"GET", "HEAD"}
+READ_PRIMARY_HEADER = "x-read-primary"
+READ_PRIMARY_COOKIE = "autogo_rw"
+
+def uses_primary(request: Request) -> bool:
+    """True si el request debe ir al primario (escrituras y read-your-writes)."""
+    if request.method not in READ_METHODS:
+        return True
+    if request.headers.get(READ_PRIMARY_HEADER) == "1":
+        return True
+    return READ_PRIMARY_COOKIE in request.cookies
+
+def mark_write(response: Response) -> None:
+    # El cliente que escribe lee del primario por unos segundos
+    if Config.READ_YOUR_WRITES_SECONDS > 0:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, "1", max_age=Config.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+        )
+
+def session_for(request: Request, response: Response):
+    """Sesión del primario o del pool de lectura según el método y el cliente."""
+    if uses_primary(request):
+        if request.method not in READ_METHODS:
+            mark_write(response)
+        return SessionLocal()
+    return ReadSessionLocal()
+
+# ===== Modo async (AUTOERP_ASYNC_DB=1) =====
+# El motor sync sigue existiendo (startup, imports, exports...); los routers
+# async de vehículos y trámites usan este.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_url(url):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+def make_async_engine(url, name: str = "async", read_only: bool = False):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_url(url)
+    async_engine = create_async_engine(url, **engine_options(url, name, is_async=True, read_only=read_only))
+    if async_engine.dialect.name == "sqlite":
+        on_connect = _sqlite_on_connect_ro if read_only else _sqlite_on_connect
+        event.listen(async_engine.sync_engine, "connect", on_connect)
+    metrics.instrument_engine(async_engine.sync_engine, name)
+    profiling.instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if Config.ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = make_async_engine(DATABASE_URL)
+    # expire_on_commit=False: tras el commit no se puede hacer lazy-load implícito
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if _read_url is not None:
+        async_read_engine = make_async_engine(_read_url, "async_read", read_only=True)
+    else:
+        async_read_engine = async_engine
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db(request: Request, response: Response):
+    if uses_primary(request):
+        if request.method not in READ_METHODS:
+            mark_write(response)
+        factory = AsyncSessionLocal
+    else:
+        factory = AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
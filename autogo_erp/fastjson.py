@@ -0,0 +1,106 @@
+"""Serialización rápida para lecturas de vehículos y trámites (opt-in).
+
+Con ``AUTOERP_FAST_JSON=1`` los listados y lecturas por id no devuelven
+entidades para que FastAPI las valide contra el ``response_model``:
+
+* se seleccionan sólo las columnas del schema (filas, no entidades: sin
+  identity map, sin instrumentación, sin lazy loads);
+* cada fila se convierte a dict con un ``RowEncoder`` armado una vez por
+  schema a partir de sus campos (float, enum -> valor, fecha -> ISO);
+* el resultado se envía como bytes (orjson si está instalado).
+
+El cuerpo es idéntico al del camino normal: mismos campos, mismo orden,
+mismo formato.  Los headers ya puestos en el ``Response`` inyectado (ETag,
+X-Next-Cursor, cookies) se copian a la respuesta.
+"""
+
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union, get_args, get_origin
+
+from fastapi import Response
+
+from autogo_erp.config import Config
+
+try:  # opcional: sin orjson se usa json con el mismo formato que JSONResponse
+    import orjson
+except ImportError:
+    orjson = None
+
+ENABLED = Config.FAST_JSON
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+# ===== Conversión por campo (se resuelve una vez por schema) =====
+# orjson ya escribe enums por su valor y fechas en ISO 8601, igual que
+# pydantic; con json hay que convertirlos antes.
+def _to_value(v):
+    return v.value if isinstance(v, enum.Enum) else v
+
+def _to_iso(v):
+    return v.isoformat()
+
+def _converter(annotation) -> Optional[Callable]:
+    # Optional[X] -> X
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+    if annotation is float:
+        return float  # un REAL guardado como entero sale 1000.0, no 1000
+    if orjson is not None:
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return _to_value
+    if annotation in (date, datetime):
+        return _to_iso
+    return None
+
+
+class RowEncoder:
+    """Filas de SELECT -> dicts con los campos de ``model`` en su orden.
+
+    La fila puede traer columnas de más al final (no se incluyen).
+    """
+
+    def __init__(self, model, exclude: Iterable[str] = ()):
+        exclude = set(exclude)
+        self.model = model
+        self.fields: Tuple[str, ...] = tuple(f for f in model.model_fields if f not in exclude)
+        plan = ((f, _converter(model.model_fields[f].annotation)) for f in self.fields)
+        self._convert = tuple((f, conv) for f, conv in plan if conv is not None)
+
+    def columns(self, entity) -> list:
+        """Columnas de ``entity`` a seleccionar, en el orden de ``fields``."""
+        return [getattr(entity, f) for f in self.fields]
+
+    def encode(self, row) -> Dict[str, Any]:
+        d = dict(zip(self.fields, row))
+        for f, conv in self._convert:
+            v = d[f]
+            if v is not None:
+                d[f] = conv(v)
+        return d
+
+    def encode_all(self, rows) -> list:
+        return [self.encode(r) for r in rows]
+
+
+# ===== Respuesta =====
+class JSONBytes(Response):
+    media_type = "application/json"
+
+
+def respond(content: Union[bytes, Any], response: Optional[Response] = None) -> JSONBytes:
+    """Respuesta con ``content`` (bytes ya serializados u objeto) y los headers de ``response``."""
+    body = content if isinstance(content, bytes) else dumps(content)
+    out = JSONBytes(body)
+    if response is not None:
+        out.raw_headers.extend(h for h in response.raw_headers if h[0] != b"content-length")
+    return out
@@ -0,0 +1,540 @@
+"""Trabajos en segundo plano: exports, imports, lotes de PDFs y rebuilds.
+
+La cola es la tabla ``jobs`` (models.Job), en la misma base que el resto.
+``POST /jobs`` valida los parámetros, inserta la fila y responde enseguida;
+un worker la toma, la ejecuta y deja el resultado (JSON) y, si corresponde,
+un archivo en ``JOBS_DIR/<id>/`` que se descarga en
+``GET /jobs/{id}/artifact`` (ver routers/jobs.py)::
+
+    python -m autogo_erp.jobs worker [--concurrency N]
+    python -m autogo_erp.jobs cleanup
+
+Cada worker es un proceso aparte de la API y ejecuta un job a la vez: un
+lote de PDFs o un XLSX grande ocupa otros núcleos, no el threadpool ni el
+GIL de los procesos que atienden HTTP.
+
+* Toma: en PostgreSQL ``SELECT ... FOR UPDATE SKIP LOCKED`` (los workers
+  no se esperan entre sí); en SQLite un único ``UPDATE ... WHERE id =
+  (SELECT ...) RETURNING``, atómico porque SQLite serializa las escrituras.
+  Cada toma lleva un token propio en ``locked_by`` y todo lo que el worker
+  escribe después exige ese token: si el job se le fue, no pisa nada.
+* Latido: mientras corre, un hilo actualiza ``heartbeat_at``.  Si el
+  worker muere, pasados JOB_STALE_SECONDS otro vuelve a tomar el job
+  (cuenta como intento).
+* Reintentos: una excepción vuelve a encolar el job con espera exponencial
+  (JOB_RETRY_BASE_SECONDS * 2^(intento-1), hasta JOB_RETRY_MAX_SECONDS)
+  mientras queden intentos.  ``JobError``, y las HTTPException de los
+  helpers de los routers, fallan sin reintentar: los datos no van a cambiar.
+* Avance: ``ctx.progress(done, total, message)``, a lo sumo una escritura
+  cada JOB_PROGRESS_SECONDS.
+* Procesos: el padre revisa a los hijos y relanza el que termina sin que
+  se haya pedido parar (si muere enseguida, espera RESPAWN_DELAY_SECONDS).
+  Un error al escribir el estado del job (base bloqueada o caída) no tira
+  abajo al worker: el job queda sin latido y el reaper lo vuelve a encolar.
+
+Los handlers reutilizan el código de los routers (exports.py, imports.py,
+documents.py) y summary.py.  Un import reintentado no duplica filas: los
+bloques ya confirmados aparecen como VIN existente.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased
+
+from autogo_erp import media, models, models_costos  # noqa: F401  (registra todas las tablas)
+from autogo_erp.config import Config
+from autogo_erp.database import ReadSessionLocal, SessionLocal, engine
+from autogo_erp.schemas import DocumentBatchRequest, ExportJobParams, ImportJobParams, SummaryRebuildParams
+
+log = logging.getLogger(__name__)
+
+QUEUED = models.JobStatus.QUEUED
+RUNNING = models.JobStatus.RUNNING
+SUCCEEDED = models.JobStatus.SUCCEEDED
+FAILED = models.JobStatus.FAILED
+FINISHED = (SUCCEEDED, FAILED)
+
+UPLOAD_FORMATS = ("csv", "xlsx")
+UPLOAD_CHUNK = 1024 * 1024
+CLEANUP_EVERY_SECONDS = 3600
+# Un hijo que muere antes de esto se relanza tras RESPAWN_DELAY_SECONDS (no en bucle)
+RESPAWN_MIN_UPTIME_SECONDS = 10
+RESPAWN_DELAY_SECONDS = 5
+DELETE_CHUNK = 900
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def job_dir(job_id: int) -> Path:
+    return Config.JOBS_DIR / str(job_id)
+
+def artifact_path(job: models.Job) -> Optional[Path]:
+    if job.status != SUCCEEDED or not job.artifact_name:
+        return None
+    path = job_dir(job.id) / job.artifact_name
+    return path if path.is_file() else None
+
+
+class JobError(Exception):
+    """Error definitivo: el job falla sin más intentos."""
+
+
+# ===== Tipos de job =====
+class Handler(NamedTuple):
+    params: Type[BaseModel]
+    run: Callable
+
+
+HANDLERS: Dict[str, Handler] = {}
+
+def handler(kind: str, params: Type[BaseModel]):
+    """Registra ``fn(ctx, params) -> result`` como el handler de ``kind``."""
+    def register(fn):
+        HANDLERS[kind] = Handler(params, fn)
+        return fn
+    return register
+
+
+# ===== Encolar (API) =====
+def enqueue(db: Session, kind: str, params: dict, max_attempts: Optional[int] = None) -> models.Job:
+    """Valida ``params`` con el schema de ``kind`` e inserta el job (sin commit).
+
+    Lanza ValidationError si los parámetros no son válidos.
+    """
+    spec = HANDLERS.get(kind)
+    if spec is None:
+        raise JobError(f"Unknown job kind '{kind}'")
+    data = spec.params.model_validate(params)
+    now = utcnow()
+    job = models.Job(
+        kind=kind,
+        params=data.model_dump(mode="json"),
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+        run_after=now,
+        created_at=now,
+    )
+    db.add(job)
+    return job
+
+
+# ===== Archivos de entrada (imports) =====
+def _uploads_dir() -> Path:
+    return Config.JOBS_DIR / "uploads"
+
+def save_upload(src: BinaryIO, fmt: str) -> Tuple[str, int]:
+    """Copia ``src`` por bloques a ``JOBS_DIR/uploads``; devuelve (upload_id, bytes).
+
+    Bloqueante: llamar desde un thread.
+    """
+    directory = _uploads_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    upload_id = f"{uuid.uuid4().hex}.{fmt}"
+    tmp = directory / f".{upload_id}.tmp"
+    size = 0
+    try:
+        with open(tmp, "wb") as out:
+            for chunk in iter(lambda: src.read(UPLOAD_CHUNK), b""):
+                size += len(chunk)
+                if size > Config.JOB_MAX_UPLOAD_BYTES:
+                    raise media.UploadTooLarge(f"File exceeds {Config.JOB_MAX_UPLOAD_BYTES} bytes")
+                out.write(chunk)
+        os.replace(tmp, directory / upload_id)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return upload_id, size
+
+def upload_path(upload_id: str) -> Optional[Path]:
+    stem, _, fmt = upload_id.partition(".")
+    if len(stem) != 32 or any(c not in "0123456789abcdef" for c in stem) or fmt not in UPLOAD_FORMATS:
+        return None
+    path = _uploads_dir() / upload_id
+    return path if path.is_file() else None
+
+
+# ===== Toma y estado (worker) =====
+class Claimed(NamedTuple):
+    id: int
+    kind: str
+    params: dict
+    attempts: int
+    max_attempts: int
+    token: str
+
+
+def _claimable(J, now: datetime):
+    stale = now - timedelta(seconds=Config.JOB_STALE_SECONDS)
+    return and_(
+        J.attempts < J.max_attempts,
+        or_(
+            and_(J.status == QUEUED, J.run_after <= now),
+            and_(J.status == RUNNING, J.heartbeat_at < stale),  # worker perdido
+        ),
+    )
+
+def claim(worker: str) -> Optional[Claimed]:
+    """Toma el próximo job listo para correr, o None si no hay."""
+    J = models.Job
+    now = utcnow()
+    token = f"{worker}:{uuid.uuid4().hex[:8]}"
+    values = dict(
+        status=RUNNING, locked_by=token, attempts=J.attempts + 1,
+        heartbeat_at=now, started_at=now, progress=None, progress_message=None,
+    )
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            job_id = conn.execute(
+                select(J.id).where(_claimable(J, now)).order_by(J.id).limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar()
+            if job_id is not None:
+                conn.execute(update(J).where(J.id == job_id).values(**values))
+        else:
+            # Alias: la subconsulta no debe correlacionarse con la tabla del UPDATE
+            nxt = aliased(J)
+            next_id = select(nxt.id).where(_claimable(nxt, now)).order_by(nxt.id).limit(1).scalar_subquery()
+            job_id = conn.execute(update(J).where(J.id == next_id).values(**values).returning(J.id)).scalar()
+        if job_id is None:
+            return None
+        row = conn.execute(
+            select(J.id, J.kind, J.params, J.attempts, J.max_attempts).where(J.id == job_id)
+        ).one()
+    return Claimed(*row, token)
+
+def _set(claimed: Claimed, **values) -> bool:
+    """Actualiza el job si sigue tomado por ``claimed`` (mismo token)."""
+    J = models.Job
+    with engine.begin() as conn:
+        result = conn.execute(update(J).where(J.id == claimed.id, J.locked_by == claimed.token).values(**values))
+        return result.rowcount > 0
+
+def backoff_seconds(attempt: int) -> float:
+    delay = Config.JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+    return min(delay, Config.JOB_RETRY_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+def reap() -> int:
+    """Marca FAILED los jobs sin latido que ya no tienen intentos."""
+    J = models.Job
+    now = utcnow()
+    stale = now - timedelta(seconds=Config.JOB_STALE_SECONDS)
+    with engine.begin() as conn:
+        return conn.execute(
+            update(J)
+            .where(J.status == RUNNING, J.heartbeat_at < stale, J.attempts >= J.max_attempts)
+            .values(status=FAILED, finished_at=now, locked_by=None, error="Worker lost (no heartbeat)")
+        ).rowcount
+
+def cleanup() -> int:
+    """Borra los jobs terminados hace más de JOB_RETENTION_HOURS, sus archivos y las subidas viejas."""
+    J = models.Job
+    cutoff = utcnow() - timedelta(hours=Config.JOB_RETENTION_HOURS)
+    with engine.begin() as conn:
+        ids = conn.execute(select(J.id).where(J.status.in_(FINISHED), J.finished_at < cutoff)).scalars().all()
+        for i in range(0, len(ids), DELETE_CHUNK):
+            conn.execute(delete(J).where(J.id.in_(ids[i:i + DELETE_CHUNK])))
+    for job_id in ids:
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+    oldest = time.time() - Config.JOB_RETENTION_HOURS * 3600
+    uploads = _uploads_dir()
+    if uploads.is_dir():
+        for path in uploads.iterdir():
+            try:
+                if path.stat().st_mtime < oldest:
+                    path.unlink()
+            except OSError:
+                pass
+    return len(ids)
+
+
+# ===== Ejecución =====
+class JobContext:
+    """Lo que recibe el handler: dónde dejar el archivo resultado y cómo informar avance."""
+
+    def __init__(self, claimed: Claimed):
+        self.job = claimed
+        self.directory = job_dir(claimed.id)
+        self.artifact: Optional[Tuple[str, str]] = None
+        self._last_progress = 0.0
+
+    def output(self, name: str, media_type: str) -> Path:
+        """Ruta del archivo resultado (uno por job), a escribir por el handler."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.artifact = (name, media_type)
+        return self.directory / name
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._last_progress < Config.JOB_PROGRESS_SECONDS:
+            return
+        self._last_progress = now
+        fraction = min(done / total, 1.0) if total else None
+        try:
+            _set(self.job, progress=fraction, progress_message=message and message[:256], heartbeat_at=utcnow())
+        except OperationalError:  # base ocupada: el avance no es crítico
+            log.warning("job %s: progress update failed", self.job.id, exc_info=True)
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, claimed: Claimed):
+        super().__init__(name=f"job-{claimed.id}-heartbeat", daemon=True)
+        self.claimed = claimed
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(Config.JOB_HEARTBEAT_SECONDS):
+            try:
+                if not _set(self.claimed, heartbeat_at=utcnow()):
+                    log.warning("job %s: claim lost, stopping heartbeat", self.claimed.id)
+                    return
+            except OperationalError:
+                log.warning("job %s: heartbeat failed", self.claimed.id, exc_info=True)
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    if isinstance(exc, JobError):
+        return str(exc)
+    return f"{type(exc).__name__}: {exc}"
+
+def execute(claimed: Claimed) -> models.JobStatus:
+    """Corre el handler del job y deja el resultado, el reintento o el error."""
+    ctx = JobContext(claimed)
+    shutil.rmtree(ctx.directory, ignore_errors=True)  # restos de un intento anterior
+    beat = _Heartbeat(claimed)
+    beat.start()
+    started = time.perf_counter()
+    try:
+        spec = HANDLERS.get(claimed.kind)
+        if spec is None:
+            raise JobError(f"Unknown job kind '{claimed.kind}'")
+        try:
+            params = spec.params.model_validate(claimed.params)
+        except ValidationError as exc:
+            raise JobError(str(exc))
+        result = spec.run(ctx, params)
+    except Exception as exc:
+        message = _error_message(exc)
+        retry = not isinstance(exc, (JobError, HTTPException)) and claimed.attempts < claimed.max_attempts
+        if retry:
+            delay = backoff_seconds(claimed.attempts)
+            log.warning("job %s (%s) attempt %s failed, retry in %.1fs: %s",
+                        claimed.id, claimed.kind, claimed.attempts, delay, message, exc_info=True)
+            status = QUEUED
+            _set(claimed, status=status, run_after=utcnow() + timedelta(seconds=delay),
+                 locked_by=None, heartbeat_at=None, error=message)
+        else:
+            log.error("job %s (%s) failed: %s", claimed.id, claimed.kind, message)
+            status = FAILED
+            _set(claimed, status=status, finished_at=utcnow(), locked_by=None, error=message)
+            shutil.rmtree(ctx.directory, ignore_errors=True)
+        return status
+    finally:
+        beat.stopped.set()
+
+    values = dict(status=SUCCEEDED, result=result, error=None, progress=1.0, finished_at=utcnow(), locked_by=None)
+    if ctx.artifact is not None:
+        values["artifact_name"], values["artifact_media_type"] = ctx.artifact
+    if not _set(claimed, **values):
+        log.warning("job %s: claim lost before finishing, result discarded", claimed.id)
+    log.info("job %s (%s) done in %.1fs", claimed.id, claimed.kind, time.perf_counter() - started)
+    return SUCCEEDED
+
+
+# ===== Handlers =====
+@handler("export", ExportJobParams)
+def _export(ctx: JobContext, p: ExportJobParams):
+    from autogo_erp.routers import exports
+
+    if p.dataset == "vehicles":
+        stmt = exports.vehicles_stmt(p.totals, p.status)
+    elif p.dataset == "costos":
+        stmt = exports.costos_stmt(p.tipo, p.vehicle)
+    else:
+        stmt = exports.sales_stmt(p.payments)
+    total = exports.count_rows(stmt)
+    path = ctx.output(f"{p.dataset}.{p.format}", exports.MEDIA_TYPES[p.format])
+    with open(path, "wb") as fh:
+        rows = exports.write_export(
+            stmt, p.format, fh, on_rows=lambda n: ctx.progress(n, total, f"{n}/{total} filas")
+        )
+    return {"rows": rows}
+
+@handler("import_vehicles", ImportJobParams)
+def _import_vehicles(ctx: JobContext, p: ImportJobParams):
+    from autogo_erp.routers import imports
+
+    path = upload_path(p.upload_id)
+    if path is None:
+        raise JobError("Upload not found")
+    fmt = p.format or path.suffix[1:]
+    # Avance por bytes leídos (en XLSX la posición en el ZIP no dice nada)
+    size = path.stat().st_size if fmt == "csv" else None
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as fh:
+            def on_chunk(rows: int, inserted: int) -> None:
+                ctx.progress(fh.tell(), size, f"{rows} filas, {inserted} insertadas")
+
+            return imports.run_import(db, imports.open_reader(fh, fmt), on_chunk)
+    finally:
+        db.close()
+
+@handler("documents", DocumentBatchRequest)
+def _documents(ctx: JobContext, req: DocumentBatchRequest):
+    # El render corre en este mismo proceso: el worker ya está fuera de la API
+    from autogo_erp import pdf
+    from autogo_erp.routers import documents
+
+    db = ReadSessionLocal()
+    try:
+        ids = documents.batch_ids(db, req)
+        if len(ids) > Config.PDF_BATCH_MAX:
+            raise JobError(f"At most {Config.PDF_BATCH_MAX} documents per batch")
+        docs = documents.load_jobs(db, req.kind, ids)
+    finally:
+        db.close()
+    if not docs:
+        raise JobError("No documents match")
+
+    stamp = date.today().isoformat()
+    if req.format == "pdf":
+        pdf.render_merged(docs, str(ctx.output(f"{req.kind}-{stamp}.pdf", "application/pdf")))
+        return {"documents": len(docs)}
+
+    for i in range(0, len(docs), pdf.CHUNK_SIZE):
+        pdf.render_many(docs[i:i + pdf.CHUNK_SIZE])
+        done = min(i + pdf.CHUNK_SIZE, len(docs))
+        ctx.progress(done, len(docs), f"{done}/{len(docs)} documentos")
+    names = [documents.file_name(req.kind, d) for d in docs]
+    with open(ctx.output(f"{req.kind}-{stamp}.zip", "application/zip"), "wb") as out:
+        documents.write_zip(out, docs, names)
+    return {"documents": len(docs)}
+
+@handler("summary_rebuild", SummaryRebuildParams)
+def _summary_rebuild(ctx: JobContext, p: SummaryRebuildParams):
+    from autogo_erp import summary
+
+    with engine.begin() as conn:
+        return {"rows": summary.rebuild(conn)}
+
+
+# ===== Procesos worker =====
+def work(stop, name: Optional[str] = None) -> None:
+    """Bucle de un worker: toma y ejecuta jobs de a uno hasta que ``stop`` se activa.
+
+    El job en curso siempre termina antes de salir.
+    """
+    worker = name or f"{socket.gethostname()}:{os.getpid()}"
+    last_reap = last_cleanup = 0.0
+    while not stop.is_set():
+        try:
+            now = time.monotonic()
+            if now - last_reap >= Config.JOB_STALE_SECONDS / 2:
+                reap()
+                last_reap = now
+            if now - last_cleanup >= CLEANUP_EVERY_SECONDS:
+                cleanup()
+                last_cleanup = now
+            claimed = claim(worker)
+        except Exception:  # base bloqueada o caída: reintentar en el próximo ciclo
+            log.exception("job claim failed")
+            claimed = None
+        if claimed is None:
+            stop.wait(Config.JOB_POLL_SECONDS)
+            continue
+        log.info("job %s (%s) attempt %s/%s", claimed.id, claimed.kind, claimed.attempts, claimed.max_attempts)
+        try:
+            execute(claimed)
+        except Exception:  # no se pudo guardar el estado: el reaper lo recupera por latido
+            log.exception("job %s: could not record the outcome", claimed.id)
+            stop.wait(Config.JOB_POLL_SECONDS)
+
+def _child(stop) -> None:
+    # SIGINT/SIGTERM los atiende el padre, que avisa por ``stop``: cada hijo
+    # termina el job en curso antes de salir
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    work(stop)
+
+def run_workers(concurrency: int) -> None:
+    if Config.MIGRATE_ON_STARTUP:
+        from autogo_erp.migrations import migrate
+        migrate(engine)
+
+    # El handler sólo toca un threading.Event: con el Event de multiprocessing,
+    # set() desde un handler que interrumpe un wait() sobre ese mismo Event
+    # se queda esperando a que el propio hilo despierte (deadlock)
+    stopping = threading.Event()
+
+    def _stop(signum, _frame):
+        log.info("signal %s: finishing current jobs", signum)
+        stopping.set()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    if concurrency <= 1:
+        work(stopping)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+
+    def spawn(i: int) -> Tuple[multiprocessing.Process, float]:
+        p = ctx.Process(target=_child, args=(stop,), name=f"job-worker-{i}")
+        p.start()
+        return p, time.monotonic()
+
+    procs: List[Tuple[multiprocessing.Process, float]] = [spawn(i) for i in range(concurrency)]
+    # Supervisión: relanzar los hijos que terminan sin que se haya pedido parar
+    while not stopping.wait(1.0):
+        for i, (p, started) in enumerate(procs):
+            if p.is_alive():
+                continue
+            if time.monotonic() - started < RESPAWN_MIN_UPTIME_SECONDS:
+                if stopping.wait(RESPAWN_DELAY_SECONDS):
+                    break
+            log.warning("%s exited with code %s, restarting", p.name, p.exitcode)
+            procs[i] = spawn(i)
+    stop.set()
+    for p, _ in procs:
+        p.join()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Trabajos en segundo plano de AutoGo ERP")
+    parser.add_argument("command", choices=["worker", "cleanup"])
+    parser.add_argument("--concurrency", type=int, default=Config.JOB_WORKERS,
+                        help="Procesos worker (por defecto AUTOERP_JOB_WORKERS)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    if args.command == "cleanup":
+        print(f"{cleanup()} job(s) removed")
+        return
+    run_workers(args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Cambios de vehículos en vivo para ``/vehicles/live`` (WebSocket).
+
+En vez de repetir ``GET /vehicles/`` para enterarse de un cambio de estado,
+el cliente abre un WebSocket y recibe cada alta, modificación, cambio de
+estado y baja de vehículo: las del router de vehículos (sync y async, lotes
+incluidos), las altas de ``imports`` (también como job) y los cambios de
+fotos, que publican un ``updated`` con la nueva ``row_version``.
+``synthetic.generate`` escribe directo en las tablas y no publica nada.
+
+* **Registro**: cada escritura llama a ``record(db, tipo, ids)`` dentro de su
+  transacción (como ``summary.refresh``); queda una fila en
+  ``vehicle_events`` con el JSON del vehículo.  Si la escritura hace
+  rollback, el evento tampoco existe.
+* **Broker** (uno por worker): un hilo lee los eventos nuevos por id y los
+  reparte a las conexiones de ese proceso.  En SQLite consulta cada
+  ``LIVE_POLL_SECONDS``; en PostgreSQL espera el ``NOTIFY`` que ya emite
+  ``versioning.bump``.  Así un cambio hecho en cualquier worker llega a las
+  conexiones de todos.
+* **Conexión**: un ``Subscriber`` con filtros (estados, marcas) y un buffer
+  por vehículo: varios cambios seguidos del mismo vehículo se juntan en uno
+  (``merge``).  Si el buffer pasa de ``LIVE_MAX_PENDING`` vehículos el
+  cliente no está leyendo y se cierra la conexión.
+
+Con ``?since=<last_id>`` un cliente que reconecta recibe lo que se perdió,
+mientras siga en la tabla (``LIVE_RETENTION_SECONDS``); si no, recibe
+``reset`` y debe volver a pedir el listado.
+"""
+
+import asyncio
+import enum
+import logging
+import select as _select
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select
+
+from autogo_erp import fastjson, metrics, models, versioning
+from autogo_erp.config import Config
+from autogo_erp.schemas import VehicleRead
+
+log = logging.getLogger(__name__)
+
+# Mismos campos y formato que GET /vehicles/{id}, sin fotos
+VEHICLE_JSON = fastjson.RowEncoder(VehicleRead, exclude=("photos",))
+
+CREATED, UPDATED, STATUS_CHANGED, DELETED = "created", "updated", "status_changed", "deleted"
+
+FETCH_LIMIT = 500
+# Un id salteado puede ser una transacción todavía sin commit (PostgreSQL
+# reparte ids antes del commit): se lo espera este tiempo antes de seguir.
+GAP_SECONDS = 10.0
+PG_WAIT_SECONDS = 5.0
+PURGE_EVERY_SECONDS = 60.0
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _value(v):
+    return v.value if isinstance(v, enum.Enum) else v
+
+
+# ===== Registro (dentro de la transacción de la escritura) =====
+def previous(db, ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+    """{id: (estado, marca)} antes de modificar ``ids`` (para ``record``)."""
+    ids = list(ids)
+    if not Config.LIVE_ENABLED or not ids:
+        return {}
+    V = models.Vehicle
+    stmt = select(V.id, V.status, V.brand).where(V.id.in_(ids))
+    return {r.id: (_value(r.status), r.brand) for r in db.execute(stmt)}
+
+
+def record(db, kind: str, ids: Iterable[int], before: Optional[Dict[int, Tuple[str, str]]] = None) -> None:
+    """Agrega un evento ``kind`` por cada vehículo de ``ids``.
+
+    Llamar después del flush en altas y modificaciones (el JSON es el del
+    vehículo ya cambiado) y antes de borrar en las bajas.  ``before`` viene
+    de ``previous``: una modificación que cambia el estado queda como
+    ``status_changed``.
+    """
+    ids = list(ids)
+    if not Config.LIVE_ENABLED or not ids:
+        return
+    V = models.Vehicle
+    stmt = select(*VEHICLE_JSON.columns(V), V.row_version).where(V.id.in_(ids)).order_by(V.id)
+    now = utcnow()
+    rows = []
+    for row in db.execute(stmt):
+        d = VEHICLE_JSON.encode(row)
+        status, brand = _value(d["status"]), d["brand"]
+        prev_status, prev_brand = (before or {}).get(d["id"], (status, brand))
+        prev_status = _value(prev_status)
+        event_type = STATUS_CHANGED if kind == UPDATED and prev_status != status else kind
+        rows.append({
+            "vehicle_id": d["id"],
+            "type": event_type,
+            "status": status,
+            "previous_status": prev_status if event_type == STATUS_CHANGED else None,
+            "brand": brand,
+            "previous_brand": prev_brand if prev_brand != brand else None,
+            "row_version": row[-1],
+            "data": fastjson.dumps(d).decode(),
+            "created_at": now,
+        })
+    if rows:
+        db.execute(insert(models.VehicleEvent), rows)
+
+
+# ===== Eventos =====
+class Event:
+    __slots__ = ("id", "vehicle_id", "type", "status", "previous_status",
+                 "brand", "previous_brand", "row_version", "data", "_json")
+
+    def __init__(self, id, vehicle_id, type, status, previous_status, brand, previous_brand, row_version, data):
+        self.id = id
+        self.vehicle_id = vehicle_id
+        self.type = type
+        self.status = status
+        self.previous_status = previous_status
+        self.brand = brand
+        self.previous_brand = previous_brand
+        self.row_version = row_version
+        self.data = data
+        self._json = None
+
+    @classmethod
+    def from_row(cls, r) -> "Event":
+        return cls(r.id, r.vehicle_id, r.type, r.status, r.previous_status,
+                   r.brand, r.previous_brand, r.row_version, r.data)
+
+    def replace(self, **changes) -> "Event":
+        values = {f: getattr(self, f) for f in self.__slots__[:-1]}
+        values.update(changes)
+        return Event(**values)
+
+    def json(self) -> str:
+        """El evento como JSON; ``data`` ya viene serializado y se inserta tal cual."""
+        if self._json is None:
+            head = {"id": self.id, "type": self.type, "vehicle_id": self.vehicle_id, "row_version": self.row_version}
+            if self.type == STATUS_CHANGED:
+                head["previous_status"] = self.previous_status
+            self._json = fastjson.dumps(head).decode()[:-1] + ',"vehicle":' + self.data + "}"
+        return self._json
+
+
+def merge(old: Event, new: Event) -> Optional[Event]:
+    """Un solo evento equivalente a ``old`` seguido de ``new`` (mismo vehículo).
+
+    None si se anulan: un alta y una baja que el cliente nunca llegó a ver.
+    """
+    if new.type == DELETED:
+        return None if old.type == CREATED else new
+    if new.type == CREATED:
+        return new  # id reutilizado después de una baja
+    if old.type == CREATED:
+        return new.replace(type=CREATED, previous_status=None, previous_brand=None)
+    # updated/status_changed: cuenta el estado y la marca de antes del primero
+    prev_status = old.previous_status if old.type == STATUS_CHANGED else old.status
+    prev_brand = old.previous_brand if old.previous_brand is not None else old.brand
+    return new.replace(
+        type=STATUS_CHANGED if prev_status != new.status else UPDATED,
+        previous_status=prev_status if prev_status != new.status else None,
+        previous_brand=prev_brand if prev_brand != new.brand else None,
+    )
+
+
+# ===== Conexiones =====
+class Subscriber:
+    """Filtros y cambios pendientes de una conexión (se usa desde su event loop)."""
+
+    def __init__(self, statuses: Iterable[str] = (), brands: Iterable[str] = ()):
+        self.statuses = {_value(s) for s in statuses}
+        self.brands = set(brands)
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.pending: Dict[int, Event] = {}  # vehicle_id -> evento, en orden de id
+        self.last_id = 0
+        self.overflow = False
+
+    def matches(self, e: Event) -> bool:
+        # El estado o la marca de antes también cuentan: el cliente se entera
+        # de que el vehículo sale de su vista (p. ej. AVAILABLE -> SOLD)
+        if self.statuses and e.status not in self.statuses and e.previous_status not in self.statuses:
+            return False
+        if self.brands and e.brand not in self.brands and e.previous_brand not in self.brands:
+            return False
+        return True
+
+    def offer(self, events: List[Event]) -> None:
+        for e in events:
+            self.last_id = max(self.last_id, e.id)
+            if not self.matches(e):
+                continue
+            old = self.pending.pop(e.vehicle_id, None)
+            merged = e if old is None else merge(old, e)
+            if merged is not None:
+                self.pending[e.vehicle_id] = merged
+        if len(self.pending) > Config.LIVE_MAX_PENDING:
+            self.overflow = True
+        if self.pending or self.overflow:
+            self.ready.set()
+
+    def prepend(self, events: List[Event]) -> None:
+        """Como ``offer`` para eventos anteriores a los ya pendientes (``?since=``)."""
+        newer = list(self.pending.values())
+        self.pending = {}
+        self.offer(events)
+        self.offer(newer)
+
+    def take(self) -> Tuple[List[Event], int]:
+        events = list(self.pending.values())
+        self.pending = {}
+        self.ready.clear()
+        return events, self.last_id
+
+
+def _offer(subs: List[Subscriber], events: List[Event]) -> None:
+    for sub in subs:
+        sub.offer(events)
+
+
+# ===== Broker: lee vehicle_events y reparte a las conexiones del proceso =====
+E = models.VehicleEvent
+FETCH_COLUMNS = (E.id, E.vehicle_id, E.type, E.status, E.previous_status,
+                 E.brand, E.previous_brand, E.row_version, E.data)
+
+
+class Broker:
+    def __init__(self):
+        self.position = 0  # último evento repartido
+        self.listening = False
+        self._subs: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._engine = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Eventos leídos por encima de _cursor (hay un id salteado debajo)
+        self._cursor: Optional[int] = None
+        self._seen: Set[int] = set()
+        self._gap_since: Optional[float] = None
+        self._last_purge = 0.0
+
+    @property
+    def connections(self) -> int:
+        return len(self._subs)
+
+    def start(self, engine) -> None:
+        """Arranca el hilo del broker (llamar en el startup, después de migrar)."""
+        if not Config.LIVE_ENABLED or self._thread is not None:
+            return
+        self._engine = engine
+        self._stop = threading.Event()  # uno por hilo: un stop/start no deja dos hilos vivos
+        try:
+            self._init_cursor()
+        except Exception:
+            log.exception("live broker: could not read vehicle_events; retrying in background")
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="vehicle-live-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def subscribe(self, sub: Subscriber) -> int:
+        """Registra ``sub`` y devuelve el id desde el que va a recibir eventos."""
+        with self._lock:
+            self._subs.add(sub)
+            return self.position
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def backlog(self, since: int, until: int) -> Optional[List[Event]]:
+        """Eventos con id en (since, until]; None si ya se purgaron o son demasiados."""
+        with self._engine.connect() as conn:
+            first = conn.execute(select(func.min(E.id))).scalar()
+            if first is None or first > since + 1:
+                return None
+            stmt = (select(*FETCH_COLUMNS).where(E.id > since, E.id <= until)
+                    .order_by(E.id).limit(Config.LIVE_MAX_PENDING + 1))
+            rows = conn.execute(stmt).all()
+        if len(rows) > Config.LIVE_MAX_PENDING:
+            return None
+        return [Event.from_row(r) for r in rows]
+
+    # ----- hilo -----
+    def _init_cursor(self) -> None:
+        with self._engine.connect() as conn:
+            last = conn.execute(select(func.max(E.id))).scalar() or 0
+        self._cursor = self.position = last
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                if self._engine.dialect.name == "postgresql":
+                    self._run_listen(stop)
+                else:
+                    while not stop.wait(Config.LIVE_POLL_SECONDS):
+                        self._tick()
+            except Exception:
+                log.exception("live broker failed; retrying")
+                self.listening = False
+                stop.wait(2.0)
+
+    def _run_listen(self, stop: threading.Event) -> None:
+        import psycopg2
+
+        dsn = self._engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {versioning.NOTIFY_CHANNEL}")
+            self.listening = True
+            self._tick()  # lo que se escribió antes de escuchar
+            while not stop.is_set():
+                if _select.select([conn], [], [], PG_WAIT_SECONDS) != ([], [], []):
+                    conn.poll()
+                    notified = any(n.payload.startswith("vehicles:") for n in conn.notifies)
+                    conn.notifies.clear()
+                    if not notified:
+                        continue
+                # Sin aviso en PG_WAIT_SECONDS también se lee (ids salteados, purga)
+                self._tick()
+        finally:
+            self.listening = False
+            conn.close()
+
+    def _tick(self) -> None:
+        if self._cursor is None:
+            self._init_cursor()
+        with self._engine.connect() as conn:
+            while True:
+                stmt = select(*FETCH_COLUMNS).where(E.id > self._cursor).order_by(E.id).limit(FETCH_LIMIT)
+                rows = conn.execute(stmt).all()
+                events = self._advance(rows)
+                if events:
+                    self._dispatch(events)
+                if len(rows) < FETCH_LIMIT or not events:
+                    break
+            now = time.monotonic()
+            if now - self._last_purge >= PURGE_EVERY_SECONDS:
+                self._last_purge = now
+                cutoff = utcnow() - timedelta(seconds=Config.LIVE_RETENTION_SECONDS)
+                conn.execute(delete(E).where(E.created_at < cutoff))
+                conn.commit()
+
+    def _advance(self, rows) -> List[Event]:
+        """Eventos nuevos de ``rows`` y avance del cursor hasta el primer id salteado."""
+        events = []
+        for r in rows:
+            if r.id not in self._seen:
+                self._seen.add(r.id)
+                events.append(Event.from_row(r))
+        while self._cursor + 1 in self._seen:
+            self._cursor += 1
+            self._seen.discard(self._cursor)
+        if not self._seen:
+            self._gap_since = None
+        elif self._gap_since is None:
+            self._gap_since = time.monotonic()
+        elif time.monotonic() - self._gap_since >= GAP_SECONDS:
+            # El id salteado no llegó (rollback): seguir desde el próximo leído
+            self._cursor = min(self._seen) - 1
+            self._gap_since = None
+            return events + self._advance([])
+        return events
+
+    def _dispatch(self, events: List[Event]) -> None:
+        with self._lock:
+            self.position = max(self.position, events[-1].id)
+            by_loop: Dict[asyncio.AbstractEventLoop, List[Subscriber]] = {}
+            for sub in self._subs:
+                by_loop.setdefault(sub.loop, []).append(sub)
+            for loop, subs in by_loop.items():
+                try:
+                    loop.call_soon_threadsafe(_offer, subs, events)
+                except RuntimeError:
+                    pass  # loop cerrado; la conexión se va a dar de baja sola
+
+
+broker = Broker()
+
+
+# ===== Métricas =====
+DROPPED = metrics.Counter("autogo_live_dropped_total", "Conexiones en vivo cerradas por consumidor lento", ("reason",))
+SENT = metrics.Counter("autogo_live_events_sent_total", "Eventos de vehículos enviados por WebSocket")
+metrics.REGISTRY.extend([DROPPED, SENT])
+
+def _collect() -> metrics.Collected:
+    if not Config.LIVE_ENABLED:
+        return []
+    return [
+        ("autogo_live_connections", "gauge", "Conexiones WebSocket en vivo abiertas", (), {(): broker.connections}),
+        ("autogo_live_position", "gauge", "Último evento de vehículo repartido", (), {(): broker.position}),
+    ]
+
+metrics.COLLECTORS.append(_collect)
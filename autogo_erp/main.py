@@ -1,23 +1,27 @@
 # Forzar redeploy limpio
-from sqlalchemy import inspect, text
-from autogo_erp.database import SessionLocal, Base, engine
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
 import pkgutil, importlib, pathlib
 
-# DB / modelos / seed
-from autogo_erp.database import SessionLocal, Base, engine
-from autogo_erp.seed import cargar_demo_si_vacio
-
-from sqlalchemy import inspect, text
+# DB / config
+from autogo_erp.database import engine
+from autogo_erp.config import Config
+from autogo_erp.assets import AssetFiles
+from autogo_erp import admission, metrics, profiling
 
 app = FastAPI(title="AutoGo ERP")
 
-# Plantillas (si usas autos_ui.html en templates/)
-templates = Jinja2Templates(directory="templates")
+# Latencia y conteo por ruta, requests en curso y consultas por request (ver metrics.py)
+if Config.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Perfiles de requests a pedido, por muestreo o por lentitud (ver profiling.py)
+if Config.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Plantillas (si usas autos_ui.html en templates/); entorno en templating.py
+from autogo_erp.templating import templates
 
 # Incluir routers automáticamente desde autogo_erp/routers/*.py
 def include_all_routers(app: FastAPI):
@@ -25,46 +29,73 @@ def include_all_routers(app: FastAPI):
     package_name = "autogo_erp.routers"
 
     # Ignorar routers legados que dependían del viejo schemas.py
-    skip = {"imports", "gallery", "photos", "sales", "autos"}
+    skip = {"gallery", "photos", "sales", "autos"}
 
+    # Routers "<nombre>_async": sólo en modo async y registrados primero, para
+    # que sus rutas tengan prioridad sobre las sync equivalentes
     if routers_path.exists():
-        for _, module_name, _ in pkgutil.iter_modules([str(routers_path)]):
+        modules = sorted(
+            (m for _, m, _ in pkgutil.iter_modules([str(routers_path)])),
+            key=lambda m: not m.endswith("_async"),
+        )
+        for module_name in modules:
             if module_name in skip:
                 continue
+            if module_name.endswith("_async") and not Config.ASYNC_DB:
+                continue
             module = importlib.import_module(f"{package_name}.{module_name}")
             if hasattr(module, "router"):
                 app.include_router(module.router)
 
 include_all_routers(app)
 
-# Crear tablas y cargar demo si está vacío
+# Migraciones de esquema (ver migrations.py) y tareas de arranque del worker
 @app.on_event("startup")
 def startup():
-    # 1) Crear tablas base
-    Base.metadata.create_all(bind=engine)
-
-    # 2) Mini-migración: agregar columnas que falten en 'vehicles'
-    insp = inspect(engine)
-    cols = [c["name"] for c in insp.get_columns("vehicles")]
-    with engine.begin() as conn:
-        if "plate" not in cols:
-            conn.execute(text("ALTER TABLE vehicles ADD COLUMN plate VARCHAR"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vehicles_plate ON vehicles(plate)"))
-        if "seller_document" not in cols:
-            conn.execute(text("ALTER TABLE vehicles ADD COLUMN seller_document VARCHAR(64)"))
-        if "received_date" not in cols:
-            conn.execute(text("ALTER TABLE vehicles ADD COLUMN received_date DATE"))
-
-    # 3) Cargar demo (import diferido para evitar ciclos)
-    from autogo_erp.seed import cargar_demo_si_vacio
-    db = SessionLocal()
-    try:
-        cargar_demo_si_vacio(db)
-    finally:
-        db.close()
-
-# Servir archivos estáticos (/static/…)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    # Con el esquema al día es una sola consulta; si falta algo, sólo un
+    # proceso migra (lock) y el resto espera y sigue.
+    if Config.MIGRATE_ON_STARTUP:
+        from autogo_erp.migrations import migrate
+        migrate(engine)
+
+    # Avisos de otros workers para la caché de vehículos (sólo PostgreSQL)
+    from autogo_erp.cache import vehicle_cache
+    vehicle_cache.start_listener(engine.url)
+
+    # Cambios de vehículos en vivo para /vehicles/live (ver live.py)
+    from autogo_erp import live
+    live.broker.start(engine)
+
+    # Threadpool de handlers sync por encima de los límites de admisión
+    admission.configure_threadpool()
+
+    # Muestreo del threadpool y volcado para /metrics con varios workers
+    metrics.start()
+
+    # Procesos de PDF con fuentes y logo ya cargados (ver pdf.py)
+    if Config.PDF_WARM_ON_STARTUP:
+        from autogo_erp import pdf
+        pdf.warm()
+
+@app.on_event("shutdown")
+async def shutdown():
+    from autogo_erp.database import async_engine, async_read_engine
+    # aiosqlite mantiene un hilo por conexión: sin dispose el proceso no termina
+    for eng in {async_engine, async_read_engine} - {None}:
+        await eng.dispose()
+
+    metrics.stop()
+
+    from autogo_erp import live
+    live.broker.stop()
+
+    # Pools de procesos de fotos y PDFs, si se llegaron a crear
+    from autogo_erp import media, pdf
+    media.shutdown_pool()
+    pdf.shutdown_pool()
+
+# Servir archivos estáticos (/static/…); los de static/dist con caché inmutable y .br/.gz
+app.mount("/static", AssetFiles(directory=str(Config.STATIC_DIR)), name="static")
 
 # Página de inicio
 @app.get("/", response_class=HTMLResponse)
@@ -76,3 +107,12 @@ def root(request: Request):
 def health():
     return {"status": "ok"}
 
+# Métricas en formato Prometheus (suma de todos los workers si hay AUTOERP_METRICS_DIR)
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics_endpoint():
+    metrics.sample_threadpool()
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# Límites de concurrencia y cola por clase de ruta (ver admission.py); al
+# final, con todas las rutas registradas
+admission.install(app)
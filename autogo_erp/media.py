@@ -0,0 +1,163 @@
+"""Almacenamiento de fotos por hash de contenido y generación de variantes.
+
+Estructura bajo ``Config.MEDIA_ROOT``::
+
+    originals/ab/<sha256>                  archivo subido, tal cual
+    variants/ab/<sha256>/<variante>.<fmt>  thumb / card / full en webp y jpg
+
+La misma foto subida dos veces (o para dos vehículos) se guarda una sola vez.
+Como el hash identifica el contenido, las URLs de variantes nunca cambian de
+contenido y se sirven con ``Cache-Control: immutable``.
+
+Decodificar y redimensionar una foto de 10 MB lleva cientos de ms de CPU: se
+hace en un pool de procesos (``render``), fuera del event loop y del GIL de
+los workers de la app.  Este módulo no importa la base de datos para que los
+procesos del pool arranquen rápido.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from autogo_erp.config import Config
+
+# Lado mayor en px de cada variante (de mayor a menor: cada una sale de la anterior)
+VARIANTS = {"full": 1920, "card": 800, "thumb": 320}
+FORMATS = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+# Variante que se guarda en Photo.url (listados / vehicle_summary)
+DEFAULT_VARIANT = ("card", "webp")
+
+CHUNK_SIZE = 1024 * 1024
+
+# Tope de píxeles al decodificar (fotos de teléfono: ~12-50 MP)
+MAX_PIXELS = 80_000_000
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def is_digest(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+def original_path(digest: str) -> Path:
+    return Config.MEDIA_ROOT / "originals" / digest[:2] / digest
+
+def variant_path(digest: str, variant: str, fmt: str) -> Path:
+    return Config.MEDIA_ROOT / "variants" / digest[:2] / digest / f"{variant}.{fmt}"
+
+def variant_url(digest: str, variant: str, fmt: str) -> str:
+    return f"/photos/{digest}/{variant}.{fmt}"
+
+def variant_urls(digest: str) -> Dict[str, Dict[str, str]]:
+    return {v: {fmt: variant_url(digest, v, fmt) for fmt in FORMATS} for v in VARIANTS}
+
+
+# ===== Guardado del original =====
+def store_upload(src: BinaryIO, max_bytes: Optional[int] = None) -> Tuple[str, bool]:
+    """Copia ``src`` por bloques a disco calculando el SHA-256.
+
+    Devuelve ``(digest, nuevo)``; si el contenido ya existía el temporal se
+    descarta.  Bloqueante: llamar desde un thread.
+    """
+    max_bytes = max_bytes or Config.PHOTO_MAX_UPLOAD_BYTES
+    tmp_dir = Config.MEDIA_ROOT / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds {max_bytes} bytes")
+                sha.update(chunk)
+                out.write(chunk)
+        digest = sha.hexdigest()
+        dest = original_path(digest)
+        if dest.exists():
+            return digest, False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, dest)
+        return digest, True
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+# ===== Variantes (corre en el pool de procesos) =====
+def _save_atomic(img: Image.Image, dest: Path, fmt: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if fmt == "webp":
+                img.save(out, "WEBP", quality=80, method=4)
+            else:
+                img.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def rendered(digest: str) -> bool:
+    return all(variant_path(digest, v, fmt).exists() for v in VARIANTS for fmt in FORMATS)
+
+def render(digest: str) -> Tuple[int, int]:
+    """Genera las variantes que falten de ``digest``; devuelve (ancho, alto) del original."""
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(original_path(digest)) as src:
+            size = src.size
+            # JPEG: decodificar ya reducido (escalado DCT), mucho más rápido que a tamaño completo
+            src.draft("RGB", (VARIANTS["full"], VARIANTS["full"]))
+            img = ImageOps.exif_transpose(src)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.load()
+    except (OSError, Image.DecompressionBombError, SyntaxError) as exc:
+        raise InvalidImage(str(exc)) from None
+
+    for variant, side in VARIANTS.items():
+        img.thumbnail((side, side), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in FORMATS:
+            dest = variant_path(digest, variant, fmt)
+            if dest.exists():
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            _save_atomic(img, dest, fmt)
+    return size
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: el proceso de la app ya tiene threads (pools de conexiones, etc.)
+        _pool = ProcessPoolExecutor(
+            max_workers=Config.PHOTO_WORKERS or None,
+            mp_context=get_context("spawn"),
+        )
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+async def render_async(digest: str) -> Tuple[int, int]:
+    return await asyncio.get_running_loop().run_in_executor(pool(), render, digest)
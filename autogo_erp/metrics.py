@@ -0,0 +1,420 @@
+"""Métricas en formato de texto de Prometheus (``GET /metrics``).
+
+Qué se mide:
+
+* HTTP (``MetricsMiddleware``, ASGI puro): requests por ruta, método y
+  status, histograma de latencia por ruta, requests en curso y cantidad de
+  consultas SQL por request.  La ruta es el template (``/vehicles/{vehicle_id}``),
+  no el path, para no multiplicar series.
+* SQL (eventos del motor, ``instrument_engine``): latencia por sentencia
+  según motor (primary/read/async...) y tipo (SELECT, INSERT...), y errores.
+* Pool de conexiones: tamaño, en uso y overflow, más las esperas al pedir
+  conexión que ya registra ``database.pool_stats``.
+* Thread pool de anyio (handlers sync): hilos ocupados y tareas esperando.
+
+Registrar cuesta unos pocos microsegundos: un ``perf_counter`` por punta,
+un lock y un par de sumas por serie.  Lo demás (pools, hilos) se lee al
+armar la respuesta.
+
+Con varios workers (``AUTOERP_METRICS_DIR``) cada uno vuelca su estado a
+``<dir>/<pid>.json`` cada ``METRICS_FLUSH_SECONDS`` y ``/metrics`` suma los
+archivos recientes de todos: cualquier worker que atienda el scrape
+devuelve el total.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from autogo_erp.config import Config
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED = "<unmatched>"
+
+
+# ===== Tipos de métrica =====
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def items(self) -> List[Tuple[tuple, object]]:
+        with self._lock:
+            return [(k, self._copy(v)) for k, v in self._values.items()]
+
+    @staticmethod
+    def _copy(v):
+        return v
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Cuenta por bucket (no acumulada; se acumula al exportar), suma y total."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=REQUEST_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(float(b) for b in buckets)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect_left(self.buckets, value)  # le: el valor cae en el primer bucket >= value
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    @staticmethod
+    def _copy(v):
+        return [list(v[0]), v[1]]
+
+
+# ===== Registro =====
+HTTP_REQUESTS = Counter("autogo_http_requests_total", "Requests HTTP atendidos", ("method", "route", "status"))
+HTTP_LATENCY = Histogram(
+    "autogo_http_request_duration_seconds", "Latencia de requests HTTP (hasta el último byte)", ("method", "route"),
+)
+HTTP_IN_FLIGHT = Gauge("autogo_http_requests_in_flight", "Requests HTTP en curso")
+HTTP_QUERIES = Histogram(
+    "autogo_http_request_queries", "Sentencias SQL por request", ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+SQL_LATENCY = Histogram(
+    "autogo_db_statement_duration_seconds", "Latencia por sentencia SQL", ("engine", "kind"), buckets=SQL_BUCKETS,
+)
+SQL_ERRORS = Counter("autogo_db_statement_errors_total", "Sentencias SQL con error", ("engine",))
+
+REGISTRY: List[_Metric] = [HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, HTTP_QUERIES, SQL_LATENCY, SQL_ERRORS]
+
+# Contador de sentencias del request en curso (lista mutable: los hilos del
+# threadpool reciben una copia del contexto, pero la misma lista)
+_request_queries: ContextVar[Optional[list]] = ContextVar("autogo_request_queries", default=None)
+
+
+# ===== SQL =====
+_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"}
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:8].split(None, 1)
+    word = head[0].upper() if head else ""
+    return word if word in _KINDS else "OTHER"
+
+def instrument_engine(engine, name: str) -> None:
+    """Registra latencia y errores de cada sentencia de ``engine`` (sync o ``.sync_engine``)."""
+    if not Config.METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._autogo_started = time.perf_counter()
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_autogo_started", None)
+        if started is not None:
+            SQL_LATENCY.observe((name, _statement_kind(statement)), time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        SQL_ERRORS.inc((name,))
+
+
+# ===== HTTP =====
+class MetricsMiddleware:
+    """Middleware ASGI: cuenta y mide cada request HTTP por ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        root_path = scope.get("root_path", "")
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_queries.reset(token)
+            route = _route_label(scope, root_path)
+            method = scope["method"]
+            HTTP_REQUESTS.inc((method, route, str(status[0])))
+            HTTP_LATENCY.observe((method, route), elapsed)
+            HTTP_QUERIES.observe((route,), queries[0])
+
+def _route_label(scope, root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    # Apps montadas (/static): el prefijo del mount
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):] + "/*"
+    return UNMATCHED
+
+
+# ===== Lecturas al exportar (pools, hilos) =====
+# Cada colector devuelve [(nombre, tipo, ayuda, labels, {valores_labels: valor})]
+Collected = List[Tuple[str, str, str, Tuple[str, ...], Dict[tuple, float]]]
+
+def _pool_metrics() -> Collected:
+    from autogo_erp import database
+
+    engines = {"primary": database.engine}
+    if database.read_engine is not database.engine:
+        engines["read"] = database.read_engine
+    if database.async_engine is not None:
+        engines["async"] = database.async_engine.sync_engine
+    if database.async_read_engine not in (None, database.async_engine):
+        engines["async_read"] = database.async_read_engine.sync_engine
+
+    size, out, overflow = {}, {}, {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        for target, attr in ((size, "size"), (out, "checkedout"), (overflow, "overflow")):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                target[(name,)] = fn()
+        if (name,) in overflow:
+            # QueuePool.overflow() arranca en -pool_size
+            overflow[(name,)] = max(0, overflow[(name,)])
+    waits = database.pool_stats.snapshot()
+    by_engine = ("engine",)
+    checkouts = {(n,): s["checkouts"] for n, s in waits.items()}
+    timeouts = {(n,): s["timeouts"] for n, s in waits.items()}
+    waited = {(n,): s["wait_seconds_total"] for n, s in waits.items()}
+    return [
+        ("autogo_db_pool_size", "gauge", "Conexiones fijas del pool", by_engine, size),
+        ("autogo_db_pool_checked_out", "gauge", "Conexiones del pool en uso", by_engine, out),
+        ("autogo_db_pool_overflow", "gauge", "Conexiones por encima de pool_size", by_engine, overflow),
+        ("autogo_db_pool_checkouts_total", "counter", "Conexiones pedidas al pool", by_engine, checkouts),
+        ("autogo_db_pool_timeouts_total", "counter", "Pedidos al pool que vencieron", by_engine, timeouts),
+        ("autogo_db_pool_wait_seconds_total", "counter", "Tiempo esperando conexión del pool", by_engine, waited),
+    ]
+
+_threadpool: Dict[str, float] = {}
+
+def sample_threadpool() -> None:
+    """Lee el limitador de anyio (llamar desde el event loop)."""
+    from anyio import to_thread
+
+    limiter = to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    _threadpool.update(
+        tokens=limiter.total_tokens, busy=stats.borrowed_tokens, waiting=stats.tasks_waiting,
+    )
+
+def _threadpool_metrics() -> Collected:
+    if not _threadpool:
+        return []
+    return [
+        ("autogo_threadpool_size", "gauge", "Hilos del threadpool de handlers sync", (), {(): _threadpool["tokens"]}),
+        ("autogo_threadpool_busy", "gauge", "Hilos ocupados", (), {(): _threadpool["busy"]}),
+        ("autogo_threadpool_queue_depth", "gauge", "Tareas esperando un hilo", (), {(): _threadpool["waiting"]}),
+    ]
+
+# Lecturas al exportar; otros módulos agregan las suyas (p. ej. admission.py)
+COLLECTORS: List[Callable[[], Collected]] = [_pool_metrics, _threadpool_metrics]
+
+
+# ===== Snapshot (por worker) y agregación =====
+def snapshot() -> dict:
+    """Estado de este worker como JSON."""
+    metrics = []
+    for m in REGISTRY:
+        entry = {"name": m.name, "type": m.kind, "help": m.help, "labels": list(m.labelnames),
+                 "values": [[list(k), v] for k, v in m.items()]}
+        if isinstance(m, Histogram):
+            entry["buckets"] = list(m.buckets)
+        metrics.append(entry)
+    for collect in COLLECTORS:
+        for name, kind, help_text, labels, values in collect():
+            metrics.append({"name": name, "type": kind, "help": help_text, "labels": list(labels),
+                            "values": [[list(k), v] for k, v in values.items()]})
+    return {"pid": os.getpid(), "time": time.time(), "metrics": metrics}
+
+def _merge(snapshots: Iterable[dict]) -> List[dict]:
+    merged: Dict[str, dict] = {}
+    for snap in snapshots:
+        for m in snap["metrics"]:
+            target = merged.setdefault(
+                m["name"], {**{k: v for k, v in m.items() if k != "values"}, "values": {}}
+            )
+            for labels, value in m["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if m["type"] == "histogram":
+                    if current is None:
+                        target["values"][key] = [list(value[0]), value[1]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                else:
+                    target["values"][key] = (current or 0) + value
+    return list(merged.values())
+
+def _worker_file(directory: Path, pid: int) -> Path:
+    return directory / f"{pid}.json"
+
+def write_snapshot() -> None:
+    directory = Path(Config.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(snapshot(), fh, separators=(",", ":"))
+    os.replace(tmp, _worker_file(directory, os.getpid()))
+
+def _collect() -> List[dict]:
+    own = snapshot()
+    if not Config.METRICS_DIR:
+        return _merge([own])
+    snaps = [own]
+    directory = Path(Config.METRICS_DIR)
+    stale = time.time() - Config.METRICS_FLUSH_SECONDS * 3
+    for path in directory.glob("*.json"):
+        if path.name == f"{own['pid']}.json":
+            continue
+        try:
+            if path.stat().st_mtime < stale:
+                # Worker terminado: sus contadores dejan de sumar (Prometheus lo
+                # trata como un reinicio)
+                path.unlink()
+                continue
+            snaps.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return _merge(snaps)
+
+
+# ===== Exportación =====
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_number(v) -> str:
+    if isinstance(v, float):
+        if v == float("inf"):
+            return "+Inf"
+        return repr(v)
+    return str(v)
+
+def render() -> str:
+    lines = []
+    for m in _collect():
+        name, names = m["name"], m["labels"]
+        lines.append(f"# HELP {name} {m['help']}")
+        lines.append(f"# TYPE {name} {m['type']}")
+        for labels, value in sorted(m["values"].items()):
+            if m["type"] == "histogram":
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(m["buckets"]) + [float("inf")], counts):
+                    cumulative += count
+                    le = 'le="' + _format_number(float(bound)) + '"'
+                    lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {_format_number(float(total))}")
+                lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(names, labels)} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ===== Tarea de fondo por worker =====
+_task: Optional[asyncio.Task] = None
+
+async def _sampler() -> None:
+    while True:
+        try:
+            sample_threadpool()
+            if Config.METRICS_DIR:
+                await asyncio.get_running_loop().run_in_executor(None, write_snapshot)
+        except Exception:
+            log.exception("No se pudieron volcar las métricas")
+        await asyncio.sleep(Config.METRICS_FLUSH_SECONDS)
+
+def start() -> None:
+    """Arranca el muestreo periódico (llamar en el startup, dentro del loop)."""
+    global _task
+    if Config.METRICS_ENABLED and _task is None:
+        _task = asyncio.get_running_loop().create_task(_sampler())
+
+def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
+    if Config.METRICS_DIR:
+        try:
+            _worker_file(Path(Config.METRICS_DIR), os.getpid()).unlink()
+        except OSError:
+            pass
@@ -0,0 +1,492 @@
+"""Migraciones de esquema versionadas.
+
+Cada paso de ``MIGRATIONS`` tiene un número de versión creciente y se
+registra en ``schema_migrations`` al aplicarse.  ``migrate(engine)``:
+
+1. Lee la versión registrada (una consulta).  Si ya es la última, termina:
+   los workers que arrancan sobre una base al día no tocan el esquema.
+2. Si falta algo, toma un lock entre procesos y vuelve a leer la versión
+   (otro proceso pudo haber migrado mientras esperaba):
+
+   * SQLite: ``BEGIN IMMEDIATE`` (lock de escritura de la base); todos los
+     pasos pendientes van en esa transacción.
+   * PostgreSQL: ``pg_advisory_lock``; cada paso en su propia transacción.
+
+3. Aplica los pasos pendientes en orden.
+
+Los pasos son idempotentes (``checkfirst`` / ``IF NOT EXISTS`` / chequeo de
+columnas) porque las bases creadas antes de este módulo ya tienen parte del
+esquema sin tener ``schema_migrations``.
+
+Uso fuera de la app (p. ej. antes de escalar workers)::
+
+    python -m autogo_erp.migrations [--url URL]
+"""
+
+import argparse
+import logging
+import time
+from datetime import date
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    JSON, Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData,
+    String, Table, Text, case, column, func, inspect, insert, select, table, text, update,
+)
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+# Los pasos que llaman a versioning/summary usan el ORM: todos los mappers registrados
+from autogo_erp import models, models_costos  # noqa: F401
+
+log = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL (arbitraria, fija para la app)
+PG_LOCK_KEY = 0x4155544F  # "AUTO"
+
+# Cuánto espera un proceso a que otro termine de migrar (SQLite)
+LOCK_WAIT_SECONDS = 600
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+
+# ===== Esquema congelado =====
+# Los pasos no usan los modelos: ``Base.metadata`` es el esquema de hoy y un
+# paso viejo que lo use crea tablas o índices que en su versión todavía no
+# existían (p. ej. un índice sobre una columna que agrega un paso posterior).
+# Cada tabla se define acá como la creó su paso y cada índice se crea en el
+# paso que agrega sus columnas.  Un cambio de esquema nuevo va en un paso
+# nuevo, sin tocar las definiciones de abajo.
+_schema = MetaData()
+
+def _enum(name: str, *values: str) -> SAEnum:
+    # Mismo tipo que SAEnum(<enum de Python>): guarda los nombres
+    return SAEnum(*values, name=name)
+
+# v1: tablas del arranque original (create_all de models.py / models_costos.py)
+_vehicles_v1 = Table(
+    "vehicles", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("vin", String(32), unique=True, index=True, nullable=False),
+    Column("plate", String, unique=True, index=True, nullable=True),
+    Column("brand", String(64), nullable=False),
+    Column("model", String(64), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("odometer_km", Float, nullable=False),
+    Column("acquisition_type", _enum("acquisitiontype", "TRADE_IN", "DIRECT_SALE"), nullable=False),
+    Column("seller_name", String(128), nullable=False),
+    Column("seller_contact", String(128), nullable=True),
+    Column("seller_document", String(64), nullable=True),
+    Column("received_date", Date, nullable=True),
+    Column("status", _enum("vehiclestatus", "AVAILABLE", "SOLD"), nullable=False),
+)
+_photos_v1 = Table(
+    "photos", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("vehicle_id", Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False),
+    Column("url", String(512), nullable=False),
+    Column("is_main", Boolean, nullable=False),
+)
+_sales_v1 = Table(
+    "sales", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("vehicle_id", Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False),
+    Column("sale_date", DateTime, nullable=False),
+    Column("sale_price", Float, nullable=False),
+    Column("amount_paid", Float, nullable=False),
+    Column("status", _enum("salestatus", "OPEN", "PAID"), nullable=False),
+    Column("notes", String(512), nullable=True),
+)
+_payments_v1 = Table(
+    "payments", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("sale_id", Integer, ForeignKey("sales.id", ondelete="CASCADE"), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("paid_at", DateTime, nullable=False),
+    Column("method", String(64), nullable=True),
+    Column("reference", String(128), nullable=True),
+)
+_costos_v1 = Table(
+    "costos", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("descripcion", String(150), nullable=False),
+    Column("monto", Float, nullable=False),
+    Column("tipo", String(30), nullable=False),
+    Column("referencia", String(50), nullable=True),
+    Column("vehiculo_id", Integer, ForeignKey("vehicles.id"), nullable=True),
+)
+_BASE_TABLES = [_vehicles_v1, _photos_v1, _sales_v1, _payments_v1, _costos_v1]
+
+# v5
+_table_versions_v5 = Table(
+    "table_versions", _schema,
+    Column("name", String(64), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+# v9
+_tramites_v9 = Table(
+    "tramites", _schema,
+    Column("id", Integer, primary_key=True),
+    Column("referencia", String(50), nullable=True, index=True),
+    Column("vehiculo_id", Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=True),
+    Column("fecha", Date, nullable=False),
+    Column("total", Float, nullable=False),
+    Column("items_count", Integer, nullable=False),
+    Index("ix_tramites_fecha_id", "fecha", "id"),
+    Index("ix_tramites_vehiculo_id_fecha", "vehiculo_id", "fecha"),
+)
+
+# v10
+_vehicle_summary_v10 = Table(
+    "vehicle_summary", _schema,
+    Column("vehicle_id", Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True),
+    Column("vin", String(32), nullable=False),
+    Column("brand", String(64), nullable=False),
+    Column("model", String(64), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("status", _enum("vehiclestatus", "AVAILABLE", "SOLD"), nullable=False),
+    Column("received_date", Date, nullable=True),
+    Column("cost_tramite", Float, nullable=False),
+    Column("cost_compra", Float, nullable=False),
+    Column("cost_transporte", Float, nullable=False),
+    Column("cost_reparacion", Float, nullable=False),
+    Column("cost_otros", Float, nullable=False),
+    Column("total_cost", Float, nullable=False),
+    Column("sale_price", Float, nullable=True),
+    Column("sold_at", Date, nullable=True),
+    Column("amount_paid", Float, nullable=False),
+    Column("balance", Float, nullable=True),
+    Column("margin", Float, nullable=True),
+    Column("main_photo_url", String(512), nullable=True),
+    Index("ix_vehicle_summary_status_received_date", "status", "received_date", "vehicle_id"),
+    Index("ix_vehicle_summary_status_margin", "status", "margin", "vehicle_id"),
+)
+
+# v13
+_jobs_v13 = Table(
+    "jobs", _schema,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String(32), nullable=False),
+    Column("params", JSON, nullable=False),
+    Column("status", _enum("jobstatus", "QUEUED", "RUNNING", "SUCCEEDED", "FAILED"), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_after", DateTime, nullable=False),
+    Column("locked_by", String(128), nullable=True),
+    Column("heartbeat_at", DateTime, nullable=True),
+    Column("progress", Float, nullable=True),
+    Column("progress_message", String(256), nullable=True),
+    Column("result", JSON, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("artifact_name", String(256), nullable=True),
+    Column("artifact_media_type", String(128), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+    Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+    Index("ix_jobs_status_finished_at", "status", "finished_at"),
+)
+
+# v14
+_vehicle_events_v14 = Table(
+    "vehicle_events", _schema,
+    Column("id", Integer, primary_key=True),
+    Column("vehicle_id", Integer, nullable=False),
+    Column("type", String(16), nullable=False),
+    Column("status", String(16), nullable=True),
+    Column("previous_status", String(16), nullable=True),
+    Column("brand", String(64), nullable=True),
+    Column("previous_brand", String(64), nullable=True),
+    Column("row_version", Integer, nullable=True),
+    Column("data", Text, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_vehicle_events_created_at", "created_at"),
+    sqlite_autoincrement=True,
+)
+
+# Registro de pasos aplicados (lo usa el runner antes de cualquier paso)
+_schema_migrations = Table(
+    "schema_migrations", _schema,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+# ===== Helpers =====
+def _columns(conn, table: str) -> List[str]:
+    return [c["name"] for c in inspect(conn).get_columns(table)]
+
+def _add_column(conn, table: str, name: str, ddl: str) -> None:
+    if name not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+def _create_index(conn, name: str, table: str, columns: str, unique: bool = False, where: str = None) -> None:
+    # Igual en SQLite y PostgreSQL (IF NOT EXISTS: las bases viejas pueden tenerlo)
+    sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(text(sql))
+
+def _create_table(conn, table: Table) -> None:
+    # checkfirst no crea los índices si la tabla ya existía: se crean aparte
+    table.create(bind=conn, checkfirst=True)
+    for ix in table.indexes:
+        ix.create(bind=conn, checkfirst=True)
+
+
+# ===== Pasos =====
+def _create_tables(conn):
+    for table in _BASE_TABLES:
+        _create_table(conn, table)
+
+def _add_plate(conn):
+    _add_column(conn, "vehicles", "plate", "VARCHAR")
+    _create_index(conn, "ix_vehicles_plate", "vehicles", "plate")
+
+def _add_seller_document(conn):
+    _add_column(conn, "vehicles", "seller_document", "VARCHAR(64)")
+
+def _add_received_date(conn):
+    _add_column(conn, "vehicles", "received_date", "DATE")
+
+def _add_row_version(conn):
+    # Contadores de versión por tabla (ETag) y versión por fila
+    from autogo_erp.versioning import ensure_rows
+
+    _add_column(conn, "vehicles", "row_version", "INTEGER NOT NULL DEFAULT 1")
+    _create_table(conn, _table_versions_v5)
+    ensure_rows(conn)
+
+def _create_indexes(conn):
+    # Keyset de GET /vehicles/ y FKs que se consultan por el lado "muchos"
+    _create_index(conn, "ix_vehicles_received_date_id", "vehicles", "received_date, id")
+    _create_index(conn, "ix_vehicles_status_received_date_id", "vehicles", "status, received_date, id")
+    _create_index(conn, "ix_vehicles_brand_model_year", "vehicles", "brand, model, year")
+    _create_index(conn, "ix_vehicles_year_id", "vehicles", "year, id")
+    _create_index(conn, "ix_photos_vehicle_id", "photos", "vehicle_id")
+    _create_index(conn, "ix_sales_vehicle_id", "sales", "vehicle_id")
+    _create_index(conn, "ix_payments_sale_id", "payments", "sale_id")
+    _create_index(conn, "ix_costos_vehiculo_id", "costos", "vehiculo_id")
+
+def _search_index(conn):
+    # FTS5 en SQLite, pg_trgm en Postgres
+    from autogo_erp.search import ensure_search_index
+
+    ensure_search_index(conn)
+
+def _seed_demo(conn):
+    from autogo_erp.seed import DEMO_VEHICLES
+
+    vehicles = table(
+        "vehicles", *[column(c) for c in (
+            "vin", "brand", "model", "year", "odometer_km", "acquisition_type", "seller_name",
+            "seller_contact", "seller_document", "received_date", "status",
+        )]
+    )
+    if conn.execute(select(func.count()).select_from(vehicles)).scalar() == 0:
+        conn.execute(insert(vehicles), [{**v, "status": "AVAILABLE"} for v in DEMO_VEHICLES])
+
+def _tramites(conn):
+    # Encabezados de trámite + costos.tramite_id; los trámites existentes se
+    # agrupan por (referencia, vehículo), o uno por línea si no tienen referencia.
+    _create_table(conn, _tramites_v9)
+    _add_column(conn, "costos", "tramite_id", "INTEGER REFERENCES tramites(id) ON DELETE CASCADE")
+    _create_index(conn, "ix_costos_tramite_id", "costos", "tramite_id")
+    _create_index(conn, "ix_costos_tipo_referencia", "costos", "tipo, referencia")
+    _create_index(conn, "ix_costos_vehiculo_id_tipo", "costos", "vehiculo_id, tipo")
+
+    costos = table("costos", column("id"), column("referencia"), column("vehiculo_id"),
+                   column("monto"), column("tipo"), column("tramite_id"))
+    T = _tramites_v9
+    rows = conn.execute(
+        select(costos.c.id, costos.c.referencia, costos.c.vehiculo_id, costos.c.monto)
+        .where(costos.c.tipo == "tramite", costos.c.tramite_id.is_(None))
+        .order_by(costos.c.id)
+    ).all()
+    groups = {}
+    for r in rows:
+        key = (r.referencia, r.vehiculo_id) if r.referencia is not None else (None, r.id)
+        groups.setdefault(key, []).append(r)
+    for items in groups.values():
+        tramite_id = conn.execute(
+            insert(T).values(
+                referencia=items[0].referencia,
+                vehiculo_id=items[0].vehiculo_id,
+                fecha=date.today(),
+                total=sum(r.monto for r in items),
+                items_count=len(items),
+            ).returning(T.c.id)
+        ).scalar_one()
+        conn.execute(
+            update(costos).where(costos.c.id.in_([r.id for r in items])).values(tramite_id=tramite_id)
+        )
+
+def _vehicle_summary(conn):
+    # Proyección por vehículo (ver summary.py), llenada desde cero.  rebuild
+    # lee sólo columnas que existen desde v1; si la proyección cambia, el
+    # paso que la cambie vuelve a llamarlo.
+    from autogo_erp import summary
+
+    _create_table(conn, _vehicle_summary_v10)
+    summary.rebuild(conn)
+
+def _payments(conn):
+    # Índices de cobranza y sales.amount_paid / status alineados con los pagos
+    # existentes (desde acá los mantiene routers/payments.py)
+    _create_index(conn, "ix_sales_status_sale_date", "sales", "status, sale_date")
+    _create_index(conn, "ix_payments_sale_id_paid_at", "payments", "sale_id, paid_at, amount")
+
+    S = table("sales", column("id"), column("sale_price"), column("amount_paid"), column("status"))
+    P = table("payments", column("sale_id"), column("amount"))
+    paid = select(func.coalesce(func.sum(P.c.amount), 0.0)).where(P.c.sale_id == S.c.id).scalar_subquery()
+    conn.execute(update(S).values(amount_paid=paid))
+    conn.execute(
+        update(S).values(status=case((S.c.amount_paid >= S.c.sale_price - 0.005, "PAID"), else_="OPEN"))
+    )
+
+def _photos(conn):
+    # Fotos por hash de contenido (media.py) y una sola principal por vehículo:
+    # si hay varias se conserva la de menor id
+    _add_column(conn, "photos", "content_hash", "VARCHAR(64)")
+    _create_index(conn, "ix_photos_content_hash", "photos", "content_hash")
+
+    P = table("photos", column("id"), column("vehicle_id"), column("is_main"))
+    keep = select(func.min(P.c.id)).where(P.c.is_main.is_(True)).group_by(P.c.vehicle_id)
+    conn.execute(update(P).where(P.c.is_main.is_(True), P.c.id.not_in(keep)).values(is_main=False))
+    _create_index(conn, "ux_photos_vehicle_id_main", "photos", "vehicle_id", unique=True, where="is_main")
+
+def _jobs(conn):
+    # Cola de trabajos en segundo plano (ver jobs.py)
+    _create_table(conn, _jobs_v13)
+
+def _vehicle_events(conn):
+    # Cambios de vehículos para la transmisión en vivo (ver live.py)
+    _create_table(conn, _vehicle_events_v14)
+
+def _version_bigint(conn):
+    # Las versiones arrancan en la hora Unix (ver versioning.py): en
+    # PostgreSQL INTEGER desborda en 2038.  En SQLite INTEGER ya es de 64 bits.
+    if conn.dialect.name != "postgresql":
+        return
+    for table_name, column_name in (("table_versions", "version"), ("vehicles", "row_version"),
+                                    ("vehicle_events", "row_version")):
+        conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE BIGINT"))
+
+MIGRATIONS = [
+    Migration(1, "create_tables", _create_tables),
+    Migration(2, "vehicles_plate", _add_plate),
+    Migration(3, "vehicles_seller_document", _add_seller_document),
+    Migration(4, "vehicles_received_date", _add_received_date),
+    Migration(5, "vehicles_row_version", _add_row_version),
+    Migration(6, "indexes", _create_indexes),
+    Migration(7, "search_index", _search_index),
+    Migration(8, "seed_demo", _seed_demo),
+    Migration(9, "tramites", _tramites),
+    Migration(10, "vehicle_summary", _vehicle_summary),
+    Migration(11, "payments", _payments),
+    Migration(12, "photos", _photos),
+    Migration(13, "jobs", _jobs),
+    Migration(14, "vehicle_events", _vehicle_events),
+    Migration(15, "version_bigint", _version_bigint),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+
+# ===== Runner =====
+def current_version(conn) -> int:
+    """Última versión aplicada (0 si la tabla todavía no existe)."""
+    try:
+        return conn.execute(select(func.max(_schema_migrations.c.version))).scalar() or 0
+    except (OperationalError, DBAPIError):
+        conn.rollback()
+        return 0
+
+def _apply(conn, migration: Migration) -> None:
+    started = time.perf_counter()
+    migration.apply(conn)
+    conn.execute(insert(_schema_migrations).values(version=migration.version, name=migration.name))
+    log.info("migration %s (%s) applied in %.2fs",
+             migration.version, migration.name, time.perf_counter() - started)
+
+def _pending(conn) -> List[Migration]:
+    _schema_migrations.create(bind=conn, checkfirst=True)
+    done = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > done]
+
+def _migrate_sqlite(engine) -> int:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # El driver no abre transacciones por su cuenta: BEGIN IMMEDIATE toma el
+        # lock de escritura; si otro proceso está migrando se reintenta.
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while True:
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                break
+            except OperationalError as exc:
+                if "locked" not in str(exc) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+        try:
+            pending = _pending(conn)
+            for migration in pending:
+                _apply(conn, migration)
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        return len(pending)
+
+def _migrate_postgresql(engine) -> int:
+    with engine.connect() as conn:
+        conn.execute(select(func.pg_advisory_lock(PG_LOCK_KEY)))
+        conn.commit()
+        try:
+            pending = _pending(conn)
+            conn.commit()
+            for migration in pending:
+                _apply(conn, migration)
+                conn.commit()
+            return len(pending)
+        finally:
+            conn.rollback()
+            conn.execute(select(func.pg_advisory_unlock(PG_LOCK_KEY)))
+            conn.commit()
+
+def migrate(engine) -> int:
+    """Aplica los pasos pendientes; devuelve cuántos se aplicaron (0 = al día)."""
+    with engine.connect() as conn:
+        if current_version(conn) >= LATEST:
+            return 0
+    if engine.dialect.name == "sqlite":
+        return _migrate_sqlite(engine)
+    if engine.dialect.name == "postgresql":
+        return _migrate_postgresql(engine)
+    # Otros dialectos: sin lock entre procesos
+    with engine.begin() as conn:
+        pending = _pending(conn)
+        for migration in pending:
+            _apply(conn, migration)
+        return len(pending)
+
+
+def main(argv=None) -> None:
+    from autogo_erp.database import DATABASE_URL, make_engine
+
+    parser = argparse.ArgumentParser(description="Aplicar migraciones de esquema de AutoGo ERP")
+    parser.add_argument("--url", default=DATABASE_URL, help="URL SQLAlchemy (por defecto la de la app)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    applied = migrate(make_engine(args.url, "migrate"))
+    print(f"{applied} migration(s) applied; schema at version {LATEST}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 import enum
 from sqlalchemy import (
-    Column, Integer, String, Float, DateTime, Date,
-    ForeignKey, Boolean,
+    BigInteger, Column, Integer, String, Float, DateTime, Date,
+    ForeignKey, Boolean, Index, JSON, Text,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from sqlalchemy import Enum as SAEnum
 
 from autogo_erp.database import Base
 
+# Versiones de versioning.py: arrancan en la hora Unix y sólo crecen, así que
+# no entran en 32 bits pasado 2038.  En SQLite INTEGER ya es de 64 bits.
+VersionInteger = BigInteger().with_variant(Integer, "sqlite")
+
 # =========================
 # Enums
 # =========================
@@ -25,6 +29,12 @@ class SaleStatus(str, enum.Enum):
     OPEN = "OPEN"
     PAID = "PAID"
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
 # =========================
 # Vehicle
 # =========================
@@ -60,6 +70,9 @@ class Vehicle(Base):
     # Estado del vehículo
     status = Column(SAEnum(VehicleStatus), nullable=False, default=VehicleStatus.AVAILABLE)
 
+    # Versión de la fila (para ETag): toma la versión de la tabla en cada escritura
+    row_version = Column(VersionInteger, nullable=False, default=1, server_default="1")
+
     # Relaciones
     photos = relationship(
         "Photo",
@@ -77,6 +90,16 @@ class Vehicle(Base):
         cascade="all, delete-orphan",
     )
 
+    # Índices compuestos de GET /vehicles/. Los de orden (paginación por cursor)
+    # terminan en "id" para que el cursor sea único; brand/model/year sólo
+    # respalda los filtros por marca, modelo y rango de año, no es un orden.
+    __table_args__ = (
+        Index("ix_vehicles_received_date_id", "received_date", "id"),
+        Index("ix_vehicles_status_received_date_id", "status", "received_date", "id"),
+        Index("ix_vehicles_brand_model_year", "brand", "model", "year"),
+        Index("ix_vehicles_year_id", "year", "id"),
+    )
+
 # =========================
 # Photo
 # =========================
@@ -85,12 +108,22 @@ class Photo(Base):
     __tablename__ = "photos"
 
     id = Column(Integer, primary_key=True, index=True)
-    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False, index=True)
     url = Column(String(512), nullable=False)
     is_main = Column(Boolean, nullable=False, default=False)
+    # SHA-256 del archivo subido (ver media.py); NULL en fotos con URL externa
+    content_hash = Column(String(64), nullable=True, index=True)
 
     vehicle = relationship("Vehicle", back_populates="photos")
 
+    # A lo sumo una foto principal por vehículo
+    __table_args__ = (
+        Index(
+            "ux_photos_vehicle_id_main", "vehicle_id", unique=True,
+            sqlite_where=text("is_main"), postgresql_where=text("is_main"),
+        ),
+    )
+
 # =========================
 # Sale
 # =========================
@@ -99,7 +132,7 @@ class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True, index=True)
-    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False, index=True)
 
     sale_date = Column(DateTime, nullable=False, default=func.now())
     sale_price = Column(Float, nullable=False)
@@ -116,6 +149,11 @@ class Sale(Base):
         cascade="all, delete-orphan",
     )
 
+    # Cuentas por cobrar: ventas abiertas por antigüedad (ver routers/payments.py)
+    __table_args__ = (
+        Index("ix_sales_status_sale_date", "status", "sale_date"),
+    )
+
 # =========================
 # Payment
 # =========================
@@ -124,7 +162,7 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id", ondelete="CASCADE"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id", ondelete="CASCADE"), nullable=False, index=True)
 
     amount = Column(Float, nullable=False)
     paid_at = Column(DateTime, nullable=False, default=func.now())
@@ -133,3 +171,146 @@ class Payment(Base):
 
     sale = relationship("Sale", back_populates="payments")
 
+    # Cubre la suma de pagos de una venta hasta una fecha (aging histórico)
+    __table_args__ = (
+        Index("ix_payments_sale_id_paid_at", "sale_id", "paid_at", "amount"),
+    )
+
+# =========================
+# TableVersion
+# =========================
+
+class TableVersion(Base):
+    """Contador por tabla que se incrementa en cada escritura (ver versioning.py)."""
+    __tablename__ = "table_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(VersionInteger, nullable=False, default=1)
+
+# =========================
+# SchemaMigration
+# =========================
+
+class SchemaMigration(Base):
+    """Pasos de migración ya aplicados (ver migrations.py)."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(128), nullable=False)
+    applied_at = Column(DateTime, nullable=False, server_default=func.now())
+
+# =========================
+# VehicleSummary
+# =========================
+
+class VehicleSummary(Base):
+    """Proyección por vehículo de costos, venta, pagos y foto principal.
+
+    La mantiene ``summary.refresh`` dentro de cada transacción que escribe
+    vehículos, costos, ventas, pagos o fotos (ver summary.py).
+    """
+    __tablename__ = "vehicle_summary"
+
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+
+    # Copia de los datos del vehículo que usan los tableros (sin JOIN)
+    vin = Column(String(32), nullable=False)
+    brand = Column(String(64), nullable=False)
+    model = Column(String(64), nullable=False)
+    year = Column(Integer, nullable=False)
+    status = Column(SAEnum(VehicleStatus), nullable=False)
+    received_date = Column(Date, nullable=True)
+
+    # Costos por tipo (summary.COST_TIPOS; el resto cae en "otros")
+    cost_tramite = Column(Float, nullable=False, default=0.0)
+    cost_compra = Column(Float, nullable=False, default=0.0)
+    cost_transporte = Column(Float, nullable=False, default=0.0)
+    cost_reparacion = Column(Float, nullable=False, default=0.0)
+    cost_otros = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+
+    # Venta y cobranza (NULL si no se vendió)
+    sale_price = Column(Float, nullable=True)
+    sold_at = Column(Date, nullable=True)
+    amount_paid = Column(Float, nullable=False, default=0.0)
+    balance = Column(Float, nullable=True)
+    margin = Column(Float, nullable=True)
+
+    main_photo_url = Column(String(512), nullable=True)
+
+    __table_args__ = (
+        Index("ix_vehicle_summary_status_received_date", "status", "received_date", "vehicle_id"),
+        Index("ix_vehicle_summary_status_margin", "status", "margin", "vehicle_id"),
+    )
+
+# =========================
+# Job
+# =========================
+
+class Job(Base):
+    """Trabajo en segundo plano (exports, imports, PDFs, rebuilds); ver jobs.py.
+
+    Las fechas se guardan en UTC sin zona, escritas siempre desde Python.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    params = Column(JSON, nullable=False)
+    status = Column(SAEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+
+    # Reintentos: no se toma antes de run_after (backoff tras un error)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False)
+
+    # Worker que lo tiene tomado (token por intento) y su último latido
+    locked_by = Column(String(128), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # Avance 0..1 (NULL si no se conoce el total) y texto libre
+    progress = Column(Float, nullable=True)
+    progress_message = Column(String(256), nullable=True)
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # Archivo resultado en JOBS_DIR/<id>/ (se descarga en /jobs/{id}/artifact)
+    artifact_name = Column(String(256), nullable=True)
+    artifact_media_type = Column(String(128), nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Próximo job a tomar: status = QUEUED, run_after <= ahora, por id
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+        Index("ix_jobs_status_finished_at", "status", "finished_at"),
+    )
+
+
+class VehicleEvent(Base):
+    """Cambio de un vehículo para la transmisión en vivo (ver live.py).
+
+    Se escribe en la misma transacción que el cambio; ``data`` es el JSON del
+    vehículo (campos de VehicleRead sin fotos) tal como quedó, o como estaba
+    si se borró.  Se purga a los LIVE_RETENTION_SECONDS.
+    """
+    __tablename__ = "vehicle_events"
+
+    id = Column(Integer, primary_key=True)
+    vehicle_id = Column(Integer, nullable=False)  # sin FK: el vehículo puede no existir más
+    type = Column(String(16), nullable=False)     # created, updated, status_changed, deleted
+    status = Column(String(16), nullable=True)
+    previous_status = Column(String(16), nullable=True)
+    brand = Column(String(64), nullable=True)
+    previous_brand = Column(String(64), nullable=True)  # para filtrar por marca si cambió
+    row_version = Column(VersionInteger, nullable=True)
+    data = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_vehicle_events_created_at", "created_at"),
+        # SQLite: ids nunca reutilizados aunque se purgue la tabla entera
+        {"sqlite_autoincrement": True},
+    )
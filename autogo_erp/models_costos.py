@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from datetime import date
+
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from autogo_erp.database import Base
 
@@ -19,6 +21,36 @@ class Costo(Base):
     referencia = Column(String(50), nullable=True)
 
     # Relación con Vehicle (tabla 'vehicles')
-    vehiculo_id = Column(Integer, ForeignKey("vehicles.id"), nullable=True)
+    vehiculo_id = Column(Integer, ForeignKey("vehicles.id"), nullable=True, index=True)
     vehiculo = relationship("Vehicle", back_populates="costos")
 
+    # Documento de trámite al que pertenece la línea (sólo tipo="tramite")
+    tramite_id = Column(Integer, ForeignKey("tramites.id", ondelete="CASCADE"), nullable=True, index=True)
+    tramite = relationship("Tramite", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_costos_tipo_referencia", "tipo", "referencia"),
+        Index("ix_costos_vehiculo_id_tipo", "vehiculo_id", "tipo"),
+    )
+
+class Tramite(Base):
+    """Encabezado de un trámite: agrupa sus líneas de Costo y guarda el total."""
+    __tablename__ = "tramites"
+
+    id = Column(Integer, primary_key=True)
+    referencia = Column(String(50), nullable=True, index=True)
+    # Si se borra el vehículo, se borra el trámite (y sus líneas, por tramite_id)
+    vehiculo_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=True)
+    fecha = Column(Date, nullable=False, default=date.today)
+
+    # Materializados al crear: el listado no suma líneas
+    total = Column(Float, nullable=False, default=0.0)
+    items_count = Column(Integer, nullable=False, default=0)
+
+    items = relationship("Costo", back_populates="tramite", order_by="Costo.id")
+
+    # Listado por fecha (keyset) y por vehículo
+    __table_args__ = (
+        Index("ix_tramites_fecha_id", "fecha", "id"),
+        Index("ix_tramites_vehiculo_id_fecha", "vehiculo_id", "fecha"),
+    )
@@ -0,0 +1,347 @@
+"""Generación de PDFs (ficha de vehículo, contrato de venta, factura) con reportlab.
+
+Los routers arman un dict con los datos de origen (sólo tipos JSON) y piden
+el documento con ``ensure_async``.  El PDF se guarda en
+``Config.DOCUMENTS_DIR`` con el SHA-256 de ``(TEMPLATE_VERSION, tipo, datos)``
+como nombre: el mismo documento con los mismos datos no se vuelve a
+renderizar, y cualquier cambio en la venta, los pagos o el vehículo produce
+otro hash.  Subir ``TEMPLATE_VERSION`` al cambiar el diseño.
+
+El render corre en un pool de procesos (``pool``) cuyo initializer registra
+las fuentes y carga el logo una vez por proceso; ``warm()`` lo arranca al
+levantar la app para que el primer PDF no pague ese costo.  Los lotes se
+reparten en tandas de ``CHUNK_SIZE`` documentos por tarea.  Igual que
+media.py, este módulo no importa la base de datos.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from autogo_erp import media
+from autogo_erp.config import Config
+
+TEMPLATE_VERSION = 1
+
+KINDS = ("sheet", "contract", "invoice")
+TITLES = {"sheet": "Ficha del vehículo", "contract": "Contrato de compraventa", "invoice": "Factura"}
+
+CHUNK_SIZE = 25
+
+PAGE_W, PAGE_H = letter
+MARGIN = 18 * mm
+
+
+class Job(NamedTuple):
+    kind: str
+    data: Dict[str, Any]
+    path: str
+
+
+def source_hash(kind: str, data: Dict[str, Any]) -> str:
+    raw = json.dumps({"v": TEMPLATE_VERSION, "kind": kind, "data": data}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def document_path(kind: str, digest: str) -> Path:
+    return Config.DOCUMENTS_DIR / kind / digest[:2] / f"{digest}.pdf"
+
+def job(kind: str, data: Dict[str, Any]) -> Job:
+    return Job(kind, data, str(document_path(kind, source_hash(kind, data))))
+
+
+# ===== Estado por proceso (initializer del pool) =====
+_fonts = ("Helvetica", "Helvetica-Bold")
+_logo: Optional[ImageReader] = None
+_ready = False
+
+def init_worker() -> None:
+    global _fonts, _logo, _ready
+    # Streams binarios: sin la codificación ASCII85 (en Python puro sin rl_accel)
+    rl_config.useA85 = 0
+    regular, bold = Config.PDF_FONT_PATH, Config.PDF_FONT_BOLD_PATH
+    if os.path.isfile(regular) and os.path.isfile(bold):
+        pdfmetrics.registerFont(TTFont("AutoGo", regular))
+        pdfmetrics.registerFont(TTFont("AutoGo-Bold", bold))
+        _fonts = ("AutoGo", "AutoGo-Bold")
+    # El logo chico (400 px) alcanza para 14 mm de alto; el grande se
+    # recomprimiría en cada PDF
+    if os.path.isfile(Config.LOGO_SMALL_PATH):
+        _logo = ImageReader(Config.LOGO_SMALL_PATH)
+        _logo.getSize()
+    _ready = True
+
+
+# ===== Dibujo =====
+def _money(value) -> str:
+    return "-" if value is None else f"$ {value:,.2f}"
+
+class _Writer:
+    """Cursor vertical sobre el canvas, con salto de página automático."""
+
+    def __init__(self, c: Canvas, title: str, number: str):
+        self.c, self.title, self.number = c, title, number
+        self.y = 0.0
+        self.page()
+
+    def page(self) -> None:
+        c = self.c
+        top = PAGE_H - MARGIN
+        if _logo is not None:
+            w, h = _logo.getSize()
+            c.drawImage(_logo, MARGIN, top - 14 * mm, width=14 * mm * w / h, height=14 * mm, mask="auto")
+        c.setFont(_fonts[1], 15)
+        c.drawRightString(PAGE_W - MARGIN, top - 6 * mm, self.title)
+        c.setFont(_fonts[0], 9)
+        c.drawRightString(PAGE_W - MARGIN, top - 11 * mm, self.number)
+        c.line(MARGIN, top - 17 * mm, PAGE_W - MARGIN, top - 17 * mm)
+        self.y = top - 25 * mm
+
+    def need(self, height: float) -> None:
+        if self.y - height < MARGIN:
+            self.c.showPage()
+            self.page()
+
+    def heading(self, text: str) -> None:
+        self.need(12 * mm)
+        self.y -= 3 * mm
+        self.c.setFont(_fonts[1], 11)
+        self.c.drawString(MARGIN, self.y, text)
+        self.y -= 6 * mm
+
+    def field(self, label: str, value) -> None:
+        self.need(6 * mm)
+        self.c.setFont(_fonts[1], 9)
+        self.c.drawString(MARGIN, self.y, label)
+        self.c.setFont(_fonts[0], 9)
+        self.c.drawString(MARGIN + 45 * mm, self.y, "-" if value in (None, "") else str(value))
+        self.y -= 5 * mm
+
+    def paragraph(self, text: str) -> None:
+        lines = simpleSplit(text, _fonts[0], 9, PAGE_W - 2 * MARGIN)
+        for line in lines:
+            self.need(5 * mm)
+            self.c.setFont(_fonts[0], 9)
+            self.c.drawString(MARGIN, self.y, line)
+            self.y -= 4.5 * mm
+        self.y -= 2 * mm
+
+    def table(self, columns: Sequence[str], rows: Sequence[Sequence], widths: Sequence[float]) -> None:
+        def draw(cells, font):
+            self.need(6 * mm)
+            self.c.setFont(font, 9)
+            x = MARGIN
+            for cell, w in zip(cells, widths):
+                self.c.drawString(x, self.y, "-" if cell is None else str(cell))
+                x += w * mm
+            self.y -= 5 * mm
+
+        draw(columns, _fonts[1])
+        for row in rows:
+            draw(row, _fonts[0])
+
+    def image(self, path: str, height: float) -> None:
+        reader = ImageReader(path)
+        w, h = reader.getSize()
+        self.need(height + 4 * mm)
+        self.c.drawImage(reader, MARGIN, self.y - height, width=height * w / h, height=height)
+        self.y -= height + 4 * mm
+
+    def signatures(self, *labels: str) -> None:
+        self.need(30 * mm)
+        self.y -= 20 * mm
+        width = (PAGE_W - 2 * MARGIN) / len(labels)
+        for i, label in enumerate(labels):
+            x = MARGIN + i * width
+            self.c.line(x + 5 * mm, self.y, x + width - 5 * mm, self.y)
+            self.c.setFont(_fonts[0], 8)
+            self.c.drawCentredString(x + width / 2, self.y - 4 * mm, label)
+        self.y -= 10 * mm
+
+def _vehicle_fields(w: _Writer, v: Dict[str, Any]) -> None:
+    w.field("Marca / modelo", f"{v['brand']} {v['model']} ({v['year']})")
+    w.field("VIN", v["vin"])
+    w.field("Placa", v.get("plate"))
+    w.field("Kilometraje", f"{v['odometer_km']:,.0f} km")
+
+def _payments(w: _Writer, payments: List[Dict[str, Any]]) -> None:
+    w.heading("Pagos")
+    if not payments:
+        w.paragraph("Sin pagos registrados.")
+        return
+    rows = [(p["paid_at"][:10], p.get("method"), p.get("reference"), _money(p["amount"])) for p in payments]
+    w.table(("Fecha", "Medio", "Referencia", "Monto"), rows, (30, 35, 60, 35))
+
+def _draw_sheet(w: _Writer, data: Dict[str, Any]) -> None:
+    v = data["vehicle"]
+    photo = data.get("photo_hash")
+    if photo:
+        path = media.variant_path(photo, "card", "jpg")
+        if path.is_file():
+            w.image(str(path), 60 * mm)
+    w.heading("Vehículo")
+    _vehicle_fields(w, v)
+    w.field("Estado", v["status"])
+    w.field("Recibido", v.get("received_date"))
+    w.field("Adquisición", v["acquisition_type"])
+    w.field("Vendedor", v["seller_name"])
+    w.field("Documento vendedor", v.get("seller_document"))
+    costs = data.get("costs") or {}
+    if costs:
+        w.heading("Costos")
+        for name, amount in costs.items():
+            w.field(name, _money(amount))
+    if data.get("sale_price") is not None:
+        w.heading("Venta")
+        w.field("Precio", _money(data["sale_price"]))
+        w.field("Margen", _money(data.get("margin")))
+
+def _draw_contract(w: _Writer, data: Dict[str, Any]) -> None:
+    s, v = data["sale"], data["vehicle"]
+    w.paragraph(
+        f"En la fecha {s['sale_date'][:10]}, AutoGo (en adelante, el VENDEDOR) vende al COMPRADOR "
+        f"el vehículo descrito a continuación, en el estado en que se encuentra y que el COMPRADOR "
+        f"declara conocer, por el precio total de {_money(s['sale_price'])}."
+    )
+    w.heading("Vehículo")
+    _vehicle_fields(w, v)
+    w.heading("Precio y forma de pago")
+    w.field("Precio total", _money(s["sale_price"]))
+    w.field("Pagado", _money(s["amount_paid"]))
+    w.field("Saldo", _money(s["sale_price"] - s["amount_paid"]))
+    _payments(w, data["payments"])
+    if s.get("notes"):
+        w.heading("Observaciones")
+        w.paragraph(s["notes"])
+    w.paragraph(
+        "El saldo pendiente, si lo hubiera, se abonará en los plazos acordados. La transferencia "
+        "de la titularidad se realizará una vez cancelado el precio total."
+    )
+    w.signatures("VENDEDOR (AutoGo)", "COMPRADOR")
+
+def _draw_invoice(w: _Writer, data: Dict[str, Any]) -> None:
+    s, v = data["sale"], data["vehicle"]
+    w.field("Fecha de venta", s["sale_date"][:10])
+    w.field("Estado", s["status"])
+    w.heading("Detalle")
+    w.table(
+        ("Descripción", "VIN", "Importe"),
+        [(f"{v['brand']} {v['model']} {v['year']}", v["vin"], _money(s["sale_price"]))],
+        (70, 60, 35),
+    )
+    _payments(w, data["payments"])
+    w.heading("Totales")
+    w.field("Total", _money(s["sale_price"]))
+    w.field("Pagado", _money(s["amount_paid"]))
+    w.field("Saldo", _money(s["sale_price"] - s["amount_paid"]))
+
+_DRAW = {"sheet": _draw_sheet, "contract": _draw_contract, "invoice": _draw_invoice}
+
+def _number(kind: str, data: Dict[str, Any]) -> str:
+    if kind == "sheet":
+        return f"Vehículo #{data['vehicle']['id']}"
+    return f"Venta #{data['sale']['id']}"
+
+def _draw(c: Canvas, kind: str, data: Dict[str, Any]) -> None:
+    _DRAW[kind](_Writer(c, TITLES[kind], _number(kind, data)), data)
+    c.showPage()
+
+
+# ===== Render (en el pool) =====
+def _atomic_canvas(path: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".pdf")
+    os.close(fd)
+    return tmp, Canvas(tmp, pagesize=letter, pageCompression=1)
+
+def _save(c: Canvas, tmp: str, path: str) -> None:
+    try:
+        c.save()
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def render_many(jobs: List[Job]) -> int:
+    """Escribe cada PDF que falte; devuelve cuántos se generaron."""
+    if not _ready:
+        init_worker()
+    done = 0
+    for j in jobs:
+        if os.path.exists(j.path):
+            continue
+        tmp, c = _atomic_canvas(j.path)
+        _draw(c, j.kind, j.data)
+        _save(c, tmp, j.path)
+        done += 1
+    return done
+
+def render_merged(jobs: List[Job], path: str) -> None:
+    """Un único PDF con todos los documentos de ``jobs`` (uno a continuación del otro)."""
+    if not _ready:
+        init_worker()
+    if os.path.exists(path):
+        return
+    tmp, c = _atomic_canvas(path)
+    for j in jobs:
+        _draw(c, j.kind, j.data)
+    _save(c, tmp, path)
+
+def merged_path(jobs: Sequence[Job]) -> str:
+    digest = hashlib.sha256("\n".join(Path(j.path).stem for j in jobs).encode()).hexdigest()
+    return str(document_path("merged", digest))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=Config.PDF_WORKERS or None,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+        )
+    return _pool
+
+def _noop() -> None:
+    return None
+
+def warm() -> None:
+    """Arranca los procesos del pool (fuentes y logo cargados) sin esperar."""
+    executor = pool()
+    for _ in range(Config.PDF_WORKERS or os.cpu_count() or 1):
+        executor.submit(_noop)
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+async def ensure_async(jobs: Sequence[Job]) -> None:
+    """Genera en el pool los PDFs de ``jobs`` que todavía no están en disco."""
+    loop = asyncio.get_running_loop()
+    missing = await loop.run_in_executor(None, lambda: [j for j in jobs if not os.path.exists(j.path)])
+    chunks = [missing[i:i + CHUNK_SIZE] for i in range(0, len(missing), CHUNK_SIZE)]
+    await asyncio.gather(*(loop.run_in_executor(pool(), render_many, chunk) for chunk in chunks))
+
+async def merged_async(jobs: Sequence[Job]) -> str:
+    path = merged_path(jobs)
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, os.path.exists, path):
+        await loop.run_in_executor(pool(), render_merged, list(jobs), path)
+    return path
@@ -0,0 +1,351 @@
+"""Perfilado de requests a pedido (``AUTOERP_PROFILING=1``).
+
+Un request se perfila si:
+
+* trae ``X-Autogo-Profile: <token>`` o ``?__profile=<token>`` con el token
+  de ``AUTOERP_PROFILE_TOKEN``;
+* le toca por muestreo (uno de cada ``AUTOERP_PROFILE_SAMPLE_EVERY``);
+* o, con ``AUTOERP_PROFILE_SLOW_MS``, si termina tardando más que eso (en
+  ese modo se muestrean todos y sólo se guardan los lentos).
+
+Mientras hay requests perfilados, un hilo toma cada ``PROFILE_INTERVAL_MS``
+la pila de los hilos que trabajan para cada uno: el del event loop cuando
+corre la tarea del request y los hilos del threadpool de anyio cuyo trabajo
+lleva el contexto del request (handlers y dependencias sync).  Es tiempo de
+reloj: las esperas (locks, conexión del pool, I/O) aparecen en la pila
+donde ocurren; si ningún hilo trabaja para el request, la muestra cuenta
+como ``[await]``.  Además se guardan las sentencias SQL con su duración.
+
+Cada perfil queda en ``PROFILE_DIR`` como ``<id>.json`` (datos y SQL) y
+``<id>.folded`` (pilas colapsadas, el formato de flamegraph.pl y
+speedscope); sólo se conservan los últimos ``PROFILE_MAX_FILES``.  Se
+listan y descargan en ``/admin/profiles``, con el mismo token (header o
+parámetro) que pide un perfil o con el de ``AUTOERP_ADMIN_TOKEN``; sin
+ninguno de los dos configurado esas rutas responden 403.  El parámetro ``__profile`` no se guarda en el perfil.
+
+Con el perfilado desactivado no se instala el middleware ni los eventos SQL.
+"""
+
+import asyncio
+import hmac
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+
+from autogo_erp.config import Config
+
+log = logging.getLogger(__name__)
+
+HEADER = b"x-autogo-profile"
+QUERY_PARAM = "__profile"
+MAX_STATEMENTS = 1000
+AWAIT_FRAME = "[await]"
+
+try:  # hilo de trabajo de anyio: su variable local ``context`` es la del request
+    from anyio._backends._asyncio import WorkerThread as _WorkerThread
+
+    _WORKER_RUN = _WorkerThread.run.__code__
+except (ImportError, AttributeError):
+    _WORKER_RUN = None
+
+_current: ContextVar[Optional["Profile"]] = ContextVar("autogo_profile", default=None)
+
+
+class Profile:
+    def __init__(self, scope, reason: str):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = _without_token(scope.get("query_string", b"").decode("latin-1"))
+        self.reason = reason
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.task = asyncio.current_task()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.statements: List[dict] = []
+        self.dropped_statements = 0
+        self.status = None
+        self.route = None
+        self.elapsed = None
+
+    def add_statement(self, statement: str, started: float, duration: float, executemany: bool) -> None:
+        if len(self.statements) >= MAX_STATEMENTS:
+            self.dropped_statements += 1
+            return
+        self.statements.append({
+            "offset_ms": round((started - self.t0) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            "executemany": executemany,
+            "statement": statement,
+        })
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def meta(self, profile_id: str) -> dict:
+        sql_ms = sum(s["duration_ms"] for s in self.statements)
+        return {
+            "id": profile_id,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "samples": self.samples,
+            "interval_ms": Config.PROFILE_INTERVAL_MS,
+            "statements": len(self.statements) + self.dropped_statements,
+            "sql_ms": round(sql_ms, 3),
+        }
+
+
+# ===== Muestreo de pilas =====
+def _label(code) -> str:
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    where = "/".join(parts[-2:])
+    return f"{code.co_name} ({where}:{code.co_firstlineno})".replace(";", ",")
+
+def _stack(frame, stop_code) -> List[str]:
+    labels = []
+    while frame is not None and frame.f_code is not stop_code:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+def _worker_owner(frame):
+    # Bajar hasta WorkerThread.run y leer el contexto del trabajo en curso
+    top = frame
+    while frame is not None:
+        if frame.f_code is _WORKER_RUN:
+            context = frame.f_locals.get("context")
+            return (context.get(_current) if context is not None else None), top
+        frame = frame.f_back
+    return None, top
+
+
+class Sampler:
+    """Hilo que toma pilas mientras haya al menos un request perfilado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[int, Profile] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._loop = None
+        self._loop_thread = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.get_running_loop()
+                self._loop_thread = threading.get_ident()
+            self._active[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="autogo-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.pop(id(profile), None)
+
+    def _run(self) -> None:
+        interval = Config.PROFILE_INTERVAL_MS / 1000.0
+        me = threading.get_ident()
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active.values())
+            try:
+                self._sample(active, me)
+            except Exception:  # nunca tirar abajo el hilo por una muestra
+                log.debug("profile sample failed", exc_info=True)
+
+    def _sample(self, active: List[Profile], me: int) -> None:
+        by_task = {p.task: p for p in active if p.task is not None}
+        seen = set()
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if ident == self._loop_thread:
+                owner = by_task.get(asyncio.current_task(self._loop))
+                if owner is None:
+                    continue
+                labels = ["loop"] + _stack(frame, None)
+            elif _WORKER_RUN is not None:
+                owner, top = _worker_owner(frame)
+                if owner is None:
+                    continue
+                labels = ["thread"] + _stack(top, _WORKER_RUN)
+            else:
+                continue
+            owner.stacks[";".join(labels)] += 1
+            owner.samples += 1
+            seen.add(id(owner))
+        for p in active:
+            if id(p) not in seen:
+                p.stacks[AWAIT_FRAME] += 1
+                p.samples += 1
+
+sampler = Sampler()
+
+
+# ===== SQL =====
+def instrument_engine(engine) -> None:
+    """Guarda las sentencias (sin parámetros) y su duración en el perfil en curso."""
+    if not Config.PROFILING_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current.get() is not None:
+            context._autogo_profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_autogo_profile_started", None)
+        profile = _current.get()
+        if started is not None and profile is not None:
+            profile.add_statement(statement, started, time.perf_counter() - started, executemany)
+
+
+# ===== Almacenamiento (anillo acotado en disco) =====
+_seq = itertools.count()
+
+def _directory() -> Path:
+    return Path(Config.PROFILE_DIR)
+
+def _valid_id(profile_id: str) -> bool:
+    return bool(profile_id) and all(c.isalnum() or c == "-" for c in profile_id)
+
+def store(profile: Profile) -> str:
+    directory = _directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.fromtimestamp(profile.started_at, timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    profile_id = f"{stamp}-{os.getpid()}-{next(_seq)}"
+    data = {**profile.meta(profile_id), "sql": profile.statements}
+    # .folded primero: un .json visible implica que el perfil está completo
+    (directory / f"{profile_id}.folded").write_text(profile.folded())
+    tmp = directory / f".{profile_id}.json.tmp"
+    tmp.write_text(json.dumps(data, ensure_ascii=False))
+    os.replace(tmp, directory / f"{profile_id}.json")
+    _trim(directory)
+    return profile_id
+
+def _trim(directory: Path) -> None:
+    metas = sorted(directory.glob("*.json"))
+    for old in metas[:max(0, len(metas) - Config.PROFILE_MAX_FILES)]:
+        for path in (old, old.with_suffix(".folded")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+def list_profiles(limit: int = 100) -> List[dict]:
+    out = []
+    for path in sorted(_directory().glob("*.json"), reverse=True)[:limit]:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        data.pop("sql", None)
+        out.append(data)
+    return out
+
+def profile_path(profile_id: str, suffix: str) -> Optional[Path]:
+    if not _valid_id(profile_id):
+        return None
+    path = _directory() / f"{profile_id}{suffix}"
+    return path if path.is_file() else None
+
+
+# ===== Middleware =====
+def _authorized(scope) -> bool:
+    token = Config.PROFILE_TOKEN
+    if not token:
+        return False
+    for name, value in scope["headers"]:
+        if name == HEADER:
+            return hmac.compare_digest(value.decode("latin-1"), token)
+    query = scope.get("query_string", b"")
+    if QUERY_PARAM.encode() in query:
+        for key, value in parse_qsl(query.decode("latin-1")):
+            if key == QUERY_PARAM:
+                return hmac.compare_digest(value, token)
+    return False
+
+def _without_token(query: str) -> str:
+    # El token no debe quedar en disco ni en /admin/profiles
+    if QUERY_PARAM not in query:
+        return query
+    return urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k != QUERY_PARAM])
+
+async def require_token(request: Request) -> None:
+    """Mismo token que para pedir un perfil (lo usa /admin/profiles)."""
+    if not _authorized(request.scope):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: decide si perfilar el request y guarda el resultado."""
+
+    def __init__(self, app):
+        self.app = app
+        self._counter = itertools.count(1)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profiles"):
+            return await self.app(scope, receive, send)
+
+        every = Config.PROFILE_SAMPLE_EVERY
+        if _authorized(scope):
+            reason = "requested"
+        elif every > 0 and next(self._counter) % every == 0:
+            reason = "sampled"
+        elif Config.PROFILE_SLOW_MS > 0:
+            reason = "slow"
+        else:
+            return await self.app(scope, receive, send)
+
+        profile = Profile(scope, reason)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        token = _current.set(profile)
+        sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.elapsed = time.perf_counter() - profile.t0
+            sampler.remove(profile)
+            _current.reset(token)
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            if reason != "slow" or profile.elapsed * 1000 >= Config.PROFILE_SLOW_MS:
+                asyncio.get_running_loop().run_in_executor(None, _store_logged, profile)
+
+def _store_logged(profile: Profile) -> None:
+    try:
+        store(profile)
+    except Exception:
+        log.exception("No se pudo guardar el perfil de %s %s", profile.method, profile.path)
@@ -0,0 +1,89 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+
+from autogo_erp import database, profiling, summary
+from autogo_erp.cache import html_rows, vehicle_cache
+from autogo_erp.config import Config
+
+ADMIN_HEADER = "X-Autogo-Admin"
+PROFILES_PREFIX = "/admin/profiles"
+
+async def require_admin_token(request: Request) -> None:
+    """Header X-Autogo-Admin con Config.ADMIN_TOKEN; /admin/profiles también
+    acepta el token del perfilador (header X-Autogo-Profile o ?__profile=)."""
+    token = Config.ADMIN_TOKEN
+    sent = request.headers.get(ADMIN_HEADER)
+    if token and sent is not None and hmac.compare_digest(sent.encode("latin-1"), token.encode()):
+        return
+    if request.url.path.startswith(PROFILES_PREFIX):
+        return await profiling.require_token(request)
+    raise HTTPException(status_code=403, detail="Admin token required")
+
+# Todas las rutas piden el token de AUTOERP_ADMIN_TOKEN (ver config.py);
+# sin token configurado responden 403
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+# ===== Caché de vehículos =====
+@router.get("/cache", summary="Contadores de la caché de vehículos")
+def cache_stats():
+    return {**vehicle_cache.stats(), "html_rows": html_rows.stats()}
+
+@router.post("/cache/clear", summary="Vaciar la caché de vehículos de este worker")
+def cache_clear():
+    vehicle_cache.clear()
+    html_rows.clear()
+    return {"ok": True}
+
+# ===== Pool de conexiones =====
+@router.get("/pool", summary="Estado del pool y esperas al pedir conexión")
+def pool_stats():
+    engines = {"primary": database.engine}
+    if database.read_engine is not database.engine:
+        engines["read"] = database.read_engine
+    if database.async_engine is not None:
+        engines["async"] = database.async_engine.sync_engine
+    if database.async_read_engine not in (None, database.async_engine):
+        engines["async_read"] = database.async_read_engine.sync_engine
+    waits = database.pool_stats.snapshot()
+    out = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        info = {"status": pool.status(), "waits": waits.get(name, {})}
+        for attr in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                info[attr] = fn()
+        out[name] = info
+    return out
+
+# ===== Perfiles de requests (AUTOERP_PROFILING=1, ver profiling.py) =====
+@router.get("/profiles", summary="Perfiles guardados (más recientes primero)")
+def profiles_list(limit: int = Query(100, ge=1, le=1000)):
+    return profiling.list_profiles(limit)
+
+@router.get("/profiles/{profile_id}.folded", summary="Pilas colapsadas (flamegraph.pl, speedscope)")
+def profile_folded(profile_id: str):
+    path = profiling.profile_path(profile_id, ".folded")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=path.name)
+
+@router.get("/profiles/{profile_id}", summary="Datos del perfil y sentencias SQL con su duración")
+def profile_detail(profile_id: str):
+    path = profiling.profile_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json")
+
+# ===== Proyección vehicle_summary =====
+@router.get("/summary/verify", summary="Comparar vehicle_summary con un cálculo fresco")
+def summary_verify():
+    with database.engine.connect() as conn:
+        return summary.verify(conn)
+
+@router.post("/summary/rebuild", summary="Regenerar vehicle_summary completa")
+def summary_rebuild():
+    with database.engine.begin() as conn:
+        return {"ok": True, "rows": summary.rebuild(conn)}
@@ -0,0 +1,75 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from autogo_erp import models
+from autogo_erp.database import session_for
+from autogo_erp.schemas import SummaryTotals, VehicleSummaryRead
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+# ===== Dependencia DB (GET -> pool de lectura) =====
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
+    try:
+        yield db
+    finally:
+        db.close()
+
+SummarySort = Literal["vehicle_id", "received_date", "-received_date", "margin", "-margin"]
+
+def _order_by(sort: str):
+    T = models.VehicleSummary
+    if sort == "vehicle_id":
+        return [T.vehicle_id]
+    col = getattr(T, sort.lstrip("-"))
+    if sort.startswith("-"):
+        return [col.desc().nulls_last(), T.vehicle_id.desc()]
+    return [col.asc().nulls_last(), T.vehicle_id]
+
+# Inventario con costos/margen: lee sólo vehicle_summary (sin JOIN ni agregados)
+@router.get("/vehicles", response_model=List[VehicleSummaryRead], summary="Costos, venta y margen por vehículo")
+def summary_vehicles(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort: SummarySort = "vehicle_id",
+    status: Optional[models.VehicleStatus] = None,
+    brand: Optional[str] = None,
+    margin_min: Optional[float] = None,
+    margin_max: Optional[float] = None,
+    with_balance: bool = Query(False, description="Sólo ventas con saldo pendiente"),
+    db: Session = Depends(get_db),
+):
+    T = models.VehicleSummary
+    stmt = select(T)
+    if status is not None:
+        stmt = stmt.where(T.status == status)
+    if brand:
+        stmt = stmt.where(T.brand == brand)
+    if margin_min is not None:
+        stmt = stmt.where(T.margin >= margin_min)
+    if margin_max is not None:
+        stmt = stmt.where(T.margin <= margin_max)
+    if with_balance:
+        stmt = stmt.where(T.balance > 0)
+    stmt = stmt.order_by(*_order_by(sort)).limit(limit).offset(offset)
+    return db.execute(stmt).scalars().all()
+
+# Totales por estado: un recorrido de vehicle_summary
+@router.get("/totals", response_model=List[SummaryTotals], summary="Totales de costos, ventas y margen por estado")
+def summary_totals(brand: Optional[str] = None, db: Session = Depends(get_db)):
+    T = models.VehicleSummary
+    stmt = select(
+        T.status,
+        func.count().label("vehicles"),
+        func.coalesce(func.sum(T.total_cost), 0.0).label("total_cost"),
+        func.coalesce(func.sum(T.sale_price), 0.0).label("sale_price"),
+        func.coalesce(func.sum(T.amount_paid), 0.0).label("amount_paid"),
+        func.coalesce(func.sum(T.balance), 0.0).label("balance"),
+        func.coalesce(func.sum(T.margin), 0.0).label("margin"),
+    ).group_by(T.status).order_by(T.status)
+    if brand:
+        stmt = stmt.where(T.brand == brand)
+    return [dict(r._mapping) for r in db.execute(stmt)]
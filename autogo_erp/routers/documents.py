@@ -0,0 +1,181 @@
+# Documentos PDF: ficha de vehículo, contrato de venta y factura (ver pdf.py).
+#
+# Los endpoints son async: la lectura de la base va a un thread y el render
+# al pool de procesos de pdf.py, así que un lote grande no ocupa los workers
+# de la API.  Los datos se leen en bloque (una consulta por tabla y tanda de
+# ids), nunca por documento.
+import os
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from autogo_erp import models, pdf, versioning
+from autogo_erp.config import Config
+from autogo_erp.database import session_for
+from autogo_erp.schemas import DocumentBatchRequest, DocumentKind
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+
+# Tamaño de las tandas de ids al leer (límite de parámetros del IN)
+LOAD_CHUNK = 900
+
+# ===== Dependencia DB (GET -> pool de lectura) =====
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# ===== Datos de origen (sólo tipos JSON: entran en el hash del documento) =====
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # enums
+        return value.value
+    return value
+
+def _row(obj, fields) -> Dict[str, Any]:
+    return {f: _plain(getattr(obj, f)) for f in fields}
+
+VEHICLE_FIELDS = (
+    "id", "vin", "plate", "brand", "model", "year", "odometer_km", "status",
+    "received_date", "acquisition_type", "seller_name", "seller_document",
+)
+SALE_FIELDS = ("id", "vehicle_id", "sale_date", "sale_price", "amount_paid", "status", "notes")
+PAYMENT_FIELDS = ("paid_at", "amount", "method", "reference")
+COST_LABELS = {
+    "cost_compra": "Compra", "cost_transporte": "Transporte", "cost_reparacion": "Reparación",
+    "cost_tramite": "Trámites", "cost_otros": "Otros", "total_cost": "Total",
+}
+
+def _chunks(ids: List[int]):
+    for i in range(0, len(ids), LOAD_CHUNK):
+        yield ids[i:i + LOAD_CHUNK]
+
+def load_sheets(db: Session, ids: List[int]) -> List[pdf.Job]:
+    V, T, P = models.Vehicle, models.VehicleSummary, models.Photo
+    jobs = []
+    for chunk in _chunks(ids):
+        vehicles = db.execute(select(V).where(V.id.in_(chunk)).order_by(V.id)).scalars().all()
+        summaries = {s.vehicle_id: s for s in db.execute(select(T).where(T.vehicle_id.in_(chunk))).scalars()}
+        photos = dict(db.execute(
+            select(P.vehicle_id, P.content_hash).where(P.vehicle_id.in_(chunk), P.is_main.is_(True))
+        ).all())
+        for v in vehicles:
+            s = summaries.get(v.id)
+            data = {
+                "vehicle": _row(v, VEHICLE_FIELDS),
+                "costs": {label: getattr(s, f) for f, label in COST_LABELS.items()} if s else {},
+                "sale_price": s.sale_price if s else None,
+                "margin": s.margin if s else None,
+                "photo_hash": photos.get(v.id),
+            }
+            jobs.append(pdf.job("sheet", data))
+    return jobs
+
+def load_sales(db: Session, kind: str, ids: List[int]) -> List[pdf.Job]:
+    S, V, P = models.Sale, models.Vehicle, models.Payment
+    jobs = []
+    for chunk in _chunks(ids):
+        rows = db.execute(select(S, V).join(V, V.id == S.vehicle_id).where(S.id.in_(chunk)).order_by(S.id)).all()
+        payments: Dict[int, List[dict]] = {}
+        for p in db.execute(select(P).where(P.sale_id.in_(chunk)).order_by(P.sale_id, P.paid_at, P.id)).scalars():
+            payments.setdefault(p.sale_id, []).append(_row(p, PAYMENT_FIELDS))
+        for sale, vehicle in rows:
+            data = {
+                "sale": _row(sale, SALE_FIELDS),
+                "vehicle": _row(vehicle, VEHICLE_FIELDS),
+                "payments": payments.get(sale.id, []),
+            }
+            jobs.append(pdf.job(kind, data))
+    return jobs
+
+def load_jobs(db: Session, kind: str, ids: List[int]) -> List[pdf.Job]:
+    return load_sheets(db, ids) if kind == "sheet" else load_sales(db, kind, ids)
+
+def batch_ids(db: Session, req: DocumentBatchRequest) -> List[int]:
+    if req.ids is not None:
+        return sorted(set(req.ids))
+    if req.date_from is None and req.date_to is None:
+        raise HTTPException(status_code=400, detail="Send ids or a date range")
+    # Rango [desde, hasta + 1 día): sale_date es DateTime, received_date Date
+    lo, hi = req.date_from, req.date_to and req.date_to + timedelta(days=1)
+    if req.kind == "sheet":
+        col, key = models.Vehicle.received_date, models.Vehicle.id
+    else:
+        col, key = models.Sale.sale_date, models.Sale.id
+        lo = lo and datetime.combine(lo, time.min)
+        hi = hi and datetime.combine(hi, time.min)
+    stmt = select(key)
+    if lo is not None:
+        stmt = stmt.where(col >= lo)
+    if hi is not None:
+        stmt = stmt.where(col < hi)
+    return list(db.execute(stmt.order_by(key).limit(Config.PDF_BATCH_MAX + 1)).scalars())
+
+def write_zip(out, jobs: List[pdf.Job], names: List[str]) -> None:
+    # PDFs ya comprimidos: ZIP_STORED (sin recomprimir)
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as zf:
+        for j, name in zip(jobs, names):
+            zf.write(j.path, name)
+
+def _zip(jobs: List[pdf.Job], names: List[str]) -> str:
+    tmp_dir = Config.DOCUMENTS_DIR / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=".zip")
+    with os.fdopen(fd, "wb") as out:
+        write_zip(out, jobs, names)
+    return path
+
+def file_name(kind: str, job: pdf.Job) -> str:
+    key = job.data["vehicle"]["id"] if kind == "sheet" else job.data["sale"]["id"]
+    return f"{kind}-{key}.pdf"
+
+# ===== Endpoints =====
+
+@router.post("/batch", summary="Lote de PDFs (ZIP o un único PDF)")
+async def batch_documents(req: DocumentBatchRequest, db: Session = Depends(get_db)):
+    ids = await run_in_threadpool(batch_ids, db, req)
+    if len(ids) > Config.PDF_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {Config.PDF_BATCH_MAX} documents per batch")
+    jobs = await run_in_threadpool(load_jobs, db, req.kind, ids)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="No documents match")
+
+    stamp = date.today().isoformat()
+    if req.format == "pdf":
+        path = await pdf.merged_async(jobs)
+        return FileResponse(path, media_type="application/pdf", filename=f"{req.kind}-{stamp}.pdf")
+
+    await pdf.ensure_async(jobs)
+    path = await run_in_threadpool(_zip, jobs, [file_name(req.kind, j) for j in jobs])
+    return FileResponse(
+        path, media_type="application/zip", filename=f"{req.kind}-{stamp}.zip",
+        background=BackgroundTask(os.unlink, path),
+    )
+
+@router.get("/{kind}/{doc_id:int}.pdf", summary="PDF de un vehículo (sheet) o de una venta (contract, invoice)")
+async def get_document(kind: DocumentKind, doc_id: int, request: Request, db: Session = Depends(get_db)):
+    jobs = await run_in_threadpool(load_jobs, db, kind, [doc_id])
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Vehicle not found" if kind == "sheet" else "Sale not found")
+    job = jobs[0]
+    # El hash de los datos ya identifica el contenido
+    tag = versioning.make_etag("doc", os.path.basename(job.path)[:-4])
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    await pdf.ensure_async(jobs)
+    return FileResponse(
+        job.path, media_type="application/pdf", filename=file_name(kind, job),
+        content_disposition_type="inline", headers={"ETag": tag, "Cache-Control": "no-cache"},
+    )
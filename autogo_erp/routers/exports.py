@@ -0,0 +1,225 @@
+import csv
+import enum
+import io
+import json
+import tempfile
+from datetime import date, datetime
+from typing import Callable, Iterator, Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+
+from autogo_erp import models
+from autogo_erp.database import ReadSessionLocal
+from autogo_erp.models_costos import Costo
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+# Filas por viaje al cursor del servidor y tamaño aproximado de cada trozo enviado
+YIELD_PER = 1000
+FLUSH_BYTES = 64 * 1024
+
+ExportFormat = Literal["csv", "ndjson", "xlsx"]
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# ===== Serialización por fila =====
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _iter_rows(stmt) -> Iterator[tuple]:
+    """Recorre ``stmt`` con un cursor del servidor, de a YIELD_PER filas.
+
+    La sesión es propia del generador: FastAPI cierra las dependencias antes
+    de empezar a enviar un StreamingResponse.  Se seleccionan columnas, no
+    entidades, así que no se llena ningún identity map.  Va al pool de
+    lectura: un export largo no ocupa conexiones del primario.
+    """
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": YIELD_PER})
+        for row in result:
+            yield tuple(_plain(v) for v in row)
+    finally:
+        db.close()
+
+def _csv_chunks(header, rows) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= FLUSH_BYTES:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+def _ndjson_chunks(header, rows) -> Iterator[bytes]:
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(header, row)), ensure_ascii=False, separators=(",", ":")) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    yield "".join(parts).encode()
+
+def _xlsx_chunks(header, rows) -> Iterator[bytes]:
+    # XLSX es un ZIP: openpyxl en modo write-only escribe las filas a disco a
+    # medida que llegan y el archivo se envía al terminar (memoria constante,
+    # aunque el primer byte sí espera a la última fila).
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(FLUSH_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+WRITERS = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "xlsx": _xlsx_chunks}
+
+def _export(stmt, fmt: str, filename: str) -> StreamingResponse:
+    header = [c.key for c in stmt.selected_columns]
+    body = WRITERS[fmt](header, _iter_rows(stmt))
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+def write_export(stmt, fmt: str, fh, on_rows: Optional[Callable[[int], None]] = None) -> int:
+    """Escribe el export completo en ``fh`` (jobs.py); devuelve las filas escritas.
+
+    ``on_rows(n)`` se llama cada YIELD_PER filas, para informar el avance.
+    """
+    header = [c.key for c in stmt.selected_columns]
+    count = 0
+
+    def rows():
+        nonlocal count
+        for row in _iter_rows(stmt):
+            yield row
+            count += 1
+            if on_rows is not None and count % YIELD_PER == 0:
+                on_rows(count)
+
+    for chunk in WRITERS[fmt](header, rows()):
+        fh.write(chunk)
+    return count
+
+def count_rows(stmt) -> int:
+    db = ReadSessionLocal()
+    try:
+        return db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar_one()
+    finally:
+        db.close()
+
+# ===== Subconsultas de totales (correlacionadas: usan los índices por FK y no
+# obligan a agregar toda la tabla antes de emitir la primera fila) =====
+def _costos_total(vehicle_id_col):
+    return (
+        select(func.coalesce(func.sum(Costo.monto), 0.0))
+        .where(Costo.vehiculo_id == vehicle_id_col)
+        .scalar_subquery()
+    )
+
+def _payments_total(vehicle_id_col):
+    return (
+        select(func.coalesce(func.sum(models.Payment.amount), 0.0))
+        .join(models.Sale, models.Sale.id == models.Payment.sale_id)
+        .where(models.Sale.vehicle_id == vehicle_id_col)
+        .scalar_subquery()
+    )
+
+# ===== Consultas de cada export (también las usa jobs.py) =====
+def vehicles_stmt(totals: bool = False, status: Optional[models.VehicleStatus] = None):
+    V = models.Vehicle
+    cols = [
+        V.id, V.vin, V.plate, V.brand, V.model, V.year, V.odometer_km,
+        V.acquisition_type, V.status, V.seller_name, V.seller_contact,
+        V.seller_document, V.received_date,
+    ]
+    if totals:
+        sales_total = (
+            select(func.coalesce(func.sum(models.Sale.sale_price), 0.0))
+            .where(models.Sale.vehicle_id == V.id)
+            .scalar_subquery()
+        )
+        cols += [
+            _costos_total(V.id).label("total_costos"),
+            sales_total.label("total_ventas"),
+            _payments_total(V.id).label("total_pagado"),
+        ]
+    stmt = select(*cols).order_by(V.id)
+    if status is not None:
+        stmt = stmt.where(V.status == status)
+    return stmt
+
+def costos_stmt(tipo: Optional[str] = None, vehicle: bool = False):
+    cols = [Costo.id, Costo.tipo, Costo.descripcion, Costo.monto, Costo.referencia, Costo.vehiculo_id]
+    stmt = select(*cols)
+    if vehicle:
+        stmt = stmt.add_columns(models.Vehicle.vin, models.Vehicle.plate).outerjoin(
+            models.Vehicle, models.Vehicle.id == Costo.vehiculo_id
+        )
+    if tipo:
+        stmt = stmt.where(Costo.tipo == tipo)
+    return stmt.order_by(Costo.id)
+
+def sales_stmt(payments: bool = False):
+    S = models.Sale
+    stmt = select(
+        S.id, S.vehicle_id, models.Vehicle.vin, S.sale_date, S.sale_price,
+        S.amount_paid, S.status, S.notes,
+    ).join(models.Vehicle, models.Vehicle.id == S.vehicle_id)
+    if payments:
+        P = models.Payment
+        stmt = stmt.add_columns(
+            select(func.coalesce(func.sum(P.amount), 0.0)).where(P.sale_id == S.id)
+            .scalar_subquery().label("total_pagos"),
+            select(func.count(P.id)).where(P.sale_id == S.id)
+            .scalar_subquery().label("cantidad_pagos"),
+        )
+    return stmt.order_by(S.id)
+
+# ===== Endpoints =====
+@router.get("/vehicles", summary="Exportar inventario (streaming)")
+def export_vehicles(
+    format: ExportFormat = "csv",
+    totals: bool = Query(False, description="Agregar totales de costos, ventas y pagos"),
+    status: Optional[models.VehicleStatus] = None,
+):
+    return _export(vehicles_stmt(totals, status), format, "vehicles")
+
+@router.get("/costos", summary="Exportar libro de costos (streaming)")
+def export_costos(
+    format: ExportFormat = "csv",
+    tipo: Optional[str] = None,
+    vehicle: bool = Query(False, description="Agregar VIN y placa del vehículo"),
+):
+    return _export(costos_stmt(tipo, vehicle), format, "costos")
+
+@router.get("/sales", summary="Exportar ventas (streaming)")
+def export_sales(
+    format: ExportFormat = "csv",
+    payments: bool = Query(False, description="Agregar total y cantidad de pagos registrados"),
+):
+    return _export(sales_stmt(payments), format, "sales")
@@ -0,0 +1,216 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from autogo_erp import live, models, summary, versioning
+from autogo_erp.cache import vehicle_cache
+from autogo_erp.database import SessionLocal
+from autogo_erp.schemas import VehicleCreate
+from autogo_erp.routers.vehicles import _norm_plate
+
+router = APIRouter(prefix="/imports", tags=["Imports"])
+
+# Filas por bloque: una consulta de duplicados + un INSERT masivo + un commit por bloque
+CHUNK_SIZE = 2000
+MAX_ERRORS = 1000
+
+# ===== Dependencia DB =====
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# ===== Lectores por fila (nunca cargan el archivo completo) =====
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def _iter_csv(fh) -> Iterator[Tuple[int, Dict]]:
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for n, row in enumerate(reader, start=2):  # fila 1 = encabezados
+            yield n, {(k or "").strip().lower(): _clean(v) for k, v in row.items()}
+    finally:
+        text.detach()
+
+# Campos de texto del schema: en XLSX la celda puede venir como número o fecha
+TEXT_FIELDS = {
+    name for name, field in VehicleCreate.model_fields.items() if field.annotation in (str, Optional[str])
+}
+
+def _xlsx_cell(key: str, value):
+    """Celda XLSX -> el valor que daría la misma columna en un CSV."""
+    if isinstance(value, datetime) and value == datetime.combine(value.date(), datetime.min.time()):
+        value = value.date()  # Excel no distingue fecha de fecha y hora
+    if key not in TEXT_FIELDS or value is None or isinstance(value, str):
+        return _clean(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # 123456, no "123456.0"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+def _iter_xlsx(fh) -> Iterator[Tuple[int, Dict]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip().lower() if h is not None else "" for h in next(rows, ())]
+        for n, values in enumerate(rows, start=2):
+            yield n, {k: _xlsx_cell(k, v) for k, v in zip(header, values) if k}
+    finally:
+        wb.close()
+
+def detect_format(filename: Optional[str], content_type: Optional[str], fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    name = (filename or "").lower()
+    if name.endswith(".xlsx") or "spreadsheetml" in (content_type or ""):
+        return "xlsx"
+    if name.endswith(".csv") or (content_type or "").startswith("text/"):
+        return "csv"
+    raise HTTPException(status_code=400, detail="Unsupported file type (use .csv or .xlsx)")
+
+def open_reader(fh, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    return _iter_xlsx(fh) if fmt == "xlsx" else _iter_csv(fh)
+
+# ===== Procesamiento por bloques =====
+def _flush_chunk(db: Session, chunk: List[Tuple[int, VehicleCreate]], retry: bool = True):
+    """Valida VIN/placa contra la base en una sola consulta e inserta el bloque.
+
+    Devuelve (insertados, conflictos) con conflictos como (fila, vin, mensaje).
+    Si otro proceso inserta el mismo VIN/placa entre la consulta y el INSERT,
+    el bloque se vuelve a validar una vez (ya con esas filas en la base).
+    """
+    V = models.Vehicle
+    if not chunk:
+        return 0, []
+
+    vins = {p.vin for _, p in chunk}
+    plates = {p.plate for _, p in chunk if p.plate}
+    cond = V.vin.in_(vins)
+    if plates:
+        cond = or_(cond, V.plate.in_(plates))
+    taken_vins, taken_plates = set(), set()
+    for vin, plate in db.execute(select(V.vin, V.plate).where(cond)):
+        taken_vins.add(vin)
+        if plate:
+            taken_plates.add(plate)
+
+    rows, conflicts = [], []
+    for n, p in chunk:
+        if p.vin in taken_vins:
+            conflicts.append((n, p.vin, f"VIN '{p.vin}' already exists"))
+        elif p.plate and p.plate in taken_plates:
+            conflicts.append((n, p.vin, f"Plate '{p.plate}' already exists"))
+        else:
+            rows.append(p.model_dump())
+
+    if rows:
+        row_version = versioning.bump(db, "vehicles")
+        for r in rows:
+            r["row_version"] = row_version
+        try:
+            db.execute(insert(V), rows)
+            new_ids = db.execute(select(V.id).where(V.vin.in_([r["vin"] for r in rows]))).scalars().all()
+            summary.refresh(db, new_ids)
+            live.record(db, live.CREATED, new_ids)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if retry:
+                return _flush_chunk(db, chunk, retry=False)
+            # Sigue en carrera: el bloque entero queda como error, sin abortar el resto
+            msg = "VIN or plate already exists (concurrent insert)"
+            return 0, [(n, p.vin, msg) for n, p in chunk]
+        vehicle_cache.invalidate(db=db)
+    return len(rows), conflicts
+
+def run_import(
+    db: Session,
+    reader: Iterator[Tuple[int, Dict]],
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Valida e inserta las filas de ``reader`` por bloques; devuelve el resumen.
+
+    ``on_chunk(filas, insertadas)`` se llama tras cada bloque (avance de jobs.py).
+    """
+    total = inserted = failed = 0
+    errors: List[dict] = []
+    chunk: List[Tuple[int, VehicleCreate]] = []
+    # Duplicados dentro del mismo bloque (los de bloques previos ya están en la base)
+    chunk_vins, chunk_plates = set(), set()
+
+    def report(n, vin, msgs):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_ERRORS:
+            errors.append({"row": n, "vin": vin, "errors": msgs})
+
+    def flush(rows):
+        count, conflicts = _flush_chunk(db, rows)
+        for n, vin, msg in conflicts:
+            report(n, vin, [msg])
+        return count
+
+    for n, raw in reader:
+        if not any(v is not None for v in raw.values()):
+            continue
+        total += 1
+        try:
+            payload = VehicleCreate.model_validate(raw)
+        except ValidationError as exc:
+            msgs = [f"{'.'.join(str(x) for x in e['loc'])}: {e['msg']}" for e in exc.errors()]
+            report(n, raw.get("vin"), msgs)
+            continue
+
+        payload.plate = _norm_plate(payload.plate)
+        if payload.vin in chunk_vins:
+            report(n, payload.vin, [f"VIN '{payload.vin}' duplicated in file"])
+            continue
+        if payload.plate and payload.plate in chunk_plates:
+            report(n, payload.vin, [f"Plate '{payload.plate}' duplicated in file"])
+            continue
+        chunk_vins.add(payload.vin)
+        if payload.plate:
+            chunk_plates.add(payload.plate)
+        chunk.append((n, payload))
+
+        if len(chunk) >= CHUNK_SIZE:
+            inserted += flush(chunk)
+            chunk, chunk_vins, chunk_plates = [], set(), set()
+            if on_chunk is not None:
+                on_chunk(total, inserted)
+    inserted += flush(chunk)
+    errors.sort(key=lambda e: e["row"])
+
+    return {
+        "ok": failed == 0,
+        "total_rows": total,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
+
+@router.post("/vehicles", summary="Importar vehículos desde CSV o XLSX")
+def import_vehicles(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "xlsx"]] = Query(None, description="Por defecto se deduce del nombre"),
+    db: Session = Depends(get_db),
+):
+    fmt = detect_format(file.filename, file.content_type, format)
+    return run_import(db, open_reader(file.file, fmt))
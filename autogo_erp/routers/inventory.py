@@ -0,0 +1,129 @@
+# Inventario en HTML (GET /inventory) sobre el modelo Vehicle.
+#
+# * La página se genera con ``Template.generate`` y se envía en streaming:
+#   todo lo que va hasta ``<tbody>`` se manda apenas está listo, antes de
+#   leer la primera fila; después, en trozos de ~FLUSH_BYTES.  Nunca se arma
+#   el HTML completo en memoria.
+# * Cada fila se cachea ya renderizada en ``cache.html_rows`` por
+#   (id, row_version): una fila sin cambios no se vuelve a renderizar, ni se
+#   lee el vehículo completo; sólo se consulta (id, row_version).
+# * El ETag sale de la versión de la tabla ``vehicles`` y los filtros, como
+#   en el listado JSON: sin cambios, 304 sin tocar las filas.
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from markupsafe import Markup
+from sqlalchemy import select
+
+from autogo_erp import media, models, versioning
+from autogo_erp.cache import html_rows
+from autogo_erp.database import ReadSessionLocal, SessionLocal, session_for, uses_primary
+from autogo_erp.templating import templates
+
+router = APIRouter(tags=["Inventory"])
+
+# Filas por tanda (keyset por id) y tamaño aproximado de cada trozo enviado
+BATCH_SIZE = 500
+FLUSH_BYTES = 32 * 1024
+
+HEAD_MARK = "<tbody>"
+
+# ===== Filas =====
+def _render_rows(db, ids: List[int]) -> Dict[int, Markup]:
+    """Renderiza (y cachea) las filas de ``ids``: vehículos y foto principal en una consulta."""
+    V, P = models.Vehicle, models.Photo
+    row_template = templates.get_template("inventory_row.html")
+    stmt = (
+        select(V, P.content_hash)
+        .outerjoin(P, (P.vehicle_id == V.id) & P.is_main.is_(True))
+        .where(V.id.in_(ids))
+    )
+    rendered = {}
+    for v, digest in db.execute(stmt):
+        thumb = media.variant_url(digest, "thumb", "webp") if digest else None
+        html = Markup(row_template.render(v=v, thumb=thumb))
+        html_rows.set(v.id, (v.row_version, html))
+        rendered[v.id] = html
+    # Las entidades ya no hacen falta: no acumular el identity map entre tandas
+    db.expunge_all()
+    return rendered
+
+def _rows(factory, filters) -> Iterator[Markup]:
+    # Sesión propia del generador (FastAPI cierra las dependencias antes de
+    # enviar un StreamingResponse), como en exports.py
+    V = models.Vehicle
+    db = factory()
+    try:
+        last_id = 0
+        while True:
+            keys = db.execute(
+                select(V.id, V.row_version).where(V.id > last_id, *filters).order_by(V.id).limit(BATCH_SIZE)
+            ).all()
+            if not keys:
+                break
+            last_id = keys[-1][0]
+            cached = {}
+            for vid, version in keys:
+                entry = html_rows.get(vid, None)
+                if entry is not None and entry[0] == version:
+                    cached[vid] = entry[1]
+            missing = [vid for vid, _ in keys if vid not in cached]
+            if missing:
+                cached.update(_render_rows(db, missing))
+            for vid, _ in keys:
+                html = cached.get(vid)
+                if html is not None:  # borrado entre las dos consultas
+                    yield html
+    finally:
+        db.close()
+
+def _chunks(parts: Iterator[str]) -> Iterator[bytes]:
+    buf, size, head_sent = [], 0, False
+    for part in parts:
+        buf.append(part)
+        size += len(part)
+        if (not head_sent and HEAD_MARK in part) or size >= FLUSH_BYTES:
+            head_sent = True
+            yield "".join(buf).encode()
+            buf, size = [], 0
+    yield "".join(buf).encode()
+
+# ===== Endpoint =====
+@router.get("/inventory", response_class=StreamingResponse, summary="Inventario (HTML en streaming)")
+def inventory(
+    request: Request,
+    response: Response,
+    status: Optional[models.VehicleStatus] = None,
+    brand: Optional[str] = Query(None, max_length=64),
+):
+    db = session_for(request, response)
+    try:
+        version = versioning.current(db, "vehicles")
+    finally:
+        db.close()
+    etag = versioning.make_etag("inventory", version, versioning.query_fingerprint(request))
+    cached = versioning.not_modified(request, etag)
+    if cached:
+        return cached
+
+    V = models.Vehicle
+    filters = []
+    if status is not None:
+        filters.append(V.status == status)
+    if brand:
+        filters.append(V.brand == brand)
+    factory = SessionLocal if uses_primary(request) else ReadSessionLocal
+
+    page = templates.get_template("inventory.html").generate(
+        request=request,
+        rows=_rows(factory, filters),
+        statuses=list(models.VehicleStatus),
+        status=status,
+        brand=brand,
+    )
+    return StreamingResponse(
+        _chunks(page),
+        media_type="text/html; charset=utf-8",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,93 @@
+# Trabajos en segundo plano (ver jobs.py).
+#
+# POST /jobs encola y responde 202 con el job; GET /jobs/{id} devuelve estado,
+# avance y resultado, y el archivo que haya dejado el job se descarga de
+# GET /jobs/{id}/artifact.  Para un import se sube primero el archivo a
+# POST /jobs/uploads y se pasa el upload_id en los parámetros.  Nada de esto
+# ocupa la API más que unas escrituras: el trabajo lo hacen los workers
+# (``python -m autogo_erp.jobs worker``).
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from autogo_erp import jobs, media, models
+from autogo_erp.database import session_for
+from autogo_erp.routers.imports import detect_format
+from autogo_erp.schemas import JobCreate, JobRead, JobUpload
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# ===== Dependencia DB (GET -> pool de lectura, escrituras -> primario) =====
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _get_job(db: Session, job_id: int) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# ===== Endpoints =====
+@router.post("/uploads", response_model=JobUpload, status_code=201, summary="Subir un CSV o XLSX para un job de import")
+def upload_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "xlsx"]] = Query(None, description="Por defecto se deduce del nombre"),
+):
+    fmt = detect_format(file.filename, file.content_type, format)
+    try:
+        upload_id, size = jobs.save_upload(file.file, fmt)
+    except media.UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    return JobUpload(upload_id=upload_id, size=size)
+
+@router.post("", response_model=JobRead, status_code=202, summary="Encolar un job")
+def create_job(req: JobCreate, response: Response, db: Session = Depends(get_db)):
+    if req.kind == "import_vehicles" and jobs.upload_path(str(req.params.get("upload_id", ""))) is None:
+        raise HTTPException(status_code=400, detail="Unknown upload_id (upload the file to /jobs/uploads)")
+    try:
+        job = jobs.enqueue(db, req.kind, req.params, req.max_attempts)
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False)
+        raise RequestValidationError([{**e, "loc": ("body", "params", *e["loc"])} for e in errors])
+    db.commit()
+    db.refresh(job)
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+@router.get("", response_model=List[JobRead], summary="Jobs recientes (más nuevos primero)")
+def list_jobs(
+    status: Optional[models.JobStatus] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    J = models.Job
+    stmt = select(J).order_by(J.id.desc()).limit(limit)
+    if status is not None:
+        stmt = stmt.where(J.status == status)
+    if kind:
+        stmt = stmt.where(J.kind == kind)
+    return db.execute(stmt).scalars().all()
+
+@router.get("/{job_id}", response_model=JobRead, summary="Estado, avance y resultado de un job")
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    return _get_job(db, job_id)
+
+@router.get("/{job_id}/artifact", summary="Descargar el archivo resultado de un job")
+def get_artifact(job_id: int, db: Session = Depends(get_db)):
+    job = _get_job(db, job_id)
+    if job.status not in jobs.FINISHED:
+        raise HTTPException(status_code=409, detail="Job not finished")
+    path = jobs.artifact_path(job)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Job has no artifact")
+    return FileResponse(path, media_type=job.artifact_media_type, filename=job.artifact_name)
@@ -0,0 +1,103 @@
+# Cambios de vehículos en vivo por WebSocket (ver live.py).
+#
+# ws://.../vehicles/live?status=AVAILABLE&brand=Toyota&since=<last_id>
+#
+# Mensajes del servidor (JSON):
+#   {"type": "hello", "last_id": N}        al conectar
+#   {"type": "events", "last_id": N, "events": [...]}
+#       cada evento: {"id", "type": created|updated|status_changed|deleted,
+#                     "vehicle_id", "row_version", ["previous_status"], "vehicle"}
+#   {"type": "reset", "last_id": N}        lo pedido con since ya no está: volver a listar
+#
+# Uso típico: conectar, pedir GET /vehicles/ una vez y aplicar los eventos;
+# al reconectar pasar el último last_id recibido en ``since``.  Con filtros
+# llegan también los cambios que sacan un vehículo del filtro (p. ej.
+# AVAILABLE -> SOLD con status=AVAILABLE).
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, Query, WebSocket
+from starlette.concurrency import run_in_threadpool
+
+from autogo_erp import fastjson, live, models
+from autogo_erp.config import Config
+
+router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
+
+# Códigos de cierre
+TRY_AGAIN_LATER = 1013
+POLICY_VIOLATION = 1008
+
+def _message(**content) -> str:
+    return fastjson.dumps(content).decode()
+
+async def _close(websocket: WebSocket, reason: str) -> None:
+    # El cliente que no lee tampoco contesta el cierre: no esperarlo para siempre
+    try:
+        await asyncio.wait_for(websocket.close(code=TRY_AGAIN_LATER, reason=reason), 1.0)
+    except Exception:
+        pass
+
+async def _send_events(websocket: WebSocket, sub: live.Subscriber) -> None:
+    while True:
+        await sub.ready.wait()
+        # Ventana corta para juntar más cambios del mismo vehículo en un envío
+        await asyncio.sleep(Config.LIVE_COALESCE_MS / 1000.0)
+        if sub.overflow:
+            live.DROPPED.inc(("backlog",))
+            return await _close(websocket, "Slow consumer")
+        events, last_id = sub.take()
+        if not events:
+            continue
+        frame = '{"type":"events","last_id":%d,"events":[%s]}' % (last_id, ",".join(e.json() for e in events))
+        try:
+            # send espera si el buffer de salida está lleno (cliente lento)
+            await asyncio.wait_for(websocket.send_text(frame), Config.LIVE_SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            live.DROPPED.inc(("send_timeout",))
+            return await _close(websocket, "Slow consumer")
+        live.SENT.inc(amount=len(events))
+
+async def _receive_until_closed(websocket: WebSocket) -> None:
+    # Lo que mande el cliente se ignora; sólo interesa enterarse del cierre
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@router.websocket("/live")
+async def vehicles_live(
+    websocket: WebSocket,
+    status: Optional[List[models.VehicleStatus]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    since: Optional[int] = Query(None, ge=0, description="Último last_id recibido (reconexión)"),
+):
+    if not Config.LIVE_ENABLED:
+        return await websocket.close(code=POLICY_VIOLATION, reason="Live updates disabled")
+    if live.broker.connections >= Config.LIVE_MAX_CONNECTIONS:
+        return await websocket.close(code=TRY_AGAIN_LATER, reason="Too many connections")
+
+    await websocket.accept()
+    sub = live.Subscriber(status or (), brand or ())
+    # Desde acá el broker le pasa a sub todo evento con id > position
+    position = live.broker.subscribe(sub)
+    tasks = []
+    try:
+        await websocket.send_text(_message(type="hello", last_id=position))
+        if since is not None and since < position:
+            backlog = await run_in_threadpool(live.broker.backlog, since, position)
+            if backlog is None:
+                await websocket.send_text(_message(type="reset", last_id=position))
+            else:
+                sub.prepend(backlog)
+
+        tasks = [asyncio.ensure_future(_send_events(websocket, sub)),
+                 asyncio.ensure_future(_receive_until_closed(websocket))]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        live.broker.unsubscribe(sub)
+        for task in tasks:
+            if task.done() and not task.cancelled():
+                task.exception()  # p. ej. el envío falló porque el cliente ya cortó
+            else:
+                task.cancel()
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
-from autogo_erp.database import SessionLocal
-from ..models_costos import Costo  # import relativo (funciona en Linux/Production)
+from autogo_erp import fastjson, summary, versioning
+from autogo_erp.database import session_for
+from ..models_costos import Costo, Tramite  # import relativo (funciona en Linux/Production)
 
 router = APIRouter(prefix="/tramites", tags=["Trámites"])
 
-# --- Dependencia DB ---
-def get_db():
-    db = SessionLocal()
+# --- Dependencia DB (GET -> pool de lectura, escrituras -> primario) ---
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
     try:
         yield db
     finally:
@@ -23,6 +28,8 @@ class TramiteItemIn(BaseModel):
 
 class TramiteIn(BaseModel):
     referencia: Optional[str] = Field(None, max_length=50)  # opcional: vincular con vehículo, nro, etc.
+    vehiculo_id: Optional[int] = None
+    fecha: Optional[date] = None  # por defecto, hoy
     items: List[TramiteItemIn]
 
 class TramiteOut(BaseModel):
@@ -31,44 +38,247 @@ class TramiteOut(BaseModel):
     descripcion: str
     monto: float
     referencia: Optional[str]
+    tramite_id: Optional[int] = None
+    vehiculo_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class TramiteDocOut(BaseModel):
+    id: int
+    referencia: Optional[str]
+    vehiculo_id: Optional[int]
+    fecha: date
+    total: float
+    items_count: int
 
     class Config:
         from_attributes = True
 
+class TramiteDocDetail(TramiteDocOut):
+    items: List[TramiteOut] = []
+
+# --- Helpers ---
+
+def tramite_rows(payload: TramiteIn, tramite_id: int) -> List[dict]:
+    return [
+        {
+            "tipo": "tramite",
+            "descripcion": item.descripcion,
+            "monto": item.monto,
+            "referencia": payload.referencia,
+            "vehiculo_id": payload.vehiculo_id,
+            "tramite_id": tramite_id,
+        }
+        for item in payload.items
+    ]
+
+def items_insert(dialect_name: str):
+    """INSERT de líneas con RETURNING id, y si hay que ordenar los ids devueltos."""
+    if dialect_name == "sqlite":
+        # SQLite no garantiza el orden de RETURNING y SQLAlchemy haría un INSERT
+        # por fila para ordenarlo; dentro de un INSERT multi-fila los rowid se
+        # asignan en el orden de VALUES, así que alcanza con ordenar los ids.
+        return insert(Costo).returning(Costo.id), True
+    return insert(Costo).returning(Costo.id, sort_by_parameter_order=True), False
+
+def header_values(payload: TramiteIn) -> dict:
+    return {
+        "referencia": payload.referencia,
+        "vehiculo_id": payload.vehiculo_id,
+        "fecha": payload.fecha or date.today(),
+        "total": sum(item.monto for item in payload.items),
+        "items_count": len(payload.items),
+    }
+
+def _doc_cursor(t: Tramite) -> str:
+    return f"{t.fecha.isoformat()}_{t.id}"
+
+def _parse_doc_cursor(cursor: str):
+    try:
+        fecha, last_id = cursor.split("_")
+        return date.fromisoformat(fecha), int(last_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+class ItemListParams(BaseModel):
+    """Query params de GET /tramites/ (compartidos con el router async; ver ListParams en vehicles.py)."""
+
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[int] = Field(None, description="Valor de X-Next-Cursor de la página anterior")
+    referencia: Optional[str] = None
+    vehiculo_id: Optional[int] = None
+    tramite_id: Optional[int] = None
+    monto_min: Optional[float] = None
+    monto_max: Optional[float] = None
+
+# Camino rápido (AUTOERP_FAST_JSON=1, ver fastjson.py): columnas de cada schema
+ITEM_JSON = fastjson.RowEncoder(TramiteOut)
+DOC_JSON = fastjson.RowEncoder(TramiteDocOut)
+
+def items_stmt(p: ItemListParams, fast: bool = False):
+    """SELECT de una página de líneas (limit + 1 para saber si hay siguiente)."""
+    # Filtros sobre ix_costos_tipo_referencia / ix_costos_vehiculo_id_tipo
+    stmt = select(*ITEM_JSON.columns(Costo)) if fast else select(Costo)
+    stmt = stmt.where(Costo.tipo == "tramite")
+    if p.referencia is not None:
+        stmt = stmt.where(Costo.referencia == p.referencia)
+    if p.vehiculo_id is not None:
+        stmt = stmt.where(Costo.vehiculo_id == p.vehiculo_id)
+    if p.tramite_id is not None:
+        stmt = stmt.where(Costo.tramite_id == p.tramite_id)
+    if p.monto_min is not None:
+        stmt = stmt.where(Costo.monto >= p.monto_min)
+    if p.monto_max is not None:
+        stmt = stmt.where(Costo.monto <= p.monto_max)
+    if p.cursor is not None:
+        stmt = stmt.where(Costo.id > p.cursor)
+    return stmt.order_by(Costo.id).limit(p.limit + 1)
+
+def items_page(rows, p: ItemListParams, response: Response):
+    if len(rows) > p.limit:
+        rows = rows[:p.limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
+def list_etag(request: Request, name: str, version: int) -> str:
+    # ETag = versión de costos + filtros
+    return versioning.make_etag(name, version, versioning.query_fingerprint(request))
+
 # --- Endpoints ---
 
+# Líneas de trámite (paginado por id; el cursor de la página siguiente va en X-Next-Cursor)
 @router.get("/", response_model=List[TramiteOut], summary="Listar trámites (costos tipo=tramite)")
-def listar_tramites(db: Session = Depends(get_db)):
-    return db.query(Costo).filter(Costo.tipo == "tramite").all()
+def listar_tramites(
+    request: Request,
+    response: Response,
+    p: ItemListParams = Query(),
+    db: Session = Depends(get_db),
+):
+    tag = list_etag(request, "tramites", versioning.current(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+    if fastjson.ENABLED:
+        rows = items_page(db.execute(items_stmt(p, fast=True)).all(), p, response)
+        return fastjson.respond(ITEM_JSON.encode_all(rows), response)
+    return items_page(db.execute(items_stmt(p)).scalars().all(), p, response)
 
 @router.post("/", summary="Crear trámite con items (tipo=tramite)")
 def crear_tramite(payload: TramiteIn, db: Session = Depends(get_db)):
-    total = 0.0
-    creados = []
-    for item in payload.items:
-        c = Costo(
-            tipo="tramite",
-            descripcion=item.descripcion,
-            monto=item.monto,
-            referencia=payload.referencia
-        )
-        db.add(c)
-        creados.append(c)
-        total += item.monto
-    db.commit()
-    for c in creados:
-        db.refresh(c)
+    header = header_values(payload)
+    try:
+        # Encabezado + líneas: dos INSERT con RETURNING, sin refresh por ítem
+        tramite_id = db.execute(insert(Tramite).values(**header).returning(Tramite.id)).scalar_one()
+        ids = []
+        if payload.items:
+            stmt, sort_ids = items_insert(db.get_bind().dialect.name)
+            ids = list(db.execute(stmt, tramite_rows(payload, tramite_id)).scalars())
+            if sort_ids:
+                ids.sort()
+        versioning.bump(db, "costos")
+        summary.refresh(db, [payload.vehiculo_id])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Vehículo no encontrado")
     return {
         "ok": True,
+        "id": tramite_id,
         "referencia": payload.referencia,
-        "total": total,
-        "items_creados": [c.id for c in creados]
+        "fecha": header["fecha"],
+        "total": header["total"],
+        "items_creados": ids,
     }
 
+# Documentos (encabezados); van antes de "/{id}" para que "documentos" no se lea como id
+@router.get("/documentos", response_model=List[TramiteDocOut], summary="Listar trámites (encabezados)")
+def listar_documentos(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    referencia: Optional[str] = None,
+    vehiculo_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    total_min: Optional[float] = None,
+    total_max: Optional[float] = None,
+    db: Session = Depends(get_db),
+):
+    tag = list_etag(request, "tramites-doc", versioning.current(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+
+    # Más recientes primero: ORDER BY fecha DESC, id DESC (ix_tramites_fecha_id)
+    T = Tramite
+    stmt = select(*DOC_JSON.columns(T)) if fastjson.ENABLED else select(T)
+    if referencia is not None:
+        stmt = stmt.where(T.referencia == referencia)
+    if vehiculo_id is not None:
+        stmt = stmt.where(T.vehiculo_id == vehiculo_id)
+    if fecha_desde is not None:
+        stmt = stmt.where(T.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        stmt = stmt.where(T.fecha <= fecha_hasta)
+    if total_min is not None:
+        stmt = stmt.where(T.total >= total_min)
+    if total_max is not None:
+        stmt = stmt.where(T.total <= total_max)
+    if cursor:
+        fecha, last_id = _parse_doc_cursor(cursor)
+        stmt = stmt.where(or_(T.fecha < fecha, and_(T.fecha == fecha, T.id < last_id)))
+
+    result = db.execute(stmt.order_by(T.fecha.desc(), T.id.desc()).limit(limit + 1))
+    rows = result.all() if fastjson.ENABLED else result.scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _doc_cursor(rows[-1])
+    if fastjson.ENABLED:
+        return fastjson.respond(DOC_JSON.encode_all(rows), response)
+    return rows
+
+@router.get("/documentos/{tramite_id}", response_model=TramiteDocDetail, summary="Trámite con sus líneas")
+def obtener_documento(tramite_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    tag = versioning.make_etag("tramite-doc", tramite_id, versioning.current(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    if fastjson.ENABLED:
+        # Encabezado y líneas como filas, en dos consultas por clave
+        head = db.execute(select(*DOC_JSON.columns(Tramite)).where(Tramite.id == tramite_id)).first()
+        if head is None:
+            raise HTTPException(status_code=404, detail="Trámite no encontrado")
+        items = db.execute(
+            select(*ITEM_JSON.columns(Costo)).where(Costo.tramite_id == tramite_id).order_by(Costo.id)
+        ).all()
+        versioning.set_etag(response, tag)
+        return fastjson.respond({**DOC_JSON.encode(head), "items": ITEM_JSON.encode_all(items)}, response)
+    # Una consulta: encabezado (total materializado) + líneas por JOIN
+    stmt = select(Tramite).options(joinedload(Tramite.items)).where(Tramite.id == tramite_id)
+    t = db.execute(stmt).unique().scalar_one_or_none()
+    if not t:
+        raise HTTPException(status_code=404, detail="Trámite no encontrado")
+    versioning.set_etag(response, tag)
+    return t
+
 @router.get("/{id}", response_model=TramiteOut, summary="Obtener un ítem de trámite por id")
-def obtener_tramite_item(id: int, db: Session = Depends(get_db)):
+def obtener_tramite_item(id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    tag = versioning.make_etag("tramite", id, versioning.current(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    if fastjson.ENABLED:
+        row = db.execute(select(*ITEM_JSON.columns(Costo)).where(Costo.id == id, Costo.tipo == "tramite")).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Trámite no encontrado")
+        versioning.set_etag(response, tag)
+        return fastjson.respond(ITEM_JSON.encode(row), response)
     c = db.query(Costo).filter(Costo.id == id, Costo.tipo == "tramite").first()
     if not c:
         raise HTTPException(status_code=404, detail="Trámite no encontrado")
+    versioning.set_etag(response, tag)
     return c
-
@@ -0,0 +1,77 @@
+# Versión async de routers/tramites.py (AUTOERP_ASYNC_DB=1); mismos paths y schemas.
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from autogo_erp import fastjson, summary, versioning
+from autogo_erp.database import get_async_db
+from autogo_erp.routers.tramites import (
+    ITEM_JSON, ItemListParams, TramiteIn, TramiteOut,
+    header_values, items_insert, items_page, items_stmt, list_etag, tramite_rows,
+)
+from ..models_costos import Costo, Tramite
+
+router = APIRouter(prefix="/tramites", tags=["Trámites"])
+
+@router.get("/", response_model=List[TramiteOut], summary="Listar trámites (costos tipo=tramite)")
+async def listar_tramites(request: Request, response: Response, p: ItemListParams = Query(),
+                          db: AsyncSession = Depends(get_async_db)):
+    tag = list_etag(request, "tramites", await versioning.current_async(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+    if fastjson.ENABLED:
+        rows = items_page((await db.execute(items_stmt(p, fast=True))).all(), p, response)
+        return fastjson.respond(ITEM_JSON.encode_all(rows), response)
+    return items_page((await db.execute(items_stmt(p))).scalars().all(), p, response)
+
+@router.post("/", summary="Crear trámite con items (tipo=tramite)")
+async def crear_tramite(payload: TramiteIn, db: AsyncSession = Depends(get_async_db)):
+    header = header_values(payload)
+    try:
+        tramite_id = (await db.execute(insert(Tramite).values(**header).returning(Tramite.id))).scalar_one()
+        ids = []
+        if payload.items:
+            # Un INSERT multi-fila con RETURNING en lugar de un refresh por ítem
+            stmt, sort_ids = items_insert(db.get_bind().dialect.name)
+            ids = list((await db.execute(stmt, tramite_rows(payload, tramite_id))).scalars())
+            if sort_ids:
+                ids.sort()
+        await versioning.bump_async(db, "costos")
+        await db.run_sync(summary.refresh, [payload.vehiculo_id])
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Vehículo no encontrado")
+    return {
+        "ok": True,
+        "id": tramite_id,
+        "referencia": payload.referencia,
+        "fecha": header["fecha"],
+        "total": header["total"],
+        "items_creados": ids,
+    }
+
+@router.get("/{id:int}", response_model=TramiteOut, summary="Obtener un ítem de trámite por id")
+async def obtener_tramite_item(id: int, request: Request, response: Response,
+                               db: AsyncSession = Depends(get_async_db)):
+    tag = versioning.make_etag("tramite", id, await versioning.current_async(db, "costos"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    if fastjson.ENABLED:
+        stmt = select(*ITEM_JSON.columns(Costo)).where(Costo.id == id, Costo.tipo == "tramite")
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Trámite no encontrado")
+        versioning.set_etag(response, tag)
+        return fastjson.respond(ITEM_JSON.encode(row), response)
+    c = (await db.execute(select(Costo).where(Costo.id == id, Costo.tipo == "tramite"))).scalar_one_or_none()
+    if not c:
+        raise HTTPException(status_code=404, detail="Trámite no encontrado")
+    versioning.set_etag(response, tag)
+    return c
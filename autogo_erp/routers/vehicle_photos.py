@@ -0,0 +1,197 @@
+# Subida de fotos de vehículos y entrega de sus variantes (ver media.py).
+#
+# POST guarda cada archivo por hash de contenido, genera thumb/card/full en
+# el pool de procesos y recién entonces abre la transacción que crea las
+# filas Photo.  Photo.url apunta a la variante "card" (lo que muestran los
+# listados), nunca al original.  El módulo no se llama "photos" porque
+# main.py ignora ese nombre (router legado).
+import asyncio
+from typing import List
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from autogo_erp import live, media, models, summary, versioning
+from autogo_erp.cache import vehicle_cache
+from autogo_erp.config import Config
+from autogo_erp.database import session_for
+from autogo_erp.schemas import PhotoRead
+
+router = APIRouter(tags=["Photos"])
+
+# Un año; el contenido de una URL de variante no cambia nunca
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# ===== Dependencia DB (GET -> pool de lectura, escrituras -> primario) =====
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# ===== Helpers (sync; desde los endpoints async van por run_in_threadpool) =====
+def _vehicle_exists(db: Session, vehicle_id: int) -> bool:
+    return db.execute(select(models.Vehicle.id).where(models.Vehicle.id == vehicle_id)).first() is not None
+
+def _touch_vehicle(db: Session, vehicle_id: int) -> None:
+    # Nueva row_version: VehicleRead incluye las fotos (ETag y caché por fila)
+    V = models.Vehicle
+    version = versioning.bump(db, "vehicles")
+    if not db.execute(update(V).where(V.id == vehicle_id).values(row_version=version)).rowcount:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+def _finish(db: Session, vehicle_id: int) -> None:
+    summary.refresh(db, [vehicle_id])
+    # La nueva row_version llega a /vehicles/live como "updated"
+    live.record(db, live.UPDATED, [vehicle_id])
+    try:
+        db.commit()
+    except IntegrityError:
+        # ux_photos_vehicle_id_main: otra request marcó una principal a la vez
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Concurrent main photo change, retry")
+    vehicle_cache.invalidate(vehicle_id, db=db)
+
+def _set_main(db: Session, vehicle_id: int, photo_id: int) -> None:
+    # Primero desmarcar: el índice único parcial se chequea fila por fila
+    P = models.Photo
+    db.execute(update(P).where(P.vehicle_id == vehicle_id, P.is_main.is_(True)).values(is_main=False))
+    db.execute(update(P).where(P.id == photo_id).values(is_main=True))
+
+def _vehicle_photos(db: Session, vehicle_id: int, ids=None) -> List[models.Photo]:
+    P = models.Photo
+    stmt = select(P).where(P.vehicle_id == vehicle_id)
+    if ids is not None:
+        stmt = stmt.where(P.id.in_(ids))
+    return db.execute(stmt.order_by(P.is_main.desc(), P.id)).scalars().all()
+
+def _attach(db: Session, vehicle_id: int, digests: List[str], is_main: bool) -> List[models.Photo]:
+    """Crea las filas Photo que falten para ``digests`` en una transacción.
+
+    Una foto que el vehículo ya tiene (mismo hash) no se duplica.  La primera
+    foto pasa a principal si se pidió ``is_main`` o si el vehículo no tenía.
+    """
+    P = models.Photo
+    _touch_vehicle(db, vehicle_id)
+    existing = dict(db.execute(
+        select(P.content_hash, P.id).where(P.vehicle_id == vehicle_id, P.content_hash.in_(digests))
+    ).all())
+    new = [d for d in digests if d not in existing]
+    if new:
+        rows = [
+            {"vehicle_id": vehicle_id, "url": media.variant_url(d, *media.DEFAULT_VARIANT),
+             "content_hash": d, "is_main": False}
+            for d in new
+        ]
+        returned = db.execute(insert(P).returning(P.content_hash, P.id), rows).all()
+        existing.update(dict(returned))
+
+    has_main = db.execute(
+        select(func.count()).where(P.vehicle_id == vehicle_id, P.is_main.is_(True))
+    ).scalar()
+    if is_main or not has_main:
+        _set_main(db, vehicle_id, existing[digests[0]])
+    _finish(db, vehicle_id)
+    return _vehicle_photos(db, vehicle_id, [existing[d] for d in digests])
+
+def _delete(db: Session, vehicle_id: int, photo_id: int) -> None:
+    # Los archivos quedan: el mismo hash puede usarlo otra foto u otro vehículo
+    P = models.Photo
+    photo = db.execute(select(P).where(P.id == photo_id, P.vehicle_id == vehicle_id)).scalar_one_or_none()
+    if photo is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    _touch_vehicle(db, vehicle_id)
+    was_main = photo.is_main
+    db.delete(photo)
+    db.flush()
+    if was_main:
+        next_id = db.execute(select(func.min(P.id)).where(P.vehicle_id == vehicle_id)).scalar()
+        if next_id is not None:
+            _set_main(db, vehicle_id, next_id)
+    _finish(db, vehicle_id)
+
+def _make_main(db: Session, vehicle_id: int, photo_id: int) -> List[models.Photo]:
+    P = models.Photo
+    if db.execute(select(P.id).where(P.id == photo_id, P.vehicle_id == vehicle_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    _touch_vehicle(db, vehicle_id)
+    _set_main(db, vehicle_id, photo_id)
+    _finish(db, vehicle_id)
+    return _vehicle_photos(db, vehicle_id)
+
+# ===== Endpoints =====
+
+@router.post("/vehicles/{vehicle_id:int}/photos", response_model=List[PhotoRead], summary="Subir fotos")
+async def upload_photos(
+    vehicle_id: int,
+    files: List[UploadFile] = File(...),
+    is_main: bool = Form(False, description="Marcar la primera foto como principal"),
+    db: Session = Depends(get_db),
+):
+    if len(files) > Config.PHOTO_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {Config.PHOTO_MAX_FILES} files per request")
+    if not await run_in_threadpool(_vehicle_exists, db, vehicle_id):
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+    # 1) A disco por bloques con SHA-256 (thread: I/O bloqueante)
+    digests, created = [], set()
+    for f in files:
+        try:
+            digest, new = await run_in_threadpool(media.store_upload, f.file)
+        except media.UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=f"{f.filename}: {exc}")
+        finally:
+            await f.close()
+        if new:
+            created.add(digest)
+        if digest not in digests:
+            digests.append(digest)
+
+    # 2) Variantes en el pool de procesos (las ya generadas no se repiten)
+    pending = [d for d in digests if not media.rendered(d)]
+    results = await asyncio.gather(*(media.render_async(d) for d in pending), return_exceptions=True)
+    bad = [d for d, r in zip(pending, results) if isinstance(r, media.InvalidImage)]
+    if bad:
+        for d in created.intersection(bad):
+            media.original_path(d).unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Unsupported or corrupt image")
+    for r in results:
+        if isinstance(r, BaseException):
+            raise r
+
+    # 3) Filas Photo + vehicle_summary en una transacción
+    return await run_in_threadpool(_attach, db, vehicle_id, digests, is_main)
+
+@router.get("/vehicles/{vehicle_id:int}/photos", response_model=List[PhotoRead], summary="Fotos de un vehículo")
+def list_photos(vehicle_id: int, db: Session = Depends(get_db)):
+    photos = _vehicle_photos(db, vehicle_id)
+    if not photos and not _vehicle_exists(db, vehicle_id):
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return photos
+
+@router.put("/vehicles/{vehicle_id:int}/photos/{photo_id:int}/main", response_model=List[PhotoRead],
+            summary="Marcar foto principal")
+def set_main_photo(vehicle_id: int, photo_id: int, db: Session = Depends(get_db)):
+    return _make_main(db, vehicle_id, photo_id)
+
+@router.delete("/vehicles/{vehicle_id:int}/photos/{photo_id:int}", response_model=dict, summary="Borrar foto")
+def delete_photo(vehicle_id: int, photo_id: int, db: Session = Depends(get_db)):
+    _delete(db, vehicle_id, photo_id)
+    return {"ok": True}
+
+# Variantes: la URL lleva el hash, así que se cachean para siempre
+@router.get("/photos/{digest}/{name}", summary="Variante de una foto (thumb/card/full, webp/jpg)")
+def get_variant(digest: str, name: str):
+    variant, _, fmt = name.partition(".")
+    if not media.is_digest(digest) or variant not in media.VARIANTS or fmt not in media.FORMATS:
+        raise HTTPException(status_code=404, detail="Not found")
+    path = media.variant_path(digest, variant, fmt)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, media_type=media.FORMATS[fmt], headers={"Cache-Control": IMMUTABLE})
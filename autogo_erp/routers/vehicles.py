@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import base64
+import json
+from datetime import date
+from typing import Dict, List, Literal, Optional
 
-from autogo_erp import models
-from autogo_erp.database import SessionLocal  # ← usamos SessionLocal, no get_db
-from autogo_erp.schemas import VehicleRead, VehicleCreate, VehicleUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, delete, insert, or_, select, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from autogo_erp import fastjson, live, media, models, search, summary, versioning
+from autogo_erp.cache import vehicle_cache
+from autogo_erp.database import session_for  # primario o pool de lectura según el request
+from autogo_erp.models_costos import Costo, Tramite
+from autogo_erp.schemas import (
+    PhotoRead, VehicleRead, VehicleCreate, VehicleUpdate,
+    VehicleBatchRequest, VehicleBatchResponse, VehicleBatchResult,
+)
 
 router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
 
 # ===== Dependencia DB (local a este router) =====
-def get_db():
-    db = SessionLocal()
+# GET/HEAD usan el pool de lectura; POST/PATCH/DELETE el primario
+def get_db(request: Request, response: Response):
+    db = session_for(request, response)
     try:
         yield db
     finally:
@@ -22,32 +37,305 @@ def _norm_plate(p: Optional[str]) -> Optional[str]:
     p = p.strip().upper()
     return p or None
 
-# Listar
+def _commit_unique(db: Session):
+    # Última defensa si otro worker insertó el mismo VIN/placa entre el chequeo y el commit
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="VIN or plate already exists")
+
+def _flush_unique(db: Session):
+    # Igual que _commit_unique, antes de recalcular vehicle_summary en la misma transacción
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="VIN or plate already exists")
+
+# Columnas NOT NULL editables: en un update, null explícito no significa "sin cambio"
+REQUIRED_FIELDS = [
+    c.key for c in models.Vehicle.__table__.columns if not c.nullable and c.key in VehicleUpdate.model_fields
+]
+
+def null_fields_error(data: dict) -> Optional[str]:
+    nulls = [k for k in REQUIRED_FIELDS if k in data and data[k] is None]
+    if nulls:
+        return f"{', '.join(nulls)} cannot be null"
+    return None
+
+# ===== Paginación por cursor (keyset) =====
+# Cada orden se apoya en un índice compuesto de models.Vehicle y termina en "id",
+# así el cursor (último valor visto + id) identifica una posición única.
+SORT_COLUMNS = {
+    "id": None,
+    "received_date": models.Vehicle.received_date,
+    "year": models.Vehicle.year,
+}
+VehicleSort = Literal["id", "-id", "received_date", "-received_date", "year", "-year"]
+
+def _encode_cursor(sort: str, v: models.Vehicle) -> str:
+    col = SORT_COLUMNS[sort.lstrip("-")]
+    key = None
+    if col is not None:
+        key = getattr(v, col.key)
+        if isinstance(key, date):
+            key = key.isoformat()
+    raw = json.dumps({"s": sort, "k": key, "id": v.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data["s"] != sort:
+            raise ValueError("sort mismatch")
+        key, last_id = data["k"], int(data["id"])
+        if key is not None and sort.lstrip("-") == "received_date":
+            key = date.fromisoformat(key)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key, last_id
+
+def _keyset_after(col, key, last_id: int, desc: bool) -> list:
+    """Tramos de "filas posteriores al cursor" para ORDER BY col, id, en orden.
+
+    Cada tramo es un rango del índice (col, id): el no NULL se expresa como
+    comparación de fila ``(col, id) > (key, id)``, que SQLite y Postgres
+    resuelven con un seek (``SEARCH ... USING INDEX (col>?)``); un OR de
+    comparaciones sueltas no.  El grupo NULL va aparte.  Los NULL van
+    primero en orden ascendente y al final en descendente (se fija
+    explícitamente en el ORDER BY para que SQLite y Postgres coincidan).
+    """
+    id_col = models.Vehicle.id
+    id_after = id_col < last_id if desc else id_col > last_id
+    if col is None:
+        return [id_after]
+    if key is None:
+        # El cursor quedó dentro del grupo NULL
+        if desc:
+            return [and_(col.is_(None), id_after)]
+        return [and_(col.is_(None), id_after), col.is_not(None)]
+    row = tuple_(col, id_col)
+    if not desc:
+        return [row > tuple_(key, last_id)]
+    segments = [row < tuple_(key, last_id)]
+    if col.nullable:
+        segments.append(col.is_(None))
+    return segments
+
+def _order_by(sort: str):
+    desc = sort.startswith("-")
+    col = SORT_COLUMNS[sort.lstrip("-")]
+    id_col = models.Vehicle.id
+    if col is None:
+        return [id_col.desc() if desc else id_col.asc()]
+    if desc:
+        return [col.desc().nulls_last(), id_col.desc()]
+    return [col.asc().nulls_first(), id_col.asc()]
+
+class ListParams(BaseModel):
+    """Query params de GET /vehicles/ (compartidos con el router async).
+
+    Modelo pydantic en vez de clase con ``Depends()``: FastAPI lo valida al
+    leer los query params, sin pasar por el threadpool como una dependencia sync.
+    """
+
+    limit: int = Field(100, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort: VehicleSort = "id"
+    status: Optional[models.VehicleStatus] = None
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+    acquisition_type: Optional[models.AcquisitionType] = None
+    received_from: Optional[date] = None
+    received_to: Optional[date] = None
+
+def _list_stmt(p: ListParams, columns=None):
+    """SELECT de una página (limit + 1 filas para saber si hay siguiente).
+
+    Con ``columns`` se seleccionan esas columnas en vez de la entidad (camino
+    rápido; las fotos van aparte con ``photos_stmt``).
+    """
+    V = models.Vehicle
+    if columns is not None:
+        stmt = select(*columns)
+    else:
+        stmt = select(V).options(selectinload(V.photos))  # fotos: 1 query extra por página
+
+    filters = []
+    if p.status is not None:
+        filters.append(V.status == p.status)
+    if p.brand:
+        filters.append(V.brand == p.brand)
+    if p.model:
+        filters.append(V.model == p.model)
+    if p.year_min is not None:
+        filters.append(V.year >= p.year_min)
+    if p.year_max is not None:
+        filters.append(V.year <= p.year_max)
+    if p.acquisition_type is not None:
+        filters.append(V.acquisition_type == p.acquisition_type)
+    if p.received_from is not None:
+        filters.append(V.received_date >= p.received_from)
+    if p.received_to is not None:
+        filters.append(V.received_date <= p.received_to)
+
+    order_by = _order_by(p.sort)
+    if p.cursor:
+        key, last_id = _decode_cursor(p.cursor, p.sort)
+        col = SORT_COLUMNS[p.sort.lstrip("-")]
+        segments = _keyset_after(col, key, last_id, p.sort.startswith("-"))
+        if len(segments) == 1:
+            filters.append(segments[0])
+        else:
+            # Un seek por tramo y a lo sumo 2 * (limit + 1) ids para ordenar;
+            # un OR entre los tramos recorrería el índice entero
+            seeks = [
+                select(V.id).where(*filters, seg).order_by(*order_by).limit(p.limit + 1).subquery()
+                for seg in segments
+            ]
+            filters = [V.id.in_(union_all(*(select(seek.c.id) for seek in seeks)))]
+
+    return stmt.where(*filters).order_by(*order_by).limit(p.limit + 1)
+
+def _page(rows, p: ListParams, response: Response):
+    if len(rows) > p.limit:
+        rows = rows[:p.limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(p.sort, rows[-1])
+    return rows
+
+# ===== Camino rápido (AUTOERP_FAST_JSON=1, ver fastjson.py) =====
+# Mismos campos y orden que VehicleRead / PhotoRead
+VEHICLE_JSON = fastjson.RowEncoder(VehicleRead, exclude=("photos",))
+PHOTO_JSON = fastjson.RowEncoder(PhotoRead)
+
+def vehicle_columns():
+    # row_version al final: no es parte del cuerpo, sí de la clave de caché
+    V = models.Vehicle
+    return VEHICLE_JSON.columns(V) + [V.row_version]
+
+def photos_stmt(ids: List[int]):
+    P = models.Photo
+    return select(*PHOTO_JSON.columns(P)).where(P.vehicle_id.in_(ids)).order_by(P.vehicle_id, P.id)
+
+def vehicle_dicts(rows, photo_rows) -> List[dict]:
+    photos: Dict[int, List[dict]] = {}
+    for r in photo_rows:
+        d = PHOTO_JSON.encode(r)
+        d["variants"] = media.variant_urls(d["content_hash"]) if d["content_hash"] else None
+        photos.setdefault(d["vehicle_id"], []).append(d)
+    out = VEHICLE_JSON.encode_all(rows)
+    for d in out:
+        d["photos"] = photos.get(d["id"], [])
+    return out
+
+def _fast_vehicles(db: Session, rows) -> List[dict]:
+    photo_rows = db.execute(photos_stmt([r.id for r in rows])).all() if rows else []
+    return vehicle_dicts(rows, photo_rows)
+
+def _list_etag(request: Request, version: int) -> str:
+    # ETag = versión de la tabla + filtros
+    return versioning.make_etag("vehicles", version, versioning.query_fingerprint(request))
+
+# Listar (paginado por cursor; el cursor de la página siguiente va en X-Next-Cursor)
 @router.get("/", response_model=List[VehicleRead])
-def list_vehicles(db: Session = Depends(get_db)):
-    return db.query(models.Vehicle).all()
+def list_vehicles(
+    request: Request,
+    response: Response,
+    p: ListParams = Query(),
+    db: Session = Depends(get_db),
+):
+    # Si el cliente ya tiene esta versión, 304 sin consultar filas
+    tag = _list_etag(request, versioning.current(db, "vehicles"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+
+    if fastjson.ENABLED:
+        rows = _page(db.execute(_list_stmt(p, vehicle_columns())).all(), p, response)
+        return fastjson.respond(_fast_vehicles(db, rows), response)
+    rows = db.execute(_list_stmt(p)).scalars().all()
+    return _page(rows, p, response)
+
+# Buscar por fragmento de VIN/placa, marca/modelo o vendedor (ordenado por relevancia,
+# hasta AUTOERP_SEARCH_CANDIDATES resultados; ver search.py)
+@router.get("/search", response_model=List[VehicleRead])
+def search_vehicles(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    status: Optional[models.VehicleStatus] = None,
+    db: Session = Depends(get_db),
+):
+    try:
+        ids = search.search_vehicle_ids(db, q, limit + 1, offset, status)
+    except search.SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(ids) > limit:
+        ids = ids[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    if not ids:
+        return []
+
+    V = models.Vehicle
+    if fastjson.ENABLED:
+        rows = {r.id: r for r in db.execute(select(*vehicle_columns()).where(V.id.in_(ids)))}
+        ordered = [rows[i] for i in ids if i in rows]
+        return fastjson.respond(_fast_vehicles(db, ordered), response)
+    found = db.execute(select(V).options(selectinload(V.photos)).where(V.id.in_(ids))).scalars()
+    by_id = {v.id: v for v in found}
+    return [by_id[i] for i in ids if i in by_id]
 
 # Obtener por id
 @router.get("/{vehicle_id}", response_model=VehicleRead)
-def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
+def get_vehicle(vehicle_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    row_version = db.execute(
+        select(models.Vehicle.row_version).where(models.Vehicle.id == vehicle_id)
+    ).scalar()
+    if row_version is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    tag = versioning.make_etag("vehicle", vehicle_id, row_version)
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+
+    # La entrada en caché sólo vale si se armó con el mismo row_version
+    hit = vehicle_cache.get_row(vehicle_id, row_version)
+    if fastjson.ENABLED:
+        # En este modo la caché guarda el cuerpo JSON ya serializado
+        if hit is None:
+            row = db.execute(select(*vehicle_columns()).where(models.Vehicle.id == vehicle_id)).first()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Vehicle not found")
+            hit = fastjson.dumps(_fast_vehicles(db, [row])[0])
+            vehicle_cache.put_row(vehicle_id, row.row_version, hit)
+        return fastjson.respond(hit, response)
+    if hit is not None:
+        return hit
     v = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
     if not v:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    return v
+    data = VehicleRead.model_validate(v)
+    vehicle_cache.put_row(vehicle_id, v.row_version, data)
+    return data
 
 # Crear (con validación VIN/PLATE únicos)
 @router.post("/", response_model=VehicleRead)
 def create_vehicle(payload: VehicleCreate, db: Session = Depends(get_db)):
     # VIN
-    exists = db.query(models.Vehicle).filter(models.Vehicle.vin == payload.vin).first()
-    if exists:
+    if vehicle_cache.id_for(db, "vin", payload.vin) is not None:
         raise HTTPException(status_code=400, detail=f"VIN '{payload.vin}' already exists")
 
     # PLATE (si viene)
     plate = _norm_plate(payload.plate)
     if plate:
-        exists_p = db.query(models.Vehicle).filter(models.Vehicle.plate == plate).first()
-        if exists_p:
+        if vehicle_cache.id_for(db, "plate", plate) is not None:
             raise HTTPException(status_code=400, detail=f"Plate '{plate}' already exists")
 
     v = models.Vehicle(
@@ -63,11 +351,186 @@ def create_vehicle(payload: VehicleCreate, db: Session = Depends(get_db)):
         seller_document=payload.seller_document,   # nuevos campos
         received_date=payload.received_date,       # nuevos campos
     )
+    v.row_version = versioning.bump(db, "vehicles")
     db.add(v)
-    db.commit()
+    _flush_unique(db)
+    summary.refresh(db, [v.id])
+    live.record(db, live.CREATED, [v.id])
+    _commit_unique(db)
+    vehicle_cache.invalidate(v.id, db=db)
     db.refresh(v)
     return v
 
+# ===== Operaciones en lote =====
+def _batch_errors(db: Session, creates, updates, deletes) -> Dict[int, str]:
+    """Valida el lote completo; devuelve {índice de operación: error}.
+
+    Una consulta para los ids tocados y otra para VIN/placa contra el resto de
+    la tabla, sin importar cuántas operaciones traiga el lote.
+    """
+    V = models.Vehicle
+    errors: Dict[int, str] = {}
+
+    for i, _, data in updates:
+        msg = null_fields_error(data)
+        if msg:
+            errors[i] = msg
+
+    touched = sorted([(i, vid) for i, vid, _ in updates] + deletes)
+    seen: Dict[int, int] = {}
+    for i, vid in touched:
+        if vid in seen:
+            errors[i] = f"Vehicle {vid} already used by operation {seen[vid]}"
+        else:
+            seen[vid] = i
+
+    existing = {}
+    if seen:
+        stmt = select(V.id, V.vin, V.plate).where(V.id.in_(seen))
+        existing = {r.id: r for r in db.execute(stmt)}
+    for i, vid in touched:
+        if vid not in existing:
+            errors.setdefault(i, "Vehicle not found")
+
+    # VIN/placa finales de cada fila creada o modificada
+    final = [(i, data["vin"], data["plate"]) for i, data in creates]
+    for i, vid, data in updates:
+        row = existing.get(vid)
+        if row is not None:
+            final.append((i, data.get("vin", row.vin), data.get("plate", row.plate)))
+    final.sort()
+
+    # Repetidos dentro del mismo lote
+    for pos, label in ((1, "VIN"), (2, "Plate")):
+        owner: Dict[str, int] = {}
+        for item in final:
+            value = item[pos]
+            if value is None:
+                continue
+            if value in owner:
+                errors.setdefault(item[0], f"{label} '{value}' repeated in batch (operation {owner[value]})")
+            else:
+                owner[value] = item[0]
+
+    # Contra las filas que el lote no toca (las tocadas cambian o se borran)
+    vins = {v for _, v, _ in final if v is not None}
+    plates = {p for _, _, p in final if p}
+    if vins or plates:
+        stmt = select(V.vin, V.plate).where(or_(V.vin.in_(vins), V.plate.in_(plates)))
+        if seen:
+            stmt = stmt.where(V.id.not_in(seen))
+        taken_vins, taken_plates = set(), set()
+        for vin, plate in db.execute(stmt):
+            taken_vins.add(vin)
+            taken_plates.add(plate)
+        for i, vin, plate in final:
+            if vin in taken_vins:
+                errors.setdefault(i, f"VIN '{vin}' already exists")
+            elif plate and plate in taken_plates:
+                errors.setdefault(i, f"Plate '{plate}' already exists")
+    return errors
+
+def _batch_insert(db: Session, rows: List[dict]) -> List[int]:
+    V = models.Vehicle
+    if db.get_bind().dialect.insert_executemany_returning:
+        # INSERT multi-fila con RETURNING (SQLite >= 3.35, PostgreSQL).  El orden
+        # de RETURNING no está garantizado: se empareja por VIN, que es único.
+        stmt = insert(V).returning(V.vin, V.id)
+        by_vin = dict(db.execute(stmt, rows).all())
+        return [by_vin[row["vin"]] for row in rows]
+    objs = [V(**row) for row in rows]
+    db.add_all(objs)
+    db.flush()
+    return [o.id for o in objs]
+
+def has_costos_stmt(vehicle_ids: List[int]):
+    # ¿El borrado se lleva costos o trámites?  Sus ETags van por la versión "costos"
+    return select(
+        select(Costo.id).where(Costo.vehiculo_id.in_(vehicle_ids)).exists()
+        | select(Tramite.id).where(Tramite.vehiculo_id.in_(vehicle_ids)).exists()
+    )
+
+def _batch_apply(db: Session, creates, updates, deletes, ids: Dict[int, Optional[int]]) -> int:
+    V = models.Vehicle
+    version = versioning.bump(db, "vehicles")
+
+    # Borrados primero: un VIN/placa liberado puede reutilizarse en el mismo lote.
+    # Hijos explícitos (como el cascade del ORM en DELETE /vehicles/{id}).
+    if deletes:
+        del_ids = [vid for _, vid in deletes]
+        live.record(db, live.DELETED, del_ids)  # con los datos de antes de borrar
+        if db.execute(has_costos_stmt(del_ids)).scalar():
+            versioning.bump(db, "costos")
+        sale_ids = select(models.Sale.id).where(models.Sale.vehicle_id.in_(del_ids))
+        db.execute(delete(models.Payment).where(models.Payment.sale_id.in_(sale_ids)))
+        db.execute(delete(models.Sale).where(models.Sale.vehicle_id.in_(del_ids)))
+        db.execute(delete(models.Photo).where(models.Photo.vehicle_id.in_(del_ids)))
+        db.execute(delete(Costo).where(Costo.vehiculo_id.in_(del_ids)))
+        db.execute(delete(Tramite).where(Tramite.vehiculo_id.in_(del_ids)))
+        db.execute(delete(V).where(V.id.in_(del_ids)))
+
+    if updates:
+        upd_ids = [vid for _, vid, _ in updates]
+        before = live.previous(db, upd_ids)
+        # UPDATE por clave primaria en executemany (agrupado por columnas tocadas)
+        db.execute(update(V), [{**data, "id": vid, "row_version": version} for _, vid, data in updates])
+        live.record(db, live.UPDATED, upd_ids, before)
+
+    if creates:
+        new_ids = _batch_insert(db, [{**data, "row_version": version} for _, data in creates])
+        for (i, _), vid in zip(creates, new_ids):
+            ids[i] = vid
+        live.record(db, live.CREATED, new_ids)
+
+    summary.refresh(db, ids.values())
+    return version
+
+@router.post("/batch", response_model=VehicleBatchResponse)
+def batch_vehicles(payload: VehicleBatchRequest, db: Session = Depends(get_db)):
+    """Crea, actualiza y borra vehículos en una sola transacción.
+
+    Si alguna operación no es válida no se aplica ninguna: responde 400 con
+    el resultado de cada operación.
+    """
+    creates, updates, deletes = [], [], []
+    for i, op in enumerate(payload.operations):
+        if op.op == "create":
+            data = op.data.model_dump()
+            data["plate"] = _norm_plate(data["plate"])
+            creates.append((i, data))
+        elif op.op == "update":
+            data = op.data.model_dump(exclude_unset=True)
+            if "plate" in data:
+                data["plate"] = _norm_plate(data["plate"])
+            updates.append((i, op.id, data))
+        else:
+            deletes.append((i, op.id))
+
+    ids: Dict[int, Optional[int]] = {i: None for i, _ in creates}
+    ids.update({i: vid for i, vid, _ in updates})
+    ids.update(dict(deletes))
+
+    def response(errors: Dict[int, str], row_version=None):
+        results = [
+            VehicleBatchResult(index=i, op=op.op, id=ids[i], ok=i not in errors, error=errors.get(i))
+            for i, op in enumerate(payload.operations)
+        ]
+        return VehicleBatchResponse(ok=not errors, row_version=row_version, results=results)
+
+    errors = _batch_errors(db, creates, updates, deletes)
+    if errors:
+        return JSONResponse(status_code=400, content=jsonable_encoder(response(errors)))
+
+    try:
+        version = _batch_apply(db, creates, updates, deletes, ids)
+    except IntegrityError:
+        # p. ej. un intercambio de VIN entre dos filas del lote, o una carrera con otro worker
+        db.rollback()
+        raise HTTPException(status_code=400, detail="VIN or plate already exists")
+    _commit_unique(db)
+    vehicle_cache.invalidate(*[vid for vid in ids.values() if vid is not None], db=db)
+    return response({}, version)
+
 # Actualizar (PATCH)
 @router.patch("/{vehicle_id}", response_model=VehicleRead)
 def update_vehicle(vehicle_id: int, payload: VehicleUpdate, db: Session = Depends(get_db)):
@@ -76,14 +539,14 @@ def update_vehicle(vehicle_id: int, payload: VehicleUpdate, db: Session = Depend
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     data = payload.dict(exclude_unset=True)
+    msg = null_fields_error(data)
+    if msg:
+        raise HTTPException(status_code=422, detail=msg)
 
     # VIN duplicado
     if "vin" in data:
-        dup = db.query(models.Vehicle).filter(
-            models.Vehicle.vin == data["vin"],
-            models.Vehicle.id != vehicle_id
-        ).first()
-        if dup:
+        dup = vehicle_cache.id_for(db, "vin", data["vin"])
+        if dup is not None and dup != vehicle_id:
             raise HTTPException(status_code=400, detail=f"VIN '{data['vin']}' already exists")
 
     # PLATE duplicada (normalizar primero)
@@ -91,17 +554,20 @@ def update_vehicle(vehicle_id: int, payload: VehicleUpdate, db: Session = Depend
         plate = _norm_plate(data["plate"])
         data["plate"] = plate
         if plate:
-            dup_p = db.query(models.Vehicle).filter(
-                models.Vehicle.plate == plate,
-                models.Vehicle.id != vehicle_id
-            ).first()
-            if dup_p:
+            dup_p = vehicle_cache.id_for(db, "plate", plate)
+            if dup_p is not None and dup_p != vehicle_id:
                 raise HTTPException(status_code=400, detail=f"Plate '{plate}' already exists")
 
+    before = {vehicle_id: (v.status, v.brand)}
     for k, val in data.items():
         setattr(v, k, val)
+    v.row_version = versioning.bump(db, "vehicles")
 
-    db.commit()
+    _flush_unique(db)
+    summary.refresh(db, [vehicle_id])
+    live.record(db, live.UPDATED, [vehicle_id], before)
+    _commit_unique(db)
+    vehicle_cache.invalidate(vehicle_id, db=db)
     db.refresh(v)
     return v
 
@@ -111,7 +577,14 @@ def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     v = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
     if not v:
         raise HTTPException(status_code=404, detail="Vehicle not found")
+    live.record(db, live.DELETED, [vehicle_id])
+    if db.execute(has_costos_stmt([vehicle_id])).scalar():
+        versioning.bump(db, "costos")
     db.delete(v)
+    versioning.bump(db, "vehicles")
+    db.flush()
+    summary.refresh(db, [vehicle_id])
     db.commit()
+    vehicle_cache.invalidate(vehicle_id, db=db)
     return {"ok": True}
 
@@ -0,0 +1,179 @@
+# Versión async de los endpoints CRUD de vehículos (AUTOERP_ASYNC_DB=1).
+# main.py la incluye antes que routers/vehicles.py: estas rutas tienen
+# prioridad y el resto (search, etc.) sigue atendido por el router sync.
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from autogo_erp import fastjson, live, models, summary, versioning
+from autogo_erp.cache import vehicle_cache
+from autogo_erp.database import get_async_db
+from autogo_erp.routers.vehicles import (
+    ListParams, _list_etag, _list_stmt, _norm_plate, _page, has_costos_stmt, null_fields_error, photos_stmt,
+    vehicle_columns, vehicle_dicts,
+)
+from autogo_erp.schemas import VehicleRead, VehicleCreate, VehicleUpdate
+
+router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
+
+async def _check_unique(db: AsyncSession, vin, plate, vehicle_id=None):
+    # VIN y placa en una sola consulta
+    V = models.Vehicle
+    conds = []
+    if vin is not None:
+        conds.append(V.vin == vin)
+    if plate:
+        conds.append(V.plate == plate)
+    if not conds:
+        return
+    stmt = select(V.id, V.vin, V.plate).where(or_(*conds))
+    if vehicle_id is not None:
+        stmt = stmt.where(V.id != vehicle_id)
+    for _, dup_vin, dup_plate in (await db.execute(stmt)).all():
+        if vin is not None and dup_vin == vin:
+            raise HTTPException(status_code=400, detail=f"VIN '{vin}' already exists")
+        if plate and dup_plate == plate:
+            raise HTTPException(status_code=400, detail=f"Plate '{plate}' already exists")
+
+async def _commit_unique(db: AsyncSession):
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="VIN or plate already exists")
+
+async def _flush_unique(db: AsyncSession):
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="VIN or plate already exists")
+
+async def _load(db: AsyncSession, vehicle_id: int):
+    V = models.Vehicle
+    stmt = select(V).options(selectinload(V.photos)).where(V.id == vehicle_id)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def _fast_vehicles(db: AsyncSession, rows):
+    photo_rows = (await db.execute(photos_stmt([r.id for r in rows]))).all() if rows else []
+    return vehicle_dicts(rows, photo_rows)
+
+# Listar
+@router.get("/", response_model=List[VehicleRead])
+async def list_vehicles(
+    request: Request,
+    response: Response,
+    p: ListParams = Query(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    tag = _list_etag(request, await versioning.current_async(db, "vehicles"))
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+
+    if fastjson.ENABLED:
+        rows = _page((await db.execute(_list_stmt(p, vehicle_columns()))).all(), p, response)
+        return fastjson.respond(await _fast_vehicles(db, rows), response)
+    rows = (await db.execute(_list_stmt(p))).scalars().all()
+    return _page(rows, p, response)
+
+# Obtener por id
+@router.get("/{vehicle_id:int}", response_model=VehicleRead)
+async def get_vehicle(vehicle_id: int, request: Request, response: Response,
+                      db: AsyncSession = Depends(get_async_db)):
+    row_version = (await db.execute(
+        select(models.Vehicle.row_version).where(models.Vehicle.id == vehicle_id)
+    )).scalar()
+    if row_version is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    tag = versioning.make_etag("vehicle", vehicle_id, row_version)
+    cached = versioning.not_modified(request, tag)
+    if cached:
+        return cached
+    versioning.set_etag(response, tag)
+
+    hit = vehicle_cache.get_row(vehicle_id, row_version)
+    if fastjson.ENABLED:
+        if hit is None:
+            stmt = select(*vehicle_columns()).where(models.Vehicle.id == vehicle_id)
+            row = (await db.execute(stmt)).first()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Vehicle not found")
+            hit = fastjson.dumps((await _fast_vehicles(db, [row]))[0])
+            vehicle_cache.put_row(vehicle_id, row.row_version, hit)
+        return fastjson.respond(hit, response)
+    if hit is not None:
+        return hit
+    v = await _load(db, vehicle_id)
+    if not v:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    data = VehicleRead.model_validate(v)
+    vehicle_cache.put_row(vehicle_id, v.row_version, data)
+    return data
+
+# Crear
+@router.post("/", response_model=VehicleRead)
+async def create_vehicle(payload: VehicleCreate, db: AsyncSession = Depends(get_async_db)):
+    plate = _norm_plate(payload.plate)
+    await _check_unique(db, payload.vin, plate)
+
+    data = payload.model_dump()
+    data["plate"] = plate
+    v = models.Vehicle(**data)
+    v.row_version = await versioning.bump_async(db, "vehicles")
+    db.add(v)
+    await _flush_unique(db)
+    await db.run_sync(summary.refresh, [v.id])
+    await db.run_sync(live.record, live.CREATED, [v.id])
+    await _commit_unique(db)
+    vehicle_cache.invalidate(v.id, db=db.sync_session)
+    return await _load(db, v.id)
+
+# Actualizar (PATCH)
+@router.patch("/{vehicle_id:int}", response_model=VehicleRead)
+async def update_vehicle(vehicle_id: int, payload: VehicleUpdate, db: AsyncSession = Depends(get_async_db)):
+    v = await db.get(models.Vehicle, vehicle_id)
+    if not v:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+    data = payload.model_dump(exclude_unset=True)
+    msg = null_fields_error(data)
+    if msg:
+        raise HTTPException(status_code=422, detail=msg)
+    if "plate" in data:
+        data["plate"] = _norm_plate(data["plate"])
+    await _check_unique(db, data.get("vin"), data.get("plate"), vehicle_id)
+
+    before = {vehicle_id: (v.status, v.brand)}
+    for k, val in data.items():
+        setattr(v, k, val)
+    v.row_version = await versioning.bump_async(db, "vehicles")
+    await _flush_unique(db)
+    await db.run_sync(summary.refresh, [vehicle_id])
+    await db.run_sync(live.record, live.UPDATED, [vehicle_id], before)
+    await _commit_unique(db)
+    vehicle_cache.invalidate(vehicle_id, db=db.sync_session)
+    db.expunge(v)
+    return await _load(db, vehicle_id)
+
+# Eliminar
+@router.delete("/{vehicle_id:int}", response_model=dict)
+async def delete_vehicle(vehicle_id: int, db: AsyncSession = Depends(get_async_db)):
+    v = await db.get(models.Vehicle, vehicle_id)
+    if not v:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    await db.run_sync(live.record, live.DELETED, [vehicle_id])
+    if (await db.execute(has_costos_stmt([vehicle_id]))).scalar():
+        await versioning.bump_async(db, "costos")
+    await db.delete(v)
+    await versioning.bump_async(db, "vehicles")
+    await db.flush()
+    await db.run_sync(summary.refresh, [vehicle_id])
+    await db.commit()
+    vehicle_cache.invalidate(vehicle_id, db=db.sync_session)
+    return {"ok": True}
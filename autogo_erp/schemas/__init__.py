@@ -1,7 +1,8 @@
-from typing import Optional, List
+from typing import Annotated, Any, Dict, Optional, List, Literal, Union
 from datetime import date, datetime
-from pydantic import BaseModel
-from autogo_erp.models import AcquisitionType, VehicleStatus
+from pydantic import BaseModel, Field, computed_field
+from autogo_erp import media
+from autogo_erp.models import AcquisitionType, JobStatus, SaleStatus, VehicleStatus
 
 # ===== Vehicles =====
 
@@ -42,6 +43,13 @@ class PhotoRead(BaseModel):
     vehicle_id: int
     url: str
     is_main: bool
+    content_hash: Optional[str] = None
+
+    @computed_field
+    @property
+    def variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        # URLs inmutables de thumb/card/full (webp y jpg) de las fotos subidas
+        return media.variant_urls(self.content_hash) if self.content_hash else None
 
     class Config:
         from_attributes = True
@@ -54,3 +62,191 @@ class VehicleRead(VehicleBase):
     class Config:
         from_attributes = True
 
+
+# ===== Vehicles: operaciones en lote (POST /vehicles/batch) =====
+
+class VehicleBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: VehicleCreate
+
+class VehicleBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: VehicleUpdate
+
+class VehicleBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+VehicleBatchOp = Annotated[
+    Union[VehicleBatchCreate, VehicleBatchUpdate, VehicleBatchDelete],
+    Field(discriminator="op"),
+]
+
+class VehicleBatchRequest(BaseModel):
+    operations: List[VehicleBatchOp] = Field(..., min_length=1, max_length=1000)
+
+class VehicleBatchResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class VehicleBatchResponse(BaseModel):
+    ok: bool
+    row_version: Optional[int] = None
+    results: List[VehicleBatchResult]
+
+# ===== Vehicle summary (tableros) =====
+
+class VehicleSummaryRead(BaseModel):
+    vehicle_id: int
+    vin: str
+    brand: str
+    model: str
+    year: int
+    status: VehicleStatus
+    received_date: Optional[date] = None
+    cost_tramite: float
+    cost_compra: float
+    cost_transporte: float
+    cost_reparacion: float
+    cost_otros: float
+    total_cost: float
+    sale_price: Optional[float] = None
+    sold_at: Optional[date] = None
+    amount_paid: float
+    balance: Optional[float] = None
+    margin: Optional[float] = None
+    main_photo_url: Optional[str] = None
+
+    @computed_field
+    @property
+    def days_in_stock(self) -> Optional[int]:
+        # Hasta la venta, o hasta hoy si sigue en stock
+        if self.received_date is None:
+            return None
+        return ((self.sold_at or date.today()) - self.received_date).days
+
+    class Config:
+        from_attributes = True
+
+class SummaryTotals(BaseModel):
+    status: VehicleStatus
+    vehicles: int
+    total_cost: float
+    sale_price: float
+    amount_paid: float
+    balance: float
+    margin: float
+
+# ===== Ventas: pagos y cuentas por cobrar =====
+
+class PaymentCreate(BaseModel):
+    amount: float = Field(..., gt=0)
+    method: Optional[str] = Field(None, max_length=64)
+    reference: Optional[str] = Field(None, max_length=128)
+    paid_at: Optional[datetime] = None  # por defecto, ahora
+
+class PaymentRead(BaseModel):
+    id: int
+    sale_id: int
+    amount: float
+    paid_at: datetime
+    method: Optional[str] = None
+    reference: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class PaymentPosted(BaseModel):
+    payment: PaymentRead
+    sale_id: int
+    vehicle_id: int
+    sale_price: float
+    amount_paid: float
+    balance: float
+    status: SaleStatus
+
+AgingBucketName = Literal["0-30", "31-60", "61-90", "90+"]
+
+class AgingBucket(BaseModel):
+    bucket: AgingBucketName
+    sales: int
+    balance: float
+
+class AgingReport(BaseModel):
+    as_of: date
+    buckets: List[AgingBucket]
+    sales: int
+    balance: float
+
+# ===== Documentos PDF =====
+
+DocumentKind = Literal["sheet", "contract", "invoice"]
+
+class DocumentBatchRequest(BaseModel):
+    kind: DocumentKind
+    # ids explícitos, o rango de fechas (received_date para fichas, sale_date para ventas)
+    ids: Optional[List[int]] = Field(None, min_length=1)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    format: Literal["zip", "pdf"] = "zip"
+
+# ===== Trabajos en segundo plano (POST /jobs, ver jobs.py) =====
+
+JobKind = Literal["export", "import_vehicles", "documents", "summary_rebuild"]
+
+class ExportJobParams(BaseModel):
+    dataset: Literal["vehicles", "costos", "sales"]
+    format: Literal["csv", "ndjson", "xlsx"] = "csv"
+    # Los mismos filtros que GET /exports/<dataset>
+    totals: bool = False
+    status: Optional[VehicleStatus] = None
+    tipo: Optional[str] = None
+    vehicle: bool = False
+    payments: bool = False
+
+class ImportJobParams(BaseModel):
+    upload_id: str  # devuelto por POST /jobs/uploads
+    format: Optional[Literal["csv", "xlsx"]] = None  # por defecto, la extensión del archivo
+
+class SummaryRebuildParams(BaseModel):
+    pass
+
+class JobCreate(BaseModel):
+    kind: JobKind
+    # Según kind: ExportJobParams, ImportJobParams, DocumentBatchRequest, SummaryRebuildParams
+    params: Dict[str, Any] = {}
+    max_attempts: Optional[int] = Field(None, ge=1, le=10)
+
+class JobUpload(BaseModel):
+    upload_id: str
+    size: int
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    progress: Optional[float] = None
+    progress_message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    artifact_name: Optional[str] = None
+    created_at: datetime
+    run_after: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def artifact_url(self) -> Optional[str]:
+        if self.status == JobStatus.SUCCEEDED and self.artifact_name:
+            return f"/jobs/{self.id}/artifact"
+        return None
+
+    class Config:
+        from_attributes = True
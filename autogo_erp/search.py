@@ -0,0 +1,141 @@
+"""Búsqueda de vehículos por VIN, placa, marca/modelo y vendedor.
+
+En SQLite se usa una tabla virtual FTS5 de contenido externo
+(``vehicles_fts``) con tokenizador trigram, mantenida por triggers sobre
+``vehicles``; así un fragmento de VIN o placa encuentra coincidencias en
+cualquier posición.  En PostgreSQL se usa un índice GIN ``pg_trgm`` sobre una
+expresión que concatena las mismas columnas.
+
+``ensure_search_index`` crea lo necesario (idempotente) y ``search_vehicle_ids``
+devuelve los ids ordenados por relevancia.  La relevancia (bm25 o
+``word_similarity``) se calcula sólo sobre los ``Config.SEARCH_CANDIDATES``
+vehículos coincidentes más recientes, que son también el máximo de
+resultados: el costo queda acotado aunque el término aparezca en medio
+inventario, y el conjunto no cambia entre páginas.  Los filtros van dentro
+del tope para que las páginas salgan completas.
+"""
+
+import re
+import sqlite3
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, and_, column, func, literal_column, select, table, text
+
+from autogo_erp import models
+from autogo_erp.config import Config
+
+SEARCH_COLUMNS = ("vin", "plate", "brand", "model", "seller_name", "seller_document")
+# Peso bm25 por columna (mismo orden que SEARCH_COLUMNS): VIN y placa primero
+BM25_WEIGHTS = (10.0, 10.0, 2.0, 2.0, 1.0, 5.0)
+
+# El tokenizador trigram existe desde SQLite 3.34; antes se usa unicode61 con prefijos
+SQLITE_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+MIN_TERM = 3 if SQLITE_TRIGRAM else 1
+
+PG_SEARCH_EXPR = "lower(" + " || ' ' || ".join(f"coalesce({c}, '')" for c in SEARCH_COLUMNS) + ")"
+
+
+class SearchQueryError(ValueError):
+    pass
+
+
+def _sqlite_ddl() -> List[str]:
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    tokenize = "trigram" if SQLITE_TRIGRAM else "unicode61"
+    prefix = "" if SQLITE_TRIGRAM else ", prefix='2 3 4'"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS vehicles_fts USING fts5("
+        f"{cols}, content='vehicles', content_rowid='id', tokenize='{tokenize}'{prefix})",
+        f"CREATE TRIGGER IF NOT EXISTS vehicles_fts_ai AFTER INSERT ON vehicles BEGIN "
+        f"INSERT INTO vehicles_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS vehicles_fts_ad AFTER DELETE ON vehicles BEGIN "
+        f"INSERT INTO vehicles_fts(vehicles_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS vehicles_fts_au AFTER UPDATE OF {cols} ON vehicles BEGIN "
+        f"INSERT INTO vehicles_fts(vehicles_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO vehicles_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def ensure_search_index(conn) -> None:
+    """Crea el índice de búsqueda del dialecto actual si todavía no existe."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='vehicles_fts'")
+        ).first()
+        for ddl in _sqlite_ddl():
+            conn.execute(text(ddl))
+        if not exists:
+            # Indexar las filas que ya estaban antes de crear los triggers
+            conn.execute(text("INSERT INTO vehicles_fts(vehicles_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_vehicles_search_trgm ON vehicles "
+            f"USING gin (({PG_SEARCH_EXPR}) gin_trgm_ops)"
+        ))
+
+
+def _terms(q: str) -> List[str]:
+    terms = [t for t in re.split(r"\s+", q.strip()) if t]
+    if not any(len(t) >= MIN_TERM for t in terms):
+        raise SearchQueryError(f"Search needs at least one term of {MIN_TERM}+ characters")
+    return terms
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_vehicle_ids(db, q: str, limit: int, offset: int = 0,
+                       status: Optional[models.VehicleStatus] = None) -> List[int]:
+    """Ids de vehículos que contienen todos los términos de ``q``, por relevancia."""
+    V = models.Vehicle
+    terms = _terms(q)
+    candidates = Config.SEARCH_CANDIDATES
+
+    if db.get_bind().dialect.name == "postgresql":
+        expr = literal_column(PG_SEARCH_EXPR)
+        inner = select(V.id, expr.label("doc")).where(
+            and_(*[expr.like(f"%{_like_escape(t.lower())}%", escape="\\") for t in terms])
+        )
+        if status is not None:
+            inner = inner.where(V.status == status)
+        cand = inner.order_by(V.id.desc()).limit(candidates).subquery("cand")
+        stmt = select(cand.c.id).order_by(func.word_similarity(q.lower(), cand.c.doc).desc(), cand.c.id)
+    else:
+        # Términos cortos (< 3 con trigram) no sirven para MATCH: se filtran con LIKE
+        # sobre las filas candidatas que ya encontró el índice.
+        long_terms = [t for t in terms if len(t) >= MIN_TERM]
+        short_terms = [t for t in terms if len(t) < MIN_TERM]
+        suffix = "" if SQLITE_TRIGRAM else "*"
+        match = " ".join('"' + t.replace('"', '""') + '"' + suffix for t in long_terms)
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        # FTS5 recorre las coincidencias por rowid (descendente sin ordenar) y
+        # calcula bm25 sólo para las filas que devuelve: LIMIT antes de ordenar
+        fts = table("vehicles_fts", column("rowid", Integer))
+        rank = literal_column(f"bm25(vehicles_fts, {weights})", Float).label("rank")
+        inner = (
+            select(V.id, rank)
+            .select_from(fts)
+            .join(V, V.id == fts.c.rowid)
+            .where(text("vehicles_fts MATCH :match").bindparams(match=match))
+        )
+        for t in short_terms:
+            pattern = f"%{_like_escape(t)}%"
+            inner = inner.where(
+                func.coalesce(V.vin, "").like(pattern, escape="\\")
+                | func.coalesce(V.plate, "").like(pattern, escape="\\")
+                | V.brand.like(pattern, escape="\\")
+                | V.model.like(pattern, escape="\\")
+                | V.seller_name.like(pattern, escape="\\")
+                | func.coalesce(V.seller_document, "").like(pattern, escape="\\")
+            )
+        if status is not None:
+            inner = inner.where(V.status == status)
+        cand = inner.order_by(fts.c.rowid.desc()).limit(candidates).subquery("cand")
+        stmt = select(cand.c.id).order_by(cand.c.rank, cand.c.id)
+
+    return list(db.execute(stmt.limit(limit).offset(offset)).scalars())
@@ -0,0 +1,180 @@
+"""Proyección ``vehicle_summary``: costos, venta, cobranza y foto por vehículo.
+
+Cada fila se recalcula completa desde las tablas base con ``refresh(db, ids)``
+(un DELETE + un INSERT ... SELECT agrupado, sólo para esos vehículos y por
+los índices de FK), en la misma transacción de la escritura que la cambia:
+vehículos, costos/trámites, ventas, pagos y fotos.  Recalcular en vez de
+sumar deltas evita que la proyección se desvíe si dos escrituras tocan el
+mismo vehículo.
+
+``rebuild`` la regenera entera y ``verify`` la compara con un cálculo fresco::
+
+    python -m autogo_erp.summary verify [--url URL]
+    python -m autogo_erp.summary rebuild [--url URL]
+
+Los días en stock no se guardan (cambian cada día): se derivan de
+``received_date`` y ``sold_at`` al leer (ver schemas.VehicleSummaryRead).
+"""
+
+import argparse
+from typing import Iterable, Union
+
+from sqlalchemy import Date, Float, Numeric, case, cast, delete, func, insert, select
+from sqlalchemy.sql import Select
+
+from autogo_erp import models
+from autogo_erp.models_costos import Costo
+
+# Tipos de costo con columna propia; cualquier otro suma en cost_otros
+COST_TIPOS = ("tramite", "compra", "transporte", "reparacion")
+
+COLUMNS = [
+    "vehicle_id", "vin", "brand", "model", "year", "status", "received_date",
+    *[f"cost_{t}" for t in COST_TIPOS], "cost_otros", "total_cost",
+    "sale_price", "sold_at", "amount_paid", "balance", "margin", "main_photo_url",
+]
+
+IdsArg = Union[Iterable[int], Select]
+
+
+def _money(expr):
+    # Redondeo a centavos: el mismo resultado sin importar el orden de la suma
+    return cast(func.round(cast(expr, Numeric), 2), Float)
+
+
+def _as_date(expr, dialect_name: str):
+    if dialect_name == "sqlite":
+        return func.date(expr)
+    return cast(expr, Date)
+
+
+def summary_select(dialect_name: str, ids=None) -> Select:
+    """SELECT con las columnas de ``COLUMNS`` calculadas desde las tablas base."""
+    V, S, P, Ph = models.Vehicle, models.Sale, models.Payment, models.Photo
+
+    costs = select(
+        Costo.vehiculo_id.label("vehicle_id"),
+        *[_money(func.sum(case((Costo.tipo == t, Costo.monto), else_=0.0))).label(f"cost_{t}")
+          for t in COST_TIPOS],
+        _money(func.sum(case((Costo.tipo.not_in(COST_TIPOS), Costo.monto), else_=0.0))).label("cost_otros"),
+        _money(func.sum(Costo.monto)).label("total_cost"),
+    ).group_by(Costo.vehiculo_id)
+    sales = select(
+        S.vehicle_id,
+        _money(func.sum(S.sale_price)).label("sale_price"),
+        func.min(S.sale_date).label("sold_at"),
+    ).group_by(S.vehicle_id)
+    pays = select(
+        S.vehicle_id,
+        _money(func.sum(P.amount)).label("amount_paid"),
+    ).join(P, P.sale_id == S.id).group_by(S.vehicle_id)
+
+    vehicles = select(V.id, V.vin, V.brand, V.model, V.year, V.status, V.received_date)
+    if ids is not None:
+        vehicles = vehicles.where(V.id.in_(ids))
+        costs = costs.where(Costo.vehiculo_id.in_(ids))
+        sales = sales.where(S.vehicle_id.in_(ids))
+        pays = pays.where(S.vehicle_id.in_(ids))
+    vehicles, costs, sales, pays = (q.subquery() for q in (vehicles, costs, sales, pays))
+
+    photo = (
+        select(Ph.url).where(Ph.vehicle_id == vehicles.c.id)
+        .order_by(Ph.is_main.desc(), Ph.id).limit(1).scalar_subquery()
+    )
+    total_cost = func.coalesce(costs.c.total_cost, 0.0)
+    amount_paid = func.coalesce(pays.c.amount_paid, 0.0)
+    return (
+        select(
+            vehicles.c.id.label("vehicle_id"),
+            vehicles.c.vin, vehicles.c.brand, vehicles.c.model, vehicles.c.year,
+            vehicles.c.status, vehicles.c.received_date,
+            *[func.coalesce(costs.c[f"cost_{t}"], 0.0).label(f"cost_{t}") for t in COST_TIPOS],
+            func.coalesce(costs.c.cost_otros, 0.0).label("cost_otros"),
+            total_cost.label("total_cost"),
+            sales.c.sale_price,
+            _as_date(sales.c.sold_at, dialect_name).label("sold_at"),
+            amount_paid.label("amount_paid"),
+            _money(sales.c.sale_price - amount_paid).label("balance"),
+            _money(sales.c.sale_price - total_cost).label("margin"),
+            photo.label("main_photo_url"),
+        )
+        .outerjoin(costs, costs.c.vehicle_id == vehicles.c.id)
+        .outerjoin(sales, sales.c.vehicle_id == vehicles.c.id)
+        .outerjoin(pays, pays.c.vehicle_id == vehicles.c.id)
+    )
+
+
+def _dialect_name(db) -> str:
+    return db.dialect.name if hasattr(db, "dialect") else db.get_bind().dialect.name
+
+
+def refresh(db, ids: IdsArg) -> None:
+    """Recalcula las filas de ``ids`` (ids o un SELECT de ids) en la transacción actual.
+
+    Sirve con Session o Connection.  Los ids de vehículos borrados sólo
+    pierden su fila.  Con una Session hay que hacer flush antes si hay
+    cambios pendientes (SessionLocal no usa autoflush).
+    """
+    if not isinstance(ids, Select):
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return
+    T = models.VehicleSummary.__table__
+    db.execute(delete(T).where(T.c.vehicle_id.in_(ids)))
+    db.execute(insert(T).from_select(COLUMNS, summary_select(_dialect_name(db), ids)))
+
+
+def rebuild(db) -> int:
+    """Regenera toda la proyección; devuelve la cantidad de filas."""
+    T = models.VehicleSummary.__table__
+    db.execute(delete(T))
+    db.execute(insert(T).from_select(COLUMNS, summary_select(_dialect_name(db))))
+    return db.execute(select(func.count()).select_from(T)).scalar()
+
+
+def verify(db, sample: int = 20) -> dict:
+    """Compara la proyección con un cálculo fresco (EXCEPT en ambos sentidos)."""
+    T = models.VehicleSummary.__table__
+    expected = summary_select(_dialect_name(db))
+    actual = select(*[T.c[name] for name in COLUMNS])
+
+    def diff(a, b):
+        sub = a.except_(b).subquery()
+        count = db.execute(select(func.count()).select_from(sub)).scalar()
+        ids = list(db.execute(select(sub.c.vehicle_id).order_by(sub.c.vehicle_id).limit(sample)).scalars())
+        return count, ids
+
+    wrong, wrong_ids = diff(expected, actual)
+    stale, stale_ids = diff(actual, expected)
+    return {
+        "ok": wrong == 0 and stale == 0,
+        "rows": db.execute(select(func.count()).select_from(T)).scalar(),
+        "missing_or_wrong": wrong,
+        "missing_or_wrong_ids": wrong_ids,
+        "stale": stale,
+        "stale_ids": stale_ids,
+    }
+
+
+def main(argv=None) -> None:
+    from autogo_erp.database import DATABASE_URL, make_engine
+
+    parser = argparse.ArgumentParser(description="Reconstruir o verificar vehicle_summary")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--url", default=DATABASE_URL, help="URL SQLAlchemy (por defecto la de la app)")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.url, "summary")
+    if args.command == "rebuild":
+        with engine.begin() as conn:
+            print(f"{rebuild(conn)} filas en vehicle_summary")
+    else:
+        with engine.connect() as conn:
+            result = verify(conn)
+        print(result)
+        if not result["ok"]:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Generador de inventario sintético para benchmarks.
+
+Llena ``vehicles``, ``photos``, ``sales``, ``payments``, ``tramites`` y ``costos`` con
+distribuciones realistas (marcas/modelos ponderados, kilometraje según la
+edad, ~55% vendidos, pagos parciales, costos por tipo).  Todo sale de un
+``random.Random(seed)``, así que la misma semilla y escala producen
+exactamente los mismos datos.  Las inserciones son masivas (executemany por
+bloques) con ids asignados por el generador, sin ORM ni RETURNING.
+
+Uso::
+
+    python -m autogo_erp.synthetic --url sqlite:///./bench.db --scale 100k --seed 42
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+
+from autogo_erp.database import Base
+from autogo_erp import models, summary, versioning
+from autogo_erp.models_costos import Costo, Tramite
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# (marca, peso, modelos, precio base USD)
+BRANDS = [
+    ("Toyota", 24, ["Corolla", "Yaris", "Hilux", "RAV4", "Fortuner", "Prado"], 18000),
+    ("Hyundai", 16, ["Elantra", "Accent", "Tucson", "Santa Fe", "Creta"], 15000),
+    ("Kia", 13, ["Rio", "Picanto", "Sportage", "Seltos", "Sorento"], 14000),
+    ("Nissan", 11, ["Sentra", "Versa", "Frontier", "X-Trail", "Kicks"], 15000),
+    ("Honda", 9, ["Civic", "CR-V", "HR-V", "Fit", "Accord"], 17000),
+    ("Mitsubishi", 7, ["L200", "Montero Sport", "Outlander", "ASX"], 16000),
+    ("Suzuki", 7, ["Swift", "Vitara", "Jimny", "Ertiga"], 12000),
+    ("Mazda", 6, ["Mazda3", "CX-5", "CX-30", "BT-50"], 17000),
+    ("Chevrolet", 4, ["Spark", "Sail", "Tracker", "Colorado"], 12000),
+    ("Ford", 3, ["Ranger", "Escape", "Explorer"], 20000),
+]
+COST_TYPES = [
+    # (tipo, peso, monto mínimo, monto máximo, descripciones)
+    ("tramite", 30, 15, 250, ["Traspaso", "Revisado", "Placa", "Paz y salvo", "Notaría"]),
+    ("reparacion", 25, 40, 2500, ["Frenos", "Pintura", "Llantas", "Motor", "Suspensión"]),
+    ("transporte", 15, 30, 400, ["Grúa", "Traslado sucursal", "Flete"]),
+    ("compra", 10, 2000, 25000, ["Compra a cliente", "Compra en subasta"]),
+    ("otros", 20, 5, 300, ["Lavado", "Detallado", "Publicidad", "Combustible"]),
+]
+PAYMENT_METHODS = ["cash", "card", "transfer", "check"]
+VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+
+
+def _weighted(rng, items):
+    return rng.choices(items, weights=[i[1] for i in items], k=1)[0]
+
+
+def _vehicle_rows(rng, first_id, count, today):
+    vehicles, photos, sales, payments, tramites, costos = [], [], [], [], [], []
+    for vid in range(first_id, first_id + count):
+        brand, _, brand_models, base_price = _weighted(rng, BRANDS)
+        year = int(rng.triangular(2005, today.year, today.year - 6))
+        age = max(today.year - year, 0)
+        received = today - timedelta(days=int(rng.expovariate(1 / 180)) % 1095)
+        sold = rng.random() < 0.55
+        status = models.VehicleStatus.SOLD if sold else models.VehicleStatus.AVAILABLE
+
+        vehicles.append({
+            "id": vid,
+            # 10 aleatorios + 7 dígitos del id => 17 caracteres, único por id
+            "vin": "".join(rng.choice(VIN_CHARS) for _ in range(10)) + f"{vid:07d}",
+            "plate": f"{rng.choice('ABCDEFGH')}{vid:07d}" if rng.random() < 0.85 else None,
+            "brand": brand,
+            "model": rng.choice(brand_models),
+            "year": year,
+            "odometer_km": round(max(age, 0.3) * rng.uniform(8000, 22000), 0),
+            "acquisition_type": (
+                models.AcquisitionType.TRADE_IN if rng.random() < 0.6
+                else models.AcquisitionType.DIRECT_SALE
+            ),
+            "seller_name": f"Cliente {rng.randint(1, count * 2):07d}",
+            "seller_contact": f"+5076{rng.randint(0, 9999999):07d}" if rng.random() < 0.9 else None,
+            "seller_document": f"CED-{rng.randint(1, 9)}-{rng.randint(1, 999)}-{rng.randint(1, 9999)}",
+            "received_date": received if rng.random() < 0.97 else None,
+            "status": status,
+        })
+
+        for n in range(rng.choices([0, 1, 3, 5, 8], weights=[5, 10, 40, 35, 10])[0]):
+            photos.append({
+                "vehicle_id": vid,
+                "url": f"/static/photos/{vid}/{n}.jpg",
+                "is_main": n == 0,
+            })
+
+        price = round(base_price * (0.92 ** age) * rng.uniform(0.85, 1.2), -1)
+        lineas = []
+        for _ in range(rng.choices([1, 2, 3, 4, 6], weights=[15, 30, 30, 15, 10])[0]):
+            tipo, _, lo, hi, descs = _weighted(rng, COST_TYPES)
+            costo = {
+                "vehiculo_id": vid,
+                "tipo": tipo,
+                "descripcion": rng.choice(descs),
+                "monto": round(rng.uniform(lo, hi), 2),
+                "referencia": f"T-{vid:07d}" if tipo == "tramite" else None,
+                "tramite_id": vid if tipo == "tramite" else None,
+            }
+            costos.append(costo)
+            if tipo == "tramite":
+                lineas.append(costo)
+        if lineas:
+            # Un trámite por vehículo (mismo id que el vehículo) con sus líneas
+            tramites.append({
+                "id": vid,
+                "referencia": f"T-{vid:07d}",
+                "vehiculo_id": vid,
+                "fecha": received or today,
+                "total": round(sum(c["monto"] for c in lineas), 2),
+                "items_count": len(lineas),
+            })
+
+        if sold:
+            sale_id = vid  # una venta por vehículo vendido; el id del vehículo es único
+            sale_date = datetime.combine(received or today, datetime.min.time()) + timedelta(
+                days=int(rng.expovariate(1 / 45)), hours=rng.randint(8, 18)
+            )
+            paid = 0.0
+            fully_paid = rng.random() < 0.7
+            n_pay = rng.choices([1, 2, 3, 4], weights=[50, 25, 15, 10])[0]
+            for k in range(n_pay):
+                if fully_paid and k == n_pay - 1:
+                    amount = round(price - paid, 2)
+                else:
+                    amount = round(price * rng.uniform(0.1, 0.5) / n_pay, 2)
+                if amount <= 0:
+                    break
+                paid += amount
+                payments.append({
+                    "sale_id": sale_id,
+                    "amount": amount,
+                    "paid_at": sale_date + timedelta(days=k * rng.randint(7, 30)),
+                    "method": rng.choice(PAYMENT_METHODS),
+                    "reference": f"REC-{sale_id:07d}-{k}",
+                })
+            sales.append({
+                "id": sale_id,
+                "vehicle_id": vid,
+                "sale_date": sale_date,
+                "sale_price": price,
+                "amount_paid": round(paid, 2),
+                "status": models.SaleStatus.PAID if paid >= price else models.SaleStatus.OPEN,
+                "notes": None,
+            })
+    return vehicles, photos, sales, payments, tramites, costos
+
+
+def generate(engine, vehicles: int, seed: int = 42, chunk_size: int = 5000, today: date = None) -> dict:
+    """Inserta ``vehicles`` vehículos sintéticos (y sus filas hijas) en ``engine``.
+
+    Los ids continúan a partir del máximo existente, así que se puede llamar
+    varias veces sobre la misma base.  Devuelve el conteo de filas por tabla.
+    """
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    today = today or date(2025, 8, 31)  # fecha fija: mismos datos en cualquier día
+    tables = [
+        models.Vehicle.__table__,
+        models.Photo.__table__,
+        models.Sale.__table__,
+        models.Payment.__table__,
+        Tramite.__table__,
+        Costo.__table__,
+    ]
+    totals = {t.name: 0 for t in tables}
+
+    with engine.connect() as conn:
+        first_id = (conn.execute(select(func.max(models.Vehicle.id))).scalar() or 0) + 1
+        first_id = max(first_id, (conn.execute(select(func.max(models.Sale.id))).scalar() or 0) + 1)
+        first_id = max(first_id, (conn.execute(select(func.max(Tramite.id))).scalar() or 0) + 1)
+
+    done = 0
+    while done < vehicles:
+        n = min(chunk_size, vehicles - done)
+        batches = _vehicle_rows(rng, first_id + done, n, today)
+        with engine.begin() as conn:
+            for table, rows in zip(tables, batches):
+                if rows:
+                    conn.execute(insert(table), rows)
+                    totals[table.name] += len(rows)
+            V = models.Vehicle
+            summary.refresh(conn, select(V.id).where(V.id.between(first_id + done, first_id + done + n - 1)))
+        done += n
+
+    # Invalidar los ETag de los listados ya servidos
+    with engine.begin() as conn:
+        for name in versioning.TABLES:
+            versioning.bump(conn, name)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera inventario sintético de AutoGo ERP")
+    parser.add_argument("--url", default="sqlite:///./bench.db", help="URL SQLAlchemy destino")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--vehicles", type=int, help="cantidad exacta (ignora --scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.url)
+    started = time.perf_counter()
+    totals = generate(engine, args.vehicles or SCALES[args.scale], seed=args.seed, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    for name, count in totals.items():
+        print(f"{name:>10}: {count}")
+    print(f"listo en {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Entorno Jinja compartido por main.py y las vistas HTML.
+
+Los templates compilados se guardan en ``Config.JINJA_CACHE_DIR``
+(``FileSystemBytecodeCache``): un worker nuevo carga el bytecode en vez de
+volver a parsear y compilar.  La clave incluye un checksum del fuente, así
+que editar un template invalida su entrada.
+"""
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+
+from autogo_erp.assets import asset_url
+from autogo_erp.config import Config
+
+Config.JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+templates = Jinja2Templates(directory="templates")
+templates.env.bytecode_cache = FileSystemBytecodeCache(str(Config.JINJA_CACHE_DIR))
+# {{ asset_url("css/main.css") }} -> /static/dist/css/main.<hash>.css (ver assets.py)
+templates.env.globals["asset_url"] = asset_url
@@ -0,0 +1,103 @@
+"""Sellos de versión por tabla y por fila para GET condicionales (ETag).
+
+Cada escritura llama a ``bump(db, tabla)`` dentro de su transacción; la
+versión nueva se guarda además en ``Vehicle.row_version`` de las filas
+tocadas.  Como el contador de la tabla sólo crece, el par (id, row_version)
+nunca se repite aunque un id se borre y se reutilice.
+
+Los endpoints de lectura arman el ETag con ``current()`` (una consulta por
+clave primaria, sin ORM ni pydantic) y responden 304 si coincide con
+``If-None-Match``.
+"""
+
+import hashlib
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import func, insert, select, update
+
+from autogo_erp.models import TableVersion
+
+# Tablas con versión propia
+TABLES = ("vehicles", "costos")
+
+# Canal NOTIFY (PostgreSQL) por el que se avisa a otros workers de cada bump
+NOTIFY_CHANNEL = "autogo_versions"
+
+
+def _initial_version() -> int:
+    # Arrancar desde la hora actual evita repetir ETags si la base se recrea
+    return int(time.time())
+
+
+def ensure_rows(conn) -> None:
+    """Crea la fila de versión de cada tabla conocida si falta."""
+    existing = set(conn.execute(select(TableVersion.name)).scalars())
+    missing = [{"name": t, "version": _initial_version()} for t in TABLES if t not in existing]
+    if missing:
+        conn.execute(insert(TableVersion), missing)
+
+
+def bump(db, name: str) -> int:
+    """Incrementa la versión de ``name`` en la transacción actual y la devuelve."""
+    T = TableVersion
+    result = db.execute(update(T).where(T.name == name).values(version=T.version + 1))
+    if result.rowcount == 0:
+        db.execute(insert(T).values(name=name, version=_initial_version()))
+    version = db.execute(select(T.version).where(T.name == name)).scalar_one()
+    dialect = db.dialect if hasattr(db, "dialect") else db.get_bind().dialect  # Connection o Session
+    if dialect.name == "postgresql":
+        # Se entrega al hacer commit (y se descarta si hay rollback)
+        db.execute(select(func.pg_notify(NOTIFY_CHANNEL, f"{name}:{version}")))
+    return version
+
+
+def current(db, name: str) -> int:
+    return db.execute(select(TableVersion.version).where(TableVersion.name == name)).scalar() or 0
+
+
+# ===== Variantes para AsyncSession (modo async, ver database.py) =====
+
+async def bump_async(db, name: str) -> int:
+    T = TableVersion
+    result = await db.execute(update(T).where(T.name == name).values(version=T.version + 1))
+    if result.rowcount == 0:
+        await db.execute(insert(T).values(name=name, version=_initial_version()))
+    version = (await db.execute(select(T.version).where(T.name == name))).scalar_one()
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_notify(NOTIFY_CHANNEL, f"{name}:{version}")))
+    return version
+
+
+async def current_async(db, name: str) -> int:
+    result = await db.execute(select(TableVersion.version).where(TableVersion.name == name))
+    return result.scalar() or 0
+
+
+# ===== ETag / If-None-Match =====
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def query_fingerprint(request: Request) -> str:
+    """Huella estable de los query params (el mismo listado con otros filtros es otro recurso)."""
+    items = sorted(request.query_params.multi_items())
+    return hashlib.sha1(repr(items).encode()).hexdigest()[:16]
+
+
+def not_modified(request: Request, etag: str):
+    """Devuelve una respuesta 304 si ``If-None-Match`` coincide con ``etag``; si no, None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = [t.strip() for t in header.split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    # Los clientes pueden guardar la respuesta pero deben revalidarla siempre
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,66 @@
+"""Harness de los tests: la app en proceso (TestClient) sobre una base SQLite temporal.
+
+La configuración se lee al importar ``autogo_erp``: el entorno se fija acá,
+antes de cualquier import de la app.
+"""
+
+import itertools
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+TMP = Path(tempfile.mkdtemp(prefix="autogo-tests-"))
+# Un contador para toda la sesión: VINs únicos entre tests (la base es compartida)
+_VIN_SEQ = itertools.count(1)
+
+for _key in ("AUTOERP_DATABASE_URL", "DATABASE_URL", "AUTOERP_READ_DATABASE_URL"):
+    os.environ.pop(_key, None)
+os.environ.update({
+    "AUTOERP_DB_PATH": str(TMP / "app.db"),
+    "AUTOERP_MEDIA_ROOT": str(TMP / "media"),
+    "AUTOERP_PROFILE_DIR": str(TMP / "profiles"),
+    "AUTOERP_STATIC_DIR": str(ROOT / "static"),
+    "AUTOERP_PDF_WARM_ON_STARTUP": "0",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from autogo_erp.main import app
+
+    with TestClient(app) as c:  # startup: migraciones, broker, métricas
+        yield c
+
+
+@pytest.fixture
+def make_vehicle(client):
+    """Crea un vehículo por la API y devuelve su JSON."""
+    def make(**fields):
+        data = {
+            "vin": f"T{next(_VIN_SEQ):011d}",
+            "brand": "Toyota",
+            "model": "Corolla",
+            "year": 2020,
+            "odometer_km": 1000,
+            "acquisition_type": "DIRECT_SALE",
+            "seller_name": "Tests",
+            **fields,
+        }
+        response = client.post("/vehicles/", json=data)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def dataset(client):
+    """Inventario sintético de los benchmarks (synthetic.generate) en la base de la app."""
+    from autogo_erp import database, synthetic
+
+    return synthetic.generate(database.engine, 400, seed=7)
@@ -0,0 +1,79 @@
+"""Rutas /admin: piden el token de admin; /admin/profiles acepta también el del perfilador."""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from autogo_erp import profiling
+from autogo_erp.config import Config
+
+TOKEN = "s3cret"
+ADMIN = "adm1n"
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(Config, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", ADMIN)
+    return TOKEN
+
+
+def test_profiles_require_token(client, token):
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Autogo-Profile": "nope"}).status_code == 403
+    assert client.get("/admin/profiles/x-1").status_code == 403
+    assert client.get("/admin/profiles/x-1.folded").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Autogo-Profile": token}).status_code == 200
+    assert client.get("/admin/profiles", params={"__profile": token}).status_code == 200
+    assert client.get("/admin/profiles/x-1", params={"__profile": token}).status_code == 404
+
+
+def test_profiles_accept_admin_token(client, token):
+    assert client.get("/admin/profiles", headers={"X-Autogo-Admin": ADMIN}).status_code == 200
+    assert client.get("/admin/profiles", headers={"X-Autogo-Admin": token}).status_code == 403
+
+
+def test_profiles_closed_without_token(client, monkeypatch):
+    monkeypatch.setattr(Config, "PROFILE_TOKEN", None)
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiles", params={"__profile": ""}).status_code == 403
+    assert client.get("/admin/cache", headers={"X-Autogo-Admin": ""}).status_code == 403
+
+
+def test_stored_query_drops_token():
+    scope = {"method": "GET", "path": "/vehicles/", "query_string": b"limit=5&__profile=s3cret&q=a+b"}
+
+    async def build():
+        return profiling.Profile(scope, "requested")
+
+    assert asyncio.run(build()).query == "limit=5&q=a+b"
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/admin/cache"),
+    ("POST", "/admin/cache/clear"),
+    ("GET", "/admin/pool"),
+    ("GET", "/admin/summary/verify"),
+    ("POST", "/admin/summary/rebuild"),
+])
+def test_admin_routes_require_token(client, token, method, path):
+    assert client.request(method, path).status_code == 403
+    assert client.request(method, path, headers={"X-Autogo-Admin": "nope"}).status_code == 403
+    # El token del perfilador no abre el resto de /admin
+    assert client.request(method, path, headers={"X-Autogo-Profile": token}).status_code == 403
+    assert client.request(method, path, headers={"X-Autogo-Admin": token}).status_code == 403
+    assert client.request(method, path, headers={"X-Autogo-Admin": ADMIN}).status_code == 200
+
+
+@pytest.mark.parametrize("admin, expected", [(None, TOKEN), (ADMIN, ADMIN)])
+def test_admin_token_falls_back_to_profile_token(admin, expected):
+    env = {k: v for k, v in os.environ.items() if k != "AUTOERP_ADMIN_TOKEN"}
+    env["AUTOERP_PROFILE_TOKEN"] = TOKEN
+    if admin:
+        env["AUTOERP_ADMIN_TOKEN"] = admin
+    out = subprocess.run([sys.executable, "-c", "from autogo_erp.config import Config; print(Config.ADMIN_TOKEN)"],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == expected
@@ -0,0 +1,103 @@
+"""Control de admisión: Gate (cola, espera máxima, cancelación) y clasificación de rutas."""
+
+import asyncio
+
+import pytest
+from fastapi.routing import APIRoute
+
+from autogo_erp import admission
+from autogo_erp.config import Config
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_queue_full_is_rejected_at_once():
+    async def scenario():
+        gate = admission.Gate("t", concurrency=1, queue_size=1, max_wait_ms=1000)
+        assert await gate.acquire() is None
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+        assert await gate.acquire() == "queue_full"
+        gate.release()  # el lugar pasa al que espera
+        assert await waiter is None
+        assert (gate.active, gate.queued) == (1, 0)
+        gate.release()
+        assert gate.active == 0
+    _run(scenario())
+
+
+def test_waiters_are_served_in_order():
+    async def scenario():
+        gate = admission.Gate("t", concurrency=1, queue_size=5, max_wait_ms=1000)
+        await gate.acquire()
+        order = []
+
+        async def wait(n):
+            await gate.acquire()
+            order.append(n)
+
+        tasks = [asyncio.ensure_future(wait(n)) for n in range(3)]
+        await asyncio.sleep(0)
+        assert gate.queued == 3
+        for _ in range(3):
+            gate.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+    _run(scenario())
+
+
+def test_max_wait_times_out():
+    async def scenario():
+        gate = admission.Gate("t", concurrency=1, queue_size=5, max_wait_ms=20)
+        await gate.acquire()
+        assert await gate.acquire() == "timeout"
+        assert (gate.active, gate.queued) == (1, 0)
+        gate.release()
+        assert gate.active == 0
+    _run(scenario())
+
+
+@pytest.mark.parametrize("handed_off", [False, True])
+def test_cancelled_waiter_does_not_leak_a_slot(handed_off):
+    async def scenario():
+        gate = admission.Gate("t", concurrency=1, queue_size=5, max_wait_ms=1000)
+        await gate.acquire()
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        if handed_off:
+            gate.release()  # el lugar ya es suyo, pero se cancela antes de despertar
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        if not handed_off:
+            assert gate.queued == 0
+            gate.release()
+        assert (gate.active, gate.queued) == (0, 0)
+        assert await gate.acquire() is None
+    _run(scenario())
+
+
+def test_rejected_request_gets_503_with_retry_after(client, monkeypatch):
+    gate = admission.gates["read"]
+    monkeypatch.setattr(gate, "concurrency", 0)
+    monkeypatch.setattr(gate, "queue_size", 0)
+    response = client.get("/vehicles/1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(Config.ADMISSION_RETRY_AFTER_SECONDS)
+    assert response.json() == {"detail": "Server busy, retry later"}
+    # /health no pasa por ningún gate
+    assert client.get("/health").status_code == 200
+
+
+def test_listed_templates_match_existing_routes(client):
+    routes = [r for r in client.app.routes if isinstance(r, APIRoute)]
+    existing = {(m, r.path) for r in routes for m in r.methods}
+    assert sorted(admission.BULK_ROUTES - existing) == []
+    assert sorted(p for p in admission.LIST_ROUTES if ("GET", p) not in existing) == []
+    for prefix in admission.BULK_PREFIXES + admission.LIST_PREFIXES:
+        assert any(r.path.startswith(prefix) for r in routes), prefix
+    assert {"/health", "/metrics"} <= {r.path for r in client.app.routes}
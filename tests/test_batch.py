@@ -0,0 +1,117 @@
+"""POST /vehicles/batch: un lote mixto se aplica entero o no se aplica."""
+
+from sqlalchemy import func, select
+
+from autogo_erp import database, models
+
+
+def _new(vin, **fields):
+    return {"op": "create", "data": {
+        "vin": vin, "brand": "Kia", "model": "Rio", "year": 2021, "odometer_km": 10,
+        "acquisition_type": "DIRECT_SALE", "seller_name": "Batch", **fields,
+    }}
+
+
+def _batch(client, *operations):
+    return client.post("/vehicles/batch", json={"operations": list(operations)})
+
+
+def _count():
+    with database.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(models.Vehicle)).scalar()
+
+
+def _errors(response):
+    return {r["index"]: r["error"] for r in response.json()["results"] if not r["ok"]}
+
+
+def test_mixed_batch_applies_everything(client, make_vehicle):
+    # gone no es el id más alto: SQLite reutilizaría su id para el vehículo creado
+    gone, keep = make_vehicle(plate="bt-002"), make_vehicle(plate="bt-001")
+    response = _batch(
+        client,
+        _new("BATCHMIX0001", plate="bt-002"),  # reutiliza la placa del vehículo borrado
+        {"op": "update", "id": keep["id"], "data": {"brand": "Mazda", "status": "SOLD"}},
+        {"op": "delete", "id": gone["id"]},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["ok"] and body["row_version"]
+    created_id = body["results"][0]["id"]
+
+    created = client.get(f"/vehicles/{created_id}").json()
+    assert (created["vin"], created["plate"]) == ("BATCHMIX0001", "BT-002")
+    updated = client.get(f"/vehicles/{keep['id']}").json()
+    assert (updated["brand"], updated["status"]) == ("Mazda", "SOLD")
+    with database.engine.connect() as conn:
+        versions = conn.execute(select(models.Vehicle.row_version)
+                                .where(models.Vehicle.id.in_([created_id, keep["id"]]))).scalars().all()
+    assert versions == [body["row_version"]] * 2
+    assert client.get(f"/vehicles/{gone['id']}").status_code == 404
+
+
+def test_conflicts_inside_the_batch(client, make_vehicle):
+    vehicle = make_vehicle()
+    before = _count()
+    response = _batch(
+        client,
+        _new("BATCHDUP0001", plate="bt-dup"),
+        _new("BATCHDUP0001"),
+        _new("BATCHDUP0002", plate="BT-DUP"),
+        {"op": "update", "id": vehicle["id"], "data": {"odometer_km": 5}},
+        {"op": "delete", "id": vehicle["id"]},
+    )
+    assert response.status_code == 400
+    errors = _errors(response)
+    assert errors[1] == "VIN 'BATCHDUP0001' repeated in batch (operation 0)"
+    assert errors[2] == "Plate 'BT-DUP' repeated in batch (operation 0)"
+    assert errors[4] == f"Vehicle {vehicle['id']} already used by operation 3"
+    assert 0 not in errors and 3 not in errors
+    assert _count() == before
+
+
+def test_conflicts_against_the_database(client, make_vehicle):
+    first, second, third = make_vehicle(plate="bt-db1"), make_vehicle(), make_vehicle()
+    response = _batch(
+        client,
+        _new(first["vin"]),
+        _new("BATCHDB00001", plate="bt-db1"),
+        {"op": "update", "id": second["id"], "data": {"vin": third["vin"]}},
+        {"op": "delete", "id": 999999999},
+    )
+    assert response.status_code == 400
+    assert _errors(response) == {
+        0: f"VIN '{first['vin']}' already exists",
+        1: "Plate 'BT-DB1' already exists",
+        2: f"VIN '{third['vin']}' already exists",
+        3: "Vehicle not found",
+    }
+
+
+def test_one_invalid_operation_rolls_back_the_batch(client, make_vehicle):
+    vehicle = make_vehicle()
+    before = _count()
+    response = _batch(
+        client,
+        _new("BATCHRB00001"),
+        {"op": "update", "id": vehicle["id"], "data": {"brand": "Changed"}},
+        {"op": "delete", "id": 999999999},
+    )
+    assert response.status_code == 400
+    assert [r["ok"] for r in response.json()["results"]] == [True, True, False]
+    assert _count() == before
+    assert client.get(f"/vehicles/{vehicle['id']}").json()["brand"] == vehicle["brand"]
+    assert client.get("/vehicles/search", params={"q": "BATCHRB00001"}).json() == []
+
+
+def test_null_vin_is_a_validation_error(client, make_vehicle):
+    vehicle = make_vehicle()
+    response = _batch(client, {"op": "update", "id": vehicle["id"], "data": {"vin": None, "brand": None}})
+    assert response.status_code == 400
+    assert _errors(response) == {0: "vin, brand cannot be null"}
+
+    response = client.patch(f"/vehicles/{vehicle['id']}", json={"vin": None})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "vin cannot be null"
+    # null sigue siendo válido en columnas opcionales
+    assert client.patch(f"/vehicles/{vehicle['id']}", json={"plate": None}).status_code == 200
@@ -0,0 +1,95 @@
+"""Motores y pool: contadores de espera y base por defecto."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, TimeoutError
+
+from autogo_erp import database
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _engine(name, url):
+    return create_engine(url, poolclass=type("Pool", (database.TimedQueuePool,), {"stats_name": name}),
+                         pool_size=1, max_overflow=0, pool_timeout=0.05)
+
+
+def test_pool_timeouts_count_only_timeouts(tmp_path):
+    engine = _engine("tests-timeout", f"sqlite:///{tmp_path / 'a.db'}")
+    with engine.connect():
+        with pytest.raises(TimeoutError):
+            engine.connect()
+    broken = _engine("tests-broken", f"sqlite:///{tmp_path / 'missing' / 'b.db'}")
+    with pytest.raises(OperationalError):
+        broken.connect()
+
+    stats = database.pool_stats.snapshot()
+    assert stats["tests-timeout"]["timeouts"] == 1
+    assert stats.get("tests-broken", {}).get("timeouts", 0) == 0
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_default_db_keeps_legacy_test_db(tmp_path, legacy):
+    if legacy:
+        (tmp_path / "test.db").touch()
+    code = "from autogo_erp.config import Config; print(Config.DATABASE_URL)"
+    env = {"PATH": "", "PYTHONPATH": str(ROOT)}
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True).stdout.strip()
+    expected = tmp_path / "test.db" if legacy else ROOT / "autogo_erp" / "autogo.db"
+    assert out == f"sqlite:///{expected}"
+
+
+# ===== Ruteo lectura/escritura (session_for) =====
+@pytest.fixture
+def used_engines():
+    """Nombres de los motores que ejecutaron SQL sobre ``tramites`` (el broker en vivo no la lee)."""
+    from sqlalchemy import event
+
+    seen = []
+    listeners = []
+    for name, eng in (("primary", database.engine), ("read", database.read_engine)):
+        def record(conn, cursor, statement, *args, _name=name):
+            if "tramites" in statement:
+                seen.append(_name)
+        event.listen(eng, "before_cursor_execute", record)
+        listeners.append((eng, record))
+    yield seen
+    for eng, record in listeners:
+        event.remove(eng, "before_cursor_execute", record)
+
+
+def _get(client, seen, path, **kwargs):
+    seen.clear()
+    assert client.get(path, **kwargs).status_code == 200
+    return set(seen)
+
+
+def test_get_after_post_reads_the_primary(client, used_engines):
+    assert database.read_engine is not database.engine
+    client.cookies.clear()
+    created = client.post("/tramites/", json={"referencia": "RW-1", "items": [{"descripcion": "x", "monto": 1}]})
+    assert database.READ_PRIMARY_COOKIE in created.headers["set-cookie"]
+    path = f"/tramites/documentos/{created.json()['id']}"
+
+    # Cookie de read-your-writes: el GET siguiente va al primario
+    assert _get(client, used_engines, path) == {"primary"}
+    # Sin cookie, al pool de lectura; X-Read-Primary lo fuerza por request
+    client.cookies.clear()
+    assert _get(client, used_engines, path) == {"read"}
+    assert _get(client, used_engines, path, headers={"X-Read-Primary": "1"}) == {"primary"}
+    assert database.READ_PRIMARY_COOKIE not in client.cookies
+
+
+def test_read_your_writes_can_be_disabled(client, monkeypatch):
+    from autogo_erp.config import Config
+
+    monkeypatch.setattr(Config, "READ_YOUR_WRITES_SECONDS", 0)
+    client.cookies.clear()
+    created = client.post("/tramites/", json={"referencia": "RW-2", "items": []})
+    assert created.status_code == 200
+    assert "set-cookie" not in created.headers
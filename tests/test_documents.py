@@ -0,0 +1,110 @@
+"""PDFs: ETag/304 por documento, reutilización por hash, rangos de fechas y salidas ZIP/PDF."""
+
+import io
+import re
+import zipfile
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+from autogo_erp import database, models, pdf
+from autogo_erp.routers.documents import batch_ids
+from autogo_erp.schemas import DocumentBatchRequest
+
+DAY = date(1999, 3, 10)
+
+
+def _sale(vehicle_id, sale_date=None, price=500.0):
+    S = models.Sale.__table__
+    values = dict(vehicle_id=vehicle_id, sale_price=price, amount_paid=0.0, status=models.SaleStatus.OPEN)
+    if sale_date is not None:
+        values["sale_date"] = sale_date
+    with database.engine.begin() as conn:
+        return conn.execute(insert(S).values(**values).returning(S.c.id)).scalar_one()
+
+
+def _pdf(response):
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+    return response
+
+
+def test_single_document_etag_and_reuse(client, make_vehicle):
+    vehicle = make_vehicle()
+    path = f"/documents/sheet/{vehicle['id']}.pdf"
+    first = _pdf(client.get(path))
+    etag = first.headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    # Mismos datos: mismo archivo (el ETag es el hash), no se vuelve a renderizar
+    stored = pdf.document_path("sheet", etag.strip('"').split("-", 1)[1])
+    mtime = stored.stat().st_mtime_ns
+    assert _pdf(client.get(path)).headers["ETag"] == etag
+    assert stored.stat().st_mtime_ns == mtime
+
+    # Cambian los datos: otro hash, otro ETag
+    assert client.patch(f"/vehicles/{vehicle['id']}", json={"odometer_km": 4321}).status_code == 200
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert _pdf(changed).headers["ETag"] != etag
+
+
+def test_contract_and_invoice_follow_payments(client, make_vehicle):
+    sale_id = _sale(make_vehicle()["id"])
+    for kind in ("contract", "invoice"):
+        before = _pdf(client.get(f"/documents/{kind}/{sale_id}.pdf")).headers["ETag"]
+        assert client.post(f"/sales/{sale_id}/payments", json={"amount": 10, "method": kind}).status_code == 200
+        assert _pdf(client.get(f"/documents/{kind}/{sale_id}.pdf")).headers["ETag"] != before
+    assert client.get("/documents/invoice/999999999.pdf").status_code == 404
+    assert client.get("/documents/receipt/1.pdf").status_code == 422
+
+
+def test_batch_ids_date_bounds(client, make_vehicle):
+    vehicles = [make_vehicle(received_date=d.isoformat())
+                for d in (date(1999, 3, 9), DAY, date(1999, 3, 11))]
+    sales = [_sale(vehicles[0]["id"], when) for when in (
+        datetime(1999, 3, 9, 23, 59), datetime(1999, 3, 10, 0, 0), datetime(1999, 3, 10, 23, 59, 59),
+        datetime(1999, 3, 11, 0, 0),
+    )]
+    db = database.SessionLocal()
+    try:
+        sheets = batch_ids(db, DocumentBatchRequest(kind="sheet", date_from=DAY, date_to=DAY))
+        assert [v["id"] for v in vehicles if v["id"] in sheets] == [vehicles[1]["id"]]
+        contracts = batch_ids(db, DocumentBatchRequest(kind="contract", date_from=DAY, date_to=DAY))
+        assert [s for s in sales if s in contracts] == sales[1:3]
+        # Rango abierto por un lado
+        upto = batch_ids(db, DocumentBatchRequest(kind="contract", date_to=DAY))
+        assert [s for s in sales if s in upto] == sales[:3]
+        assert batch_ids(db, DocumentBatchRequest(kind="sheet", ids=[3, 1, 3])) == [1, 3]
+    finally:
+        db.close()
+
+
+def test_batch_zip(client, make_vehicle):
+    ids = [make_vehicle()["id"] for _ in range(3)]
+    response = client.post("/documents/batch", json={"kind": "sheet", "ids": ids})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.namelist() == [f"sheet-{i}.pdf" for i in ids]
+        assert all(zf.read(name).startswith(b"%PDF") for name in zf.namelist())
+        assert {i.compress_type for i in zf.infolist()} == {zipfile.ZIP_STORED}
+
+
+def test_batch_merged_pdf(client, make_vehicle):
+    ids = [make_vehicle()["id"] for _ in range(2)]
+    single = _pdf(client.get(f"/documents/sheet/{ids[0]}.pdf")).content
+    merged = _pdf(client.post("/documents/batch", json={"kind": "sheet", "ids": ids, "format": "pdf"})).content
+    assert _pages(single) >= 1
+    assert _pages(merged) == 2 * _pages(single)
+    again = client.post("/documents/batch", json={"kind": "sheet", "ids": ids, "format": "pdf"})
+    assert again.content == merged  # mismo lote: mismo archivo
+
+
+def _pages(data):
+    return len(re.findall(rb"/Type\s*/Page\b", data))
+
+
+def test_batch_errors(client):
+    assert client.post("/documents/batch", json={"kind": "sheet"}).status_code == 400
+    assert client.post("/documents/batch", json={"kind": "sheet", "ids": [999999999]}).status_code == 404
@@ -0,0 +1,52 @@
+"""ETags: los listados de trámites se invalidan cuando un borrado de vehículo arrastra costos."""
+
+import pytest
+
+
+def _tramite(client, vehicle_id):
+    response = client.post("/tramites/", json={
+        "referencia": f"R-{vehicle_id}", "vehiculo_id": vehicle_id,
+        "items": [{"descripcion": "placa", "monto": 10}],
+    })
+    assert response.status_code == 200, response.text
+
+
+def _revalidate(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    return etag
+
+
+PATHS = ("/tramites/", "/tramites/documentos")
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_vehicle_delete_invalidates_tramites(client, make_vehicle, path):
+    vehicle = make_vehicle()
+    _tramite(client, vehicle["id"])
+    etag = _revalidate(client, path)
+
+    assert client.delete(f"/vehicles/{vehicle['id']}").status_code == 200
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert all(row.get("vehiculo_id") != vehicle["id"] for row in response.json())
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_batch_delete_invalidates_tramites(client, make_vehicle, path):
+    vehicle = make_vehicle()
+    _tramite(client, vehicle["id"])
+    etag = _revalidate(client, path)
+
+    response = client.post("/vehicles/batch", json={"operations": [{"op": "delete", "id": vehicle["id"]}]})
+    assert response.status_code == 200, response.text
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_delete_without_costos_keeps_tramites_etag(client, make_vehicle):
+    vehicle = make_vehicle()
+    etag = _revalidate(client, "/tramites/")
+    assert client.delete(f"/vehicles/{vehicle['id']}").status_code == 200
+    assert client.get("/tramites/", headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,94 @@
+"""Exports CSV/NDJSON/XLSX: ida y vuelta por HTTP y por write_export (jobs.py)."""
+
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from autogo_erp import database, models
+from autogo_erp.models_costos import Costo
+from autogo_erp.routers import exports
+
+
+def _parse(fmt, data):
+    """Filas del export como dicts, con los valores en el tipo de cada formato."""
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(data.decode())))
+    if fmt == "ndjson":
+        return [json.loads(line) for line in data.decode().splitlines()]
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(data), read_only=True)
+    rows = wb.active.iter_rows(values_only=True)
+    header = next(rows)
+    result = [dict(zip(header, r)) for r in rows]
+    wb.close()
+    return result
+
+
+def _scalar(stmt):
+    with database.engine.connect() as conn:
+        return conn.execute(stmt).scalar()
+
+
+def _total(rows, key):
+    return sum(float(r[key] or 0) for r in rows)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Varios trozos por export aun con el dataset chico de los tests
+    monkeypatch.setattr(exports, "FLUSH_BYTES", 4096)
+    monkeypatch.setattr(exports, "YIELD_PER", 50)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "xlsx"])
+def test_vehicles_with_totals(client, dataset, fmt):
+    response = client.get("/exports/vehicles", params={"format": fmt, "totals": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(exports.MEDIA_TYPES[fmt].split(";")[0])
+    assert f'filename="vehicles.{fmt}"' in response.headers["Content-Disposition"]
+    rows = _parse(fmt, response.content)
+
+    assert len(rows) == _scalar(select(func.count()).select_from(models.Vehicle))
+    assert [int(r["id"]) for r in rows] == sorted(int(r["id"]) for r in rows)
+    assert {"total_costos", "total_ventas", "total_pagado"} <= set(rows[0])
+    costos = select(func.sum(Costo.monto)).where(Costo.vehiculo_id.in_(select(models.Vehicle.id)))
+    assert _total(rows, "total_costos") == pytest.approx(_scalar(costos) or 0)
+    assert _total(rows, "total_ventas") == pytest.approx(_scalar(select(func.sum(models.Sale.sale_price))) or 0)
+    assert _total(rows, "total_pagado") == pytest.approx(_scalar(select(func.sum(models.Payment.amount))) or 0)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "xlsx"])
+def test_sales_with_payments(client, dataset, fmt):
+    rows = _parse(fmt, client.get("/exports/sales", params={"format": fmt, "payments": "true"}).content)
+    assert len(rows) == _scalar(select(func.count()).select_from(models.Sale))
+    assert _total(rows, "total_pagos") == pytest.approx(_scalar(select(func.sum(models.Payment.amount))) or 0)
+    assert sum(int(r["cantidad_pagos"]) for r in rows) == _scalar(select(func.count()).select_from(models.Payment))
+    assert {r["status"] for r in rows} <= {s.value for s in models.SaleStatus}
+
+
+def test_plain_exports_have_no_total_columns(client, dataset):
+    vehicles = _parse("ndjson", client.get("/exports/vehicles", params={"format": "ndjson"}).content)
+    assert "total_costos" not in vehicles[0]
+    sold = _parse("ndjson", client.get("/exports/vehicles", params={"format": "ndjson", "status": "SOLD"}).content)
+    assert sold and all(r["status"] == "SOLD" for r in sold)
+    costos = _parse("csv", client.get("/exports/costos", params={"tipo": "tramite", "vehicle": "true"}).content)
+    assert len(costos) == _scalar(select(func.count()).select_from(Costo).where(Costo.tipo == "tramite"))
+    assert {"vin", "plate"} <= set(costos[0])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "xlsx"])
+def test_write_export_matches_the_stream(client, dataset, tmp_path, fmt):
+    stmt = exports.sales_stmt(payments=True)
+    progress = []
+    path = tmp_path / f"sales.{fmt}"
+    with open(path, "wb") as fh:
+        count = exports.write_export(stmt, fmt, fh, on_rows=progress.append)
+
+    assert count == exports.count_rows(stmt)
+    assert progress == list(range(50, count + 1, 50))
+    streamed = client.get("/exports/sales", params={"format": fmt, "payments": "true"}).content
+    assert _parse(fmt, path.read_bytes()) == _parse(fmt, streamed)
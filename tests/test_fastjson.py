@@ -0,0 +1,59 @@
+"""AUTOERP_FAST_JSON: el camino rápido devuelve el mismo cuerpo que el de response_model."""
+
+import pytest
+from sqlalchemy import select
+
+from autogo_erp import database, fastjson, models
+from autogo_erp.cache import vehicle_cache
+from autogo_erp.models_costos import Costo
+
+
+def _ids(model, n=5):
+    with database.engine.connect() as conn:
+        return conn.execute(select(model.id).order_by(model.id.desc()).limit(n)).scalars().all()
+
+
+def _both(client, monkeypatch, path, params=None):
+    bodies = []
+    for enabled in (False, True):
+        monkeypatch.setattr(fastjson, "ENABLED", enabled)
+        vehicle_cache.clear()  # la caché por id guarda el formato de cada camino
+        response = client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        bodies.append(response)
+    return bodies
+
+
+LISTS = [
+    ("/vehicles/", {"limit": 50}),
+    ("/vehicles/", {"limit": 50, "sort": "-year", "status": "SOLD"}),
+    ("/vehicles/search", {"q": "Toyota", "limit": 50}),
+    ("/tramites/", {"limit": 50}),
+    ("/tramites/documentos", {"limit": 50}),
+]
+
+
+@pytest.mark.parametrize("path,params", LISTS)
+def test_list_parity(client, dataset, monkeypatch, path, params):
+    slow, fast = _both(client, monkeypatch, path, params)
+    assert fast.json() == slow.json()
+    assert fast.content == slow.content
+    assert fast.headers.get("ETag") == slow.headers.get("ETag")
+    assert fast.headers.get("X-Next-Cursor") == slow.headers.get("X-Next-Cursor")
+
+
+def test_vehicle_by_id_parity(client, dataset, monkeypatch):
+    for vid in _ids(models.Vehicle):
+        slow, fast = _both(client, monkeypatch, f"/vehicles/{vid}")
+        assert fast.content == slow.content
+
+
+def test_tramite_by_id_parity(client, dataset, monkeypatch):
+    with database.engine.connect() as conn:
+        ids = conn.execute(
+            select(Costo.id).where(Costo.tipo == "tramite").order_by(Costo.id).limit(5)
+        ).scalars().all()
+    assert ids
+    for tid in ids:
+        slow, fast = _both(client, monkeypatch, f"/tramites/{tid}")
+        assert fast.content == slow.content
@@ -0,0 +1,73 @@
+"""Importación de vehículos: celdas XLSX numéricas y carreras con otro proceso."""
+
+import io
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import insert, select
+
+from autogo_erp import database, models
+from autogo_erp.routers import imports
+
+HEADER = ["vin", "plate", "brand", "model", "year", "odometer_km", "acquisition_type",
+          "seller_name", "seller_contact", "seller_document", "received_date"]
+
+
+def _xlsx(*rows) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def _vehicle(vin):
+    with database.engine.connect() as conn:
+        return conn.execute(select(models.Vehicle).where(models.Vehicle.vin == vin)).one()
+
+
+def test_xlsx_numeric_cells_become_text(client):
+    body = _xlsx(
+        [123456789012345, 987654, "Kia", 2021, 2019.0, 15000.0, "TRADE_IN",
+         "Ana", 50760001234.0, 8111111, datetime(2025, 3, 4)],
+        ["XLSXVIN0000000002", 1234.5, "Kia", "Rio", 2020, 10, "DIRECT_SALE",
+         "Luis", None, "CED-1", datetime(2025, 3, 5, 0, 0)],
+    )
+    response = client.post("/imports/vehicles", files={"file": ("cars.xlsx", body)})
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 2, response.json()
+
+    first = _vehicle("123456789012345")
+    assert (first.plate, first.model, first.seller_contact, first.seller_document) == (
+        "987654", "2021", "50760001234", "8111111")
+    assert first.year == 2019
+    assert first.received_date.isoformat() == "2025-03-04"
+    assert _vehicle("XLSXVIN0000000002").plate == "1234.5"
+
+
+def test_concurrent_insert_becomes_row_error(client, monkeypatch):
+    # Otro proceso inserta el mismo VIN entre la consulta de duplicados y el INSERT
+    bump = imports.versioning.bump
+
+    def racing_bump(db, name):
+        monkeypatch.setattr(imports.versioning, "bump", bump)
+        with database.engine.begin() as conn:
+            conn.execute(insert(models.Vehicle).values(
+                vin="RACEVIN0000000001", brand="Kia", model="Rio", year=2020, odometer_km=0,
+                acquisition_type=models.AcquisitionType.DIRECT_SALE, seller_name="Otro",
+                status=models.VehicleStatus.AVAILABLE))
+        return bump(db, name)
+
+    monkeypatch.setattr(imports.versioning, "bump", racing_bump)
+    csv = ("vin,brand,model,year,odometer_km,acquisition_type,seller_name\n"
+           "RACEVIN0000000001,Kia,Rio,2020,0,DIRECT_SALE,Ana\n"
+           "RACEVIN0000000002,Kia,Rio,2020,0,DIRECT_SALE,Ana\n")
+    response = client.post("/imports/vehicles", files={"file": ("cars.csv", csv.encode(), "text/csv")})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["inserted"] == 1
+    assert [(e["row"], e["vin"]) for e in result["errors"]] == [(2, "RACEVIN0000000001")]
@@ -0,0 +1,75 @@
+"""Workers de jobs: un error al guardar el estado no mata al worker y el padre relanza hijos."""
+
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from autogo_erp import jobs
+from autogo_erp.config import Config
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_worker_survives_status_write_error(monkeypatch):
+    stop = threading.Event()
+    claimed = jobs.Claimed(id="j1", kind="export", params={}, attempts=1, max_attempts=3, token="t")
+    calls = []
+
+    def failing_execute(c):
+        calls.append(c)
+        if len(calls) == 2:
+            stop.set()
+        raise OperationalError("UPDATE jobs", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(jobs, "claim", lambda worker: claimed)
+    monkeypatch.setattr(jobs, "execute", failing_execute)
+    monkeypatch.setattr(jobs, "reap", lambda: 0)
+    monkeypatch.setattr(jobs, "cleanup", lambda: 0)
+    monkeypatch.setattr(Config, "JOB_POLL_SECONDS", 0)
+    jobs.work(stop)
+    assert calls == [claimed, claimed]
+
+
+def _children(pid):
+    out = []
+    for child in Path(f"/proc/{pid}/task/{pid}/children").read_text().split():
+        cmdline = Path(f"/proc/{child}/cmdline").read_bytes()
+        if b"spawn_main" in cmdline:  # no el resource tracker
+            out.append(int(child))
+    return sorted(out)
+
+
+def _wait_for(predicate, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.2)
+    raise AssertionError("timed out")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="lee /proc")
+def test_dead_worker_is_respawned(tmp_path):
+    env = dict(os.environ, AUTOERP_DB_PATH=str(tmp_path / "jobs.db"), AUTOERP_JOBS_DIR=str(tmp_path / "jobs"),
+               AUTOERP_MEDIA_ROOT=str(tmp_path / "media"), PYTHONPATH=str(ROOT))
+    parent = subprocess.Popen([sys.executable, "-m", "autogo_erp.jobs", "worker", "--concurrency", "2"],
+                              env=env, cwd=tmp_path, stderr=subprocess.PIPE, text=True)
+    try:
+        first = _wait_for(lambda: len(_children(parent.pid)) == 2 and _children(parent.pid))
+        os.kill(first[0], signal.SIGKILL)
+        second = _wait_for(lambda: (lambda c: len(c) == 2 and first[0] not in c and c)(_children(parent.pid)))
+        assert first[1] in second
+    finally:
+        parent.send_signal(signal.SIGTERM)
+        _, err = parent.communicate(timeout=60)
+    assert parent.returncode == 0
+    assert re.search(r"job-worker-\d exited with code -9, restarting", err)
@@ -0,0 +1,74 @@
+"""Paginación por cursor de GET /vehicles/: recorrer todas las páginas da el orden completo."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from autogo_erp import database, models
+from autogo_erp.routers.vehicles import ListParams, _encode_cursor, _list_stmt
+
+SORTS = ["id", "-id", "received_date", "-received_date", "year", "-year"]
+
+
+def _expected(sort, status=None):
+    V = models.Vehicle
+    stmt = select(V.id, V.received_date, V.year)
+    if status:
+        stmt = stmt.where(V.status == status)
+    with database.engine.connect() as conn:
+        rows = conn.execute(stmt).all()
+    name, desc = sort.lstrip("-"), sort.startswith("-")
+    if name == "id":
+        return sorted((r.id for r in rows), reverse=desc)
+    # NULL primero en ascendente y al final en descendente; empate por id
+    keyed = [(getattr(r, name) is not None, getattr(r, name) or 0, r.id) for r in rows]
+    keyed.sort(reverse=desc)
+    return [k[2] for k in keyed]
+
+
+def _walk(client, params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/vehicles/", params=query)
+        assert response.status_code == 200, response.text
+        ids += [v["id"] for v in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize("status", [None, "AVAILABLE"])
+@pytest.mark.parametrize("sort", SORTS)
+def test_cursor_round_trip(client, dataset, sort, status):
+    params = {"sort": sort, "limit": 37}
+    if status:
+        params["status"] = status
+    expected = _expected(sort, status)
+    ids, pages = _walk(client, params)
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // 37))
+
+
+def test_cursor_of_other_sort_is_rejected(client, dataset):
+    cursor = client.get("/vehicles/", params={"sort": "year", "limit": 5}).headers["X-Next-Cursor"]
+    response = client.get("/vehicles/", params={"sort": "-year", "limit": 5, "cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["received_date", "-received_date", "year", "-year"])
+def test_cursor_seeks_the_index(dataset, sort):
+    # El tramo no NULL es un rango del índice (col, id), no un recorrido
+    last = SimpleNamespace(id=100, received_date=date(2025, 6, 1), year=2018)
+    params = ListParams(limit=50, cursor=_encode_cursor(sort, last), sort=sort, status=None, brand=None,
+                        model=None, year_min=None, year_max=None, acquisition_type=None,
+                        received_from=None, received_to=None)
+    stmt = _list_stmt(params, [models.Vehicle.id])
+    sql = str(stmt.compile(database.engine, compile_kwargs={"literal_binds": True}))
+    with database.engine.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+    op = "<" if sort.startswith("-") else ">"
+    assert f"USING COVERING INDEX ix_vehicles_{sort.lstrip('-')}_id ({sort.lstrip('-')}{op}?)" in plan
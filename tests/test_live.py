@@ -0,0 +1,211 @@
+"""/vehicles/live: coalescencia de eventos, cursor del broker y entrega por WebSocket."""
+
+import asyncio
+import json
+import time
+from collections import namedtuple
+
+from sqlalchemy import func, select
+
+from autogo_erp import database, live, models
+from autogo_erp.config import Config
+
+Row = namedtuple("Row", "id vehicle_id type status previous_status brand previous_brand row_version data")
+
+
+def _event(id, type, status="AVAILABLE", previous_status=None, brand="Toyota", previous_brand=None, vehicle_id=1):
+    return live.Event(id, vehicle_id, type, status, previous_status, brand, previous_brand, id, "{}")
+
+
+# ===== merge =====
+def test_merge_created_then_deleted_cancels():
+    assert live.merge(_event(1, live.CREATED), _event(2, live.DELETED)) is None
+
+
+def test_merge_created_then_updated_stays_created():
+    merged = live.merge(_event(1, live.CREATED), _event(2, live.STATUS_CHANGED, "SOLD", "AVAILABLE"))
+    assert (merged.id, merged.type, merged.status, merged.previous_status) == (2, live.CREATED, "SOLD", None)
+
+
+def test_merge_keeps_the_first_previous_status():
+    first = _event(1, live.STATUS_CHANGED, "SOLD", "AVAILABLE")
+    back = live.merge(first, _event(2, live.STATUS_CHANGED, "AVAILABLE", "SOLD"))
+    assert (back.type, back.previous_status) == (live.UPDATED, None)
+    again = live.merge(_event(1, live.UPDATED), _event(2, live.STATUS_CHANGED, "SOLD", "AVAILABLE"))
+    assert (again.type, again.previous_status) == (live.STATUS_CHANGED, "AVAILABLE")
+
+
+def test_merge_tracks_the_original_brand():
+    kia = _event(1, live.UPDATED, brand="Kia", previous_brand="Toyota")
+    renamed = live.merge(kia, _event(2, live.UPDATED, brand="Ford"))
+    assert renamed.previous_brand == "Toyota"
+    restored = live.merge(kia, _event(2, live.UPDATED))
+    assert restored.previous_brand is None
+
+
+def test_merge_deleted_after_update_is_a_delete():
+    assert live.merge(_event(1, live.UPDATED), _event(2, live.DELETED)).type == live.DELETED
+
+
+# ===== Subscriber (necesita un event loop corriendo) =====
+def _subscriber(**filters):
+    async def make():
+        return live.Subscriber(**filters)
+    return asyncio.run(make())
+
+
+def test_subscriber_coalesces_per_vehicle():
+    sub = _subscriber()
+    sub.offer([_event(1, live.CREATED), _event(2, live.UPDATED, vehicle_id=2), _event(3, live.UPDATED)])
+    events, last_id = sub.take()
+    assert [(e.vehicle_id, e.id, e.type) for e in events] == [(2, 2, live.UPDATED), (1, 3, live.CREATED)]
+    assert last_id == 3 and not sub.ready.is_set()
+
+
+def test_subscriber_filter_sees_the_exit():
+    sub = _subscriber(statuses=["AVAILABLE"])
+    sub.offer([_event(1, live.UPDATED, "SOLD", vehicle_id=1),
+               _event(2, live.STATUS_CHANGED, "SOLD", "AVAILABLE", vehicle_id=2)])
+    events, last_id = sub.take()
+    assert [e.vehicle_id for e in events] == [2]
+    assert last_id == 2  # el evento filtrado también avanza last_id
+
+
+def test_subscriber_prepend_puts_backlog_first():
+    sub = _subscriber()
+    sub.offer([_event(5, live.STATUS_CHANGED, "SOLD", "AVAILABLE")])
+    sub.prepend([_event(3, live.CREATED)])
+    events, last_id = sub.take()
+    assert [(e.id, e.type, e.status) for e in events] == [(5, live.CREATED, "SOLD")]
+    assert last_id == 5
+
+
+def test_subscriber_overflow(monkeypatch):
+    monkeypatch.setattr(Config, "LIVE_MAX_PENDING", 2)
+    sub = _subscriber()
+    sub.offer([_event(i, live.UPDATED, vehicle_id=i) for i in (1, 2)])
+    assert not sub.overflow
+    sub.offer([_event(3, live.UPDATED, vehicle_id=3)])
+    assert sub.overflow and sub.ready.is_set()
+
+
+# ===== Broker._advance (ids salteados) =====
+def _row(id):
+    return Row(id, id, live.UPDATED, "AVAILABLE", None, "Toyota", None, id, "{}")
+
+
+def test_advance_waits_for_a_missing_id():
+    broker = live.Broker()
+    broker._cursor = 0
+    assert [e.id for e in broker._advance([_row(1), _row(3)])] == [1, 3]
+    assert broker._cursor == 1
+    # Releer lo mismo no repite eventos
+    assert broker._advance([_row(3)]) == []
+    assert [e.id for e in broker._advance([_row(2), _row(3)])] == [2]
+    assert broker._cursor == 3 and not broker._seen
+
+
+def test_advance_skips_a_gap_after_timeout(monkeypatch):
+    monkeypatch.setattr(live, "GAP_SECONDS", 0.0)
+    broker = live.Broker()
+    broker._cursor = 0
+    broker._advance([_row(2)])
+    assert broker._cursor == 0  # empieza a esperar el 1
+    broker._advance([_row(2)])
+    assert broker._cursor == 2 and broker._gap_since is None
+
+
+# ===== WebSocket =====
+def _last_event_id():
+    with database.engine.connect() as conn:
+        return conn.execute(select(func.max(models.VehicleEvent.id))).scalar() or 0
+
+
+def _wait_for_broker(last_id):
+    deadline = time.monotonic() + 10
+    while live.broker.position < last_id:
+        assert time.monotonic() < deadline, "broker did not catch up"
+        time.sleep(0.05)
+
+
+def _receive_events(ws, vehicle_id):
+    while True:
+        frame = json.loads(ws.receive_text())
+        assert frame["type"] == "events"
+        found = [e for e in frame["events"] if e["vehicle_id"] == vehicle_id]
+        if found:
+            return frame, found
+
+
+def test_patch_is_pushed_to_filtered_client(client, make_vehicle):
+    vehicle = make_vehicle()
+    _wait_for_broker(_last_event_id())  # el alta ya quedó atrás
+
+    with client.websocket_connect("/vehicles/live?status=AVAILABLE") as ws:
+        hello = json.loads(ws.receive_text())
+        assert hello["type"] == "hello"
+        assert client.patch(f"/vehicles/{vehicle['id']}", json={"status": "SOLD"}).status_code == 200
+        frame, events = _receive_events(ws, vehicle["id"])
+
+    assert [e["type"] for e in events] == ["status_changed"]
+    assert events[0]["previous_status"] == "AVAILABLE"
+    assert events[0]["vehicle"]["status"] == "SOLD"
+    assert frame["last_id"] >= events[0]["id"] > hello["last_id"]
+
+
+def test_since_replays_missed_events(client, make_vehicle):
+    since = _last_event_id()
+    vehicle = make_vehicle()
+    _wait_for_broker(_last_event_id())
+
+    with client.websocket_connect(f"/vehicles/live?since={since}") as ws:
+        assert json.loads(ws.receive_text())["type"] == "hello"
+        _, events = _receive_events(ws, vehicle["id"])
+    assert [e["type"] for e in events] == ["created"]
+
+
+def test_since_too_far_back_resets(client, make_vehicle, monkeypatch):
+    since = _last_event_id()
+    make_vehicle()
+    make_vehicle()
+    _wait_for_broker(_last_event_id())
+    monkeypatch.setattr(Config, "LIVE_MAX_PENDING", 1)  # backlog más grande que el tope
+
+    with client.websocket_connect(f"/vehicles/live?since={since}") as ws:
+        hello = json.loads(ws.receive_text())
+        reset = json.loads(ws.receive_text())
+    assert reset == {"type": "reset", "last_id": hello["last_id"]}
+
+
+def _event_types(where):
+    with database.engine.connect() as conn:
+        return conn.execute(select(models.VehicleEvent.type).where(where)).scalars().all()
+
+
+def test_imports_are_published(client):
+    vin = f"LIVEIMP{_last_event_id():08d}"
+    response = client.post("/imports/vehicles", files={"file": (
+        "v.csv", "vin,brand,model,year,odometer_km,acquisition_type,seller_name\n"
+                 f"{vin},Kia,Rio,2020,5,DIRECT_SALE,Live\n", "text/csv")})
+    assert response.json()["inserted"] == 1
+    assert _event_types(models.VehicleEvent.data.contains(vin)) == [live.CREATED]
+
+
+def test_photo_changes_are_published(client, make_vehicle):
+    vehicle = make_vehicle()
+    before = _last_event_id()
+    photo = client.post(f"/vehicles/{vehicle['id']}/photos",
+                        files={"files": ("a.png", _png(), "image/png")}).json()[0]
+    assert client.delete(f"/vehicles/{vehicle['id']}/photos/{photo['id']}").status_code == 200
+    E = models.VehicleEvent
+    assert _event_types((E.vehicle_id == vehicle["id"]) & (E.id > before)) == [live.UPDATED, live.UPDATED]
+
+
+def _png():
+    import io
+
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), "red").save(buf, "PNG")
+    return buf.getvalue()
@@ -0,0 +1,126 @@
+"""Migraciones sobre una base creada por el arranque original y sobre una vacía."""
+
+from sqlalchemy import create_engine, inspect, text
+
+from autogo_erp import migrations, models, models_costos  # noqa: F401
+from autogo_erp.database import Base
+
+# Esquema que dejaba el startup() original (create_all + mini-migración),
+# tal como lo guarda SQLite
+BASELINE_DDL = [
+    """CREATE TABLE vehicles (
+        id INTEGER NOT NULL, vin VARCHAR(32) NOT NULL, plate VARCHAR,
+        brand VARCHAR(64) NOT NULL, model VARCHAR(64) NOT NULL, year INTEGER NOT NULL,
+        odometer_km FLOAT NOT NULL, acquisition_type VARCHAR(11) NOT NULL,
+        seller_name VARCHAR(128) NOT NULL, seller_contact VARCHAR(128),
+        seller_document VARCHAR(64), received_date DATE, status VARCHAR(9) NOT NULL,
+        PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX ix_vehicles_vin ON vehicles (vin)",
+    "CREATE INDEX ix_vehicles_id ON vehicles (id)",
+    "CREATE UNIQUE INDEX ix_vehicles_plate ON vehicles (plate)",
+    """CREATE TABLE costos (
+        id INTEGER NOT NULL, descripcion VARCHAR(150) NOT NULL, monto FLOAT NOT NULL,
+        tipo VARCHAR(30) NOT NULL, referencia VARCHAR(50), vehiculo_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(vehiculo_id) REFERENCES vehicles (id))""",
+    "CREATE INDEX ix_costos_id ON costos (id)",
+    """CREATE TABLE photos (
+        id INTEGER NOT NULL, vehicle_id INTEGER NOT NULL, url VARCHAR(512) NOT NULL,
+        is_main BOOLEAN NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE)""",
+    "CREATE INDEX ix_photos_id ON photos (id)",
+    """CREATE TABLE sales (
+        id INTEGER NOT NULL, vehicle_id INTEGER NOT NULL, sale_date DATETIME NOT NULL,
+        sale_price FLOAT NOT NULL, amount_paid FLOAT NOT NULL, status VARCHAR(4) NOT NULL,
+        notes VARCHAR(512), PRIMARY KEY (id),
+        FOREIGN KEY(vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE)""",
+    "CREATE INDEX ix_sales_id ON sales (id)",
+    """CREATE TABLE payments (
+        id INTEGER NOT NULL, sale_id INTEGER NOT NULL, amount FLOAT NOT NULL,
+        paid_at DATETIME NOT NULL, method VARCHAR(64), reference VARCHAR(128),
+        PRIMARY KEY (id), FOREIGN KEY(sale_id) REFERENCES sales (id) ON DELETE CASCADE)""",
+    "CREATE INDEX ix_payments_id ON payments (id)",
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO vehicles (id, vin, plate, brand, model, year, odometer_km, acquisition_type, seller_name, status) "
+    "VALUES (1, 'VIN0001', 'AB123', 'Toyota', 'Corolla', 2018, 1000, 'TRADE_IN', 'X', 'SOLD')",
+    "INSERT INTO vehicles (id, vin, brand, model, year, odometer_km, acquisition_type, seller_name, status) "
+    "VALUES (2, 'VIN0002', 'Kia', 'Rio', 2020, 10, 'DIRECT_SALE', 'Y', 'AVAILABLE')",
+    "INSERT INTO costos (descripcion, monto, tipo, referencia, vehiculo_id) VALUES ('placa', 10, 'tramite', 'T-1', 1)",
+    "INSERT INTO costos (descripcion, monto, tipo, referencia, vehiculo_id) VALUES ('revisado', 5, 'tramite', 'T-1', 1)",
+    "INSERT INTO costos (descripcion, monto, tipo, referencia, vehiculo_id) VALUES ('pintura', 50, 'reparacion', NULL, 1)",
+    "INSERT INTO photos (vehicle_id, url, is_main) VALUES (1, '/a.jpg', 1)",
+    "INSERT INTO photos (vehicle_id, url, is_main) VALUES (1, '/b.jpg', 1)",
+    "INSERT INTO sales (id, vehicle_id, sale_date, sale_price, amount_paid, status) "
+    "VALUES (1, 1, '2025-01-01 00:00:00', 100, 0, 'OPEN')",
+    "INSERT INTO payments (sale_id, amount, paid_at) VALUES (1, 60, '2025-01-02 00:00:00')",
+    "INSERT INTO payments (sale_id, amount, paid_at) VALUES (1, 40, '2025-01-03 00:00:00')",
+]
+
+
+def _shape(engine):
+    """{tabla: (columnas, índices)} sin las tablas internas del FTS."""
+    insp = inspect(engine)
+    out = {}
+    for name in insp.get_table_names():
+        if name.startswith("vehicles_fts"):
+            continue
+        columns = {c["name"]: (str(c["type"]), c["nullable"]) for c in insp.get_columns(name)}
+        indexes = {ix["name"]: (tuple(ix["column_names"]), bool(ix["unique"])) for ix in insp.get_indexes(name)}
+        out[name] = (columns, indexes)
+    return out
+
+
+def _model_shape():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return _shape(engine)
+
+
+def test_baseline_database_migrates_to_latest(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        for sql in BASELINE_DDL + BASELINE_ROWS:
+            conn.execute(text(sql))
+
+    assert migrations.migrate(engine) == len(migrations.MIGRATIONS)
+    assert migrations.migrate(engine) == 0
+    assert _shape(engine) == _model_shape()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT max(version) FROM schema_migrations")).scalar() == migrations.LATEST
+        # Las dos líneas de T-1 quedan bajo un mismo encabezado
+        assert conn.execute(text("SELECT referencia, total, items_count FROM tramites")).all() == [("T-1", 15.0, 2)]
+        assert conn.execute(text("SELECT amount_paid, status FROM sales")).one() == (100.0, "PAID")
+        assert conn.execute(text("SELECT url FROM photos WHERE is_main")).scalars().all() == ["/a.jpg"]
+        assert conn.execute(text("SELECT count(*) FROM vehicle_summary")).scalar() == 2
+        # Con vehículos ya cargados no se siembra la demo
+        assert conn.execute(text("SELECT count(*) FROM vehicles")).scalar() == 2
+
+
+def test_empty_database_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    migrations.migrate(engine)
+    assert _shape(engine) == _model_shape()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM vehicles")).scalar() == 2  # demo
+
+
+def test_versions_are_64_bit_on_postgresql():
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable
+
+    executed = []
+    pg = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), execute=lambda sql: executed.append(str(sql)))
+    migrations._version_bigint(pg)
+    assert executed == [
+        "ALTER TABLE table_versions ALTER COLUMN version TYPE BIGINT",
+        "ALTER TABLE vehicles ALTER COLUMN row_version TYPE BIGINT",
+        "ALTER TABLE vehicle_events ALTER COLUMN row_version TYPE BIGINT",
+    ]
+    for model, name in ((models.TableVersion, "version"), (models.Vehicle, "row_version"),
+                        (models.VehicleEvent, "row_version")):
+        ddl = str(CreateTable(model.__table__).compile(dialect=postgresql.dialect()))
+        assert f"{name} BIGINT" in ddl
@@ -0,0 +1,66 @@
+"""POST /sales/{id}/payments: pagos concurrentes sobre la misma venta no se pierden."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import insert, select
+
+from autogo_erp import database, models
+
+
+def _sale(vehicle_id, price):
+    S = models.Sale.__table__
+    with database.engine.begin() as conn:
+        return conn.execute(
+            insert(S).values(vehicle_id=vehicle_id, sale_price=price, amount_paid=0.0,
+                             status=models.SaleStatus.OPEN).returning(S.c.id)
+        ).scalar_one()
+
+
+def _state(sale_id):
+    S = models.Sale.__table__
+    with database.engine.connect() as conn:
+        return conn.execute(select(S.c.amount_paid, S.c.status).where(S.c.id == sale_id)).one()
+
+
+def _pay_all(client, sale_id, amounts):
+    def pay(amount):
+        return client.post(f"/sales/{sale_id}/payments", json={"amount": amount, "method": "cash"})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(pay, amounts))
+
+
+def test_concurrent_payments_all_count(client, make_vehicle):
+    sale_id = _sale(make_vehicle()["id"], 1000.0)
+
+    responses = _pay_all(client, sale_id, [25.0] * 40)
+    assert [r.status_code for r in responses] == [200] * 40
+    amount_paid, status = _state(sale_id)
+    assert amount_paid == 1000.0
+    assert status == models.SaleStatus.PAID
+    # Exactamente un pago vio el paso a PAID
+    assert sum(r.json()["status"] == "PAID" for r in responses) == 1
+    assert len(client.get(f"/sales/{sale_id}/payments").json()) == 40
+
+
+def test_concurrent_payments_never_exceed_price(client, make_vehicle):
+    sale_id = _sale(make_vehicle()["id"], 100.0)
+
+    responses = _pay_all(client, sale_id, [30.0] * 10)
+    ok = [r for r in responses if r.status_code == 200]
+    assert len(ok) == 3
+    assert all(r.status_code == 400 for r in responses if r.status_code != 200)
+    amount_paid, status = _state(sale_id)
+    assert amount_paid == 90.0
+    assert status == models.SaleStatus.OPEN
+    assert sum(p["amount"] for p in client.get(f"/sales/{sale_id}/payments").json()) == 90.0
+
+
+def test_payment_on_paid_or_missing_sale(client, make_vehicle):
+    sale_id = _sale(make_vehicle()["id"], 50.0)
+    assert client.post(f"/sales/{sale_id}/payments", json={"amount": 50}).json()["status"] == "PAID"
+
+    response = client.post(f"/sales/{sale_id}/payments", json={"amount": 1})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Sale already paid"
+    assert client.post("/sales/999999999/payments", json={"amount": 1}).status_code == 404
@@ -0,0 +1,94 @@
+"""Fotos: subida con dedupe por hash, foto principal única y variantes inmutables."""
+
+import io
+
+from PIL import Image
+
+from autogo_erp import media
+
+
+def _png(color, size=(60, 40)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _upload(client, vehicle_id, *images, is_main=False):
+    files = [("files", (f"p{n}.png", data, "image/png")) for n, data in enumerate(images)]
+    return client.post(f"/vehicles/{vehicle_id}/photos", files=files, data={"is_main": str(is_main).lower()})
+
+
+def _mains(client, vehicle_id):
+    return [p["id"] for p in client.get(f"/vehicles/{vehicle_id}/photos").json() if p["is_main"]]
+
+
+def test_upload_renders_variants_and_marks_first_main(client, make_vehicle):
+    vehicle = make_vehicle()
+    response = _upload(client, vehicle["id"], _png("red"), _png("blue"))
+    assert response.status_code == 200, response.text
+    first, second = response.json()
+    assert first["is_main"] and not second["is_main"]
+    digest = first["content_hash"]
+    assert first["url"] == media.variant_url(digest, "card", "webp")
+    assert first["variants"] == media.variant_urls(digest)
+    assert set(first["variants"]) == set(media.VARIANTS)
+    # VehicleRead trae las mismas fotos
+    photos = client.get(f"/vehicles/{vehicle['id']}").json()["photos"]
+    assert {p["id"] for p in photos} == {first["id"], second["id"]}
+
+
+def test_same_content_is_stored_once(client, make_vehicle):
+    a, b = make_vehicle(), make_vehicle()
+    image = _png("green")
+    first = _upload(client, a["id"], image).json()[0]
+    again = _upload(client, a["id"], image, image).json()
+    assert [p["id"] for p in again] == [first["id"]]  # ni fila nueva ni duplicado en el mismo request
+    assert len(client.get(f"/vehicles/{a['id']}/photos").json()) == 1
+
+    other = _upload(client, b["id"], image).json()[0]
+    assert other["id"] != first["id"] and other["content_hash"] == first["content_hash"]
+    assert media.original_path(first["content_hash"]).is_file()
+
+
+def test_main_photo_stays_unique(client, make_vehicle):
+    vehicle = make_vehicle()
+    vid = vehicle["id"]
+    ids = [p["id"] for p in _upload(client, vid, _png("red"), _png("blue"), _png("white")).json()]
+    assert _mains(client, vid) == [ids[0]]
+
+    assert client.put(f"/vehicles/{vid}/photos/{ids[2]}/main").status_code == 200
+    assert _mains(client, vid) == [ids[2]]
+    newest = _upload(client, vid, _png("black"), is_main=True).json()[0]
+    assert _mains(client, vid) == [newest["id"]]
+
+    # Al borrar la principal pasa a la de menor id
+    assert client.delete(f"/vehicles/{vid}/photos/{newest['id']}").status_code == 200
+    assert _mains(client, vid) == [ids[0]]
+    assert client.delete(f"/vehicles/{vid}/photos/{ids[1]}").status_code == 200
+    assert _mains(client, vid) == [ids[0]]
+    assert client.delete(f"/vehicles/{vid}/photos/{ids[1]}").status_code == 404
+    assert client.put(f"/vehicles/{vid}/photos/{ids[1]}/main").status_code == 404
+
+
+def test_variants_are_immutable(client, make_vehicle):
+    photo = _upload(client, make_vehicle()["id"], _png("purple")).json()[0]
+    digest = photo["content_hash"]
+    for name, mime in (("card.webp", "image/webp"), ("thumb.jpg", "image/jpeg")):
+        response = client.get(f"/photos/{digest}/{name}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == mime
+        assert "immutable" in response.headers["Cache-Control"]
+    with Image.open(io.BytesIO(client.get(f"/photos/{digest}/full.jpg").content)) as img:
+        assert img.size == (60, 40)  # nunca se agranda
+    assert client.get(f"/photos/{digest}/huge.webp").status_code == 404
+    assert client.get(f"/photos/{digest}/card.gif").status_code == 404
+    assert client.get("/photos/not-a-digest/card.webp").status_code == 404
+
+
+def test_invalid_image_is_rejected(client, make_vehicle):
+    vehicle = make_vehicle()
+    response = client.post(f"/vehicles/{vehicle['id']}/photos",
+                           files=[("files", ("x.png", b"not an image", "image/png"))])
+    assert response.status_code == 400
+    assert client.get(f"/vehicles/{vehicle['id']}/photos").json() == []
+    assert _upload(client, 999999999, _png("red")).status_code == 404
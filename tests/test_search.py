@@ -0,0 +1,42 @@
+"""GET /vehicles/search: relevancia sobre un tope de candidatos, con filtros dentro del tope."""
+
+from sqlalchemy import select
+
+from autogo_erp import database, models
+from autogo_erp.config import Config
+
+
+def test_vin_fragment_finds_vehicle(client, dataset):
+    with database.engine.connect() as conn:
+        vid, vin = conn.execute(select(models.Vehicle.id, models.Vehicle.vin).order_by(models.Vehicle.id)
+                                .limit(1).offset(100)).one()
+    response = client.get("/vehicles/search", params={"q": vin[-9:]})
+    assert response.status_code == 200
+    assert [v["id"] for v in response.json()][:1] == [vid]
+
+
+def test_filters_apply_before_the_candidate_cap(client, dataset, monkeypatch):
+    monkeypatch.setattr(Config, "SEARCH_CANDIDATES", 9)
+    seen = []
+    for offset in (0, 3, 6):
+        response = client.get("/vehicles/search",
+                              params={"q": "Toyota", "status": "SOLD", "limit": 3, "offset": offset})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) == 3
+        assert all(v["status"] == "SOLD" and v["brand"] == "Toyota" for v in page)
+        seen += [v["id"] for v in page]
+    assert len(set(seen)) == 9
+    # El tope es también el total: más allá no hay resultados
+    last = client.get("/vehicles/search", params={"q": "Toyota", "status": "SOLD", "limit": 3, "offset": 6})
+    assert "X-Next-Offset" not in last.headers
+    assert client.get("/vehicles/search", params={"q": "Toyota", "offset": 9}).json() == []
+
+
+def test_short_terms_match_seller_columns(client, make_vehicle):
+    vehicle = make_vehicle(seller_name="Juan Lizárraga Quintero", seller_document="X-77")
+    for q in ("Juan Li", "Quintero 77"):
+        response = client.get("/vehicles/search", params={"q": q})
+        assert response.status_code == 200
+        assert vehicle["id"] in [v["id"] for v in response.json()], q
+    assert vehicle["id"] not in [v["id"] for v in client.get("/vehicles/search", params={"q": "Juan Zq"}).json()]
@@ -0,0 +1,84 @@
+"""vehicle_summary: cada camino de escritura deja la proyección igual a un cálculo fresco."""
+
+import io
+
+from PIL import Image
+from sqlalchemy import insert, update
+
+from autogo_erp import database, models, summary
+
+
+def _verify():
+    with database.engine.connect() as conn:
+        return summary.verify(conn)
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.new("RGB", (30, 20), "orange").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_writes_keep_the_projection_consistent(client, dataset, make_vehicle):
+    # Otros tests insertan ventas directo en la tabla: partir de una proyección limpia
+    with database.engine.begin() as conn:
+        summary.rebuild(conn)
+    assert _verify()["ok"]
+
+    vehicle = make_vehicle(plate="sum-001")
+    vid = vehicle["id"]
+    assert client.patch(f"/vehicles/{vid}", json={"brand": "Nissan", "status": "SOLD"}).status_code == 200
+
+    # Venta: no hay endpoint de alta; se inserta como lo haría un escritor (con refresh)
+    S = models.Sale.__table__
+    with database.engine.begin() as conn:
+        sale_id = conn.execute(insert(S).values(vehicle_id=vid, sale_price=900.0, amount_paid=0.0,
+                                                status=models.SaleStatus.OPEN).returning(S.c.id)).scalar_one()
+        summary.refresh(conn, [vid])
+    assert client.post(f"/sales/{sale_id}/payments", json={"amount": 250.5}).status_code == 200
+    response = client.post("/tramites/", json={"referencia": "SUM-1", "vehiculo_id": vid, "items": [
+        {"descripcion": "placa", "monto": 40}, {"descripcion": "revisado", "monto": 12.25},
+    ]})
+    assert response.status_code == 200, response.text
+    assert client.post(f"/vehicles/{vid}/photos", files={"files": ("a.png", _png(), "image/png")}).status_code == 200
+
+    other = make_vehicle()
+    doomed = make_vehicle()
+    client.post("/tramites/", json={"referencia": "SUM-2", "vehiculo_id": doomed["id"],
+                                     "items": [{"descripcion": "x", "monto": 5}]})
+    response = client.post("/vehicles/batch", json={"operations": [
+        {"op": "update", "id": other["id"], "data": {"year": 2001}},
+        {"op": "delete", "id": doomed["id"]},
+        {"op": "create", "data": {"vin": "SUMBATCH0001", "brand": "Kia", "model": "Rio", "year": 2019,
+                                  "odometer_km": 10, "acquisition_type": "DIRECT_SALE", "seller_name": "Sum"}},
+    ]})
+    assert response.status_code == 200, response.text
+    assert client.delete(f"/vehicles/{other['id']}").status_code == 200
+    imported = client.post("/imports/vehicles", files={"file": (
+        "v.csv", "vin,brand,model,year,odometer_km,acquisition_type,seller_name\n"
+                 "SUMIMPORT0001,Ford,Ka,2015,99,TRADE_IN,Sum\n", "text/csv")})
+    assert imported.json()["inserted"] == 1
+
+    result = _verify()
+    assert result["ok"], result
+
+    with database.engine.connect() as conn:
+        T = models.VehicleSummary.__table__
+        s = conn.execute(T.select().where(T.c.vehicle_id == vid)).one()
+    assert (s.brand, s.status, s.cost_tramite, s.amount_paid, s.balance) == (
+        "Nissan", models.VehicleStatus.SOLD, 52.25, 250.5, 649.5)
+    assert s.main_photo_url and s.main_photo_url.endswith("card.webp")
+
+
+def test_verify_reports_drift(client, dataset):
+    with database.engine.begin() as conn:
+        summary.rebuild(conn)
+        T = models.VehicleSummary.__table__
+        vid = conn.execute(T.select().limit(1)).first().vehicle_id
+        conn.execute(update(T).where(T.c.vehicle_id == vid).values(total_cost=T.c.total_cost + 1))
+    result = _verify()
+    assert not result["ok"]
+    assert result["missing_or_wrong_ids"] == [vid] and result["stale_ids"] == [vid]
+    with database.engine.begin() as conn:
+        summary.rebuild(conn)
+    assert _verify()["ok"]
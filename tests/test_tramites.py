@@ -0,0 +1,77 @@
+"""Trámites: encabezado con total e items_count, y paginación por cursor de /tramites/documentos."""
+
+from datetime import date
+
+
+def _crear(client, **fields):
+    response = client.post("/tramites/", json=fields)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_header_totals_and_items(client, make_vehicle):
+    vehicle = make_vehicle()
+    created = _crear(client, referencia="DOC-1", vehiculo_id=vehicle["id"], fecha="2024-02-03", items=[
+        {"descripcion": "placa", "monto": 40}, {"descripcion": "revisado", "monto": 12.25},
+        {"descripcion": "timbres", "monto": 3.5},
+    ])
+    assert (created["total"], created["fecha"]) == (55.75, "2024-02-03")
+    assert created["items_creados"] == sorted(created["items_creados"]) and len(created["items_creados"]) == 3
+
+    doc = client.get(f"/tramites/documentos/{created['id']}").json()
+    assert (doc["total"], doc["items_count"], doc["referencia"]) == (55.75, 3, "DOC-1")
+    assert [i["id"] for i in doc["items"]] == created["items_creados"]
+    assert [i["descripcion"] for i in doc["items"]] == ["placa", "revisado", "timbres"]
+    assert all((i["tramite_id"], i["vehiculo_id"], i["tipo"]) == (created["id"], vehicle["id"], "tramite")
+               for i in doc["items"])
+
+    # Las líneas también se listan y filtran por documento
+    items = client.get("/tramites/", params={"tramite_id": created["id"]}).json()
+    assert [i["id"] for i in items] == created["items_creados"]
+
+
+def test_header_without_items_and_unknown_vehicle(client):
+    empty = _crear(client, referencia="DOC-EMPTY", items=[])
+    doc = client.get(f"/tramites/documentos/{empty['id']}").json()
+    assert (doc["total"], doc["items_count"], doc["items"]) == (0, 0, [])
+    assert client.get("/tramites/documentos/999999999").status_code == 404
+    response = client.post("/tramites/", json={"vehiculo_id": 999999999,
+                                                "items": [{"descripcion": "x", "monto": 1}]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Vehículo no encontrado"
+
+
+def test_documents_keyset_paging(client, make_vehicle):
+    vid = make_vehicle()["id"]
+    fechas = ["2023-05-01", "2023-05-03", "2023-05-01", "2023-05-02", "2023-05-03", "2023-05-03", "2023-04-30"]
+    ids, montos = {}, {}
+    for n, fecha in enumerate(fechas, start=1):
+        doc_id = _crear(client, referencia=f"PG-{n}", vehiculo_id=vid, fecha=fecha,
+                        items=[{"descripcion": "x", "monto": n}])["id"]
+        ids[doc_id], montos[doc_id] = fecha, n
+    expected = sorted(ids, key=lambda i: (ids[i], i), reverse=True)  # fecha DESC, id DESC
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"vehiculo_id": vid, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tramites/documentos", params=params)
+        assert response.status_code == 200
+        seen += [d["id"] for d in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == expected
+    assert pages == 4
+
+    # Filtros por fecha y total
+    window = client.get("/tramites/documentos", params={
+        "vehiculo_id": vid, "fecha_desde": "2023-05-01", "fecha_hasta": "2023-05-02", "total_min": 2,
+    }).json()
+    assert [d["id"] for d in window] == [
+        i for i in expected if "2023-05-01" <= ids[i] <= "2023-05-02" and montos[i] >= 2
+    ]
+    assert all(date.fromisoformat(d["fecha"]) <= date(2023, 5, 2) for d in window)
+    assert client.get("/tramites/documentos", params={"cursor": "nope"}).status_code == 400